@@ -1,112 +1,508 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Depends
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, APIRouter, File, UploadFile, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
+from typing import Optional, List, Dict, Any, Union
+from datetime import datetime
+import gc
 import os
+import json
+import shutil
+import tempfile
+import aiofiles
 from dotenv import load_dotenv
 
 from services.document_processor import DocumentProcessor
 from services.vector_store import VectorStore
+from services.vector_backends import validate_collection_name, InvalidCollectionNameError
+from services.dimension_reduction import InsufficientSamplesError
+from services.embedding_engines import load_embedding_engine
 from services.rag_service import RAGService
+from services.executors import shutdown_executors, get_ingest_executor, get_query_executor, run_in_executor
+from services.bulk_ingest import ingest_path, is_archive, ARCHIVE_EXTENSIONS
 
 load_dotenv()
 
-app = FastAPI(
-    title="RAG System API",
-    description="문서 기반 질의응답 시스템",
-    version="1.0.0"
-)
+# gunicorn --preload 등으로 워커를 fork하기 전에 모델을 로드하면
+# 모든 워커가 모델 메모리를 copy-on-write로 공유합니다.
+# (fork 전에는 인코딩을 실행하지 않아야 torch 스레드 풀이 안전하고,
+#  ONNX 엔진은 가중치/토크나이저만 공유하고 onnxruntime 세션은 워커마다 처음 인코딩할 때 만듦)
+PRELOAD_MODEL = os.getenv("PRELOAD_MODEL", "False").lower() == "true"
+if PRELOAD_MODEL:
+    load_embedding_engine().before_fork()
+    # 이후 GC가 공유 페이지를 건드려 복사가 일어나지 않도록 고정
+    gc.freeze()
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+router = APIRouter()
 
-doc_processor = DocumentProcessor()
-vector_store = VectorStore()
-rag_service = RAGService(vector_store)
+class SearchFilters(BaseModel):
+    filename: Optional[Union[str, List[str]]] = None
+    file_type: Optional[Union[str, List[str]]] = None
+    document_id: Optional[Union[str, List[str]]] = None
+    page_from: Optional[int] = None
+    page_to: Optional[int] = None
+    uploaded_after: Optional[datetime] = None
+    uploaded_before: Optional[datetime] = None
 
 class ChatRequest(BaseModel):
     question: str
     collection_name: str = "default"
+    # 여러 컬렉션을 동시에 검색 (["all"]이면 전체 컬렉션)
+    collection_names: Optional[List[str]] = None
+    filters: Optional[SearchFilters] = None
 
 class ChatResponse(BaseModel):
     answer: str
     sources: list[str]
     confidence: float
+    collection_latencies: Dict[str, float] = {}
+    # 의미적으로 같은 이전 질문의 답변을 재사용한 경우 True
+    cached: bool = False
 
-@app.get("/")
+class BatchChatRequest(BaseModel):
+    questions: List[str]
+    collection_name: str = "default"
+    filters: Optional[SearchFilters] = None
+    max_concurrency: int = 8
+
+class CreateCollectionRequest(BaseModel):
+    name: str
+    reduced_dim: Optional[int] = None
+    reduction: str = "pca"
+
+class BulkIngestRequest(BaseModel):
+    # BULK_INGEST_ROOT(기본값: UPLOAD_DIR) 아래의 디렉터리 또는 아카이브 경로
+    path: Optional[str] = None
+    collection_name: str = "default"
+    batch_size: Optional[int] = None
+
+def get_doc_processor(request: Request) -> DocumentProcessor:
+    return request.app.state.doc_processor
+
+def get_vector_store(request: Request) -> VectorStore:
+    return request.app.state.vector_store
+
+def get_rag_service(request: Request) -> RAGService:
+    return request.app.state.rag_service
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ready = False
+    app.state.warmup_error = None
+    
+    # Chroma 클라이언트 등은 워커 프로세스마다 생성 (fork 이후)
+    app.state.doc_processor = DocumentProcessor()
+    app.state.vector_store = VectorStore()
+    app.state.rag_service = RAGService(app.state.vector_store)
+    
+    if os.getenv("WARMUP_ON_STARTUP", "True").lower() == "true":
+        try:
+            app.state.vector_store.warmup()
+        except Exception as e:
+            app.state.warmup_error = str(e)
+            print(f"워밍업 중 오류 발생: {str(e)}")
+    
+    app.state.ready = app.state.warmup_error is None
+    
+    yield
+    
+    app.state.ready = False
+    await app.state.rag_service.close()
+    shutdown_executors()
+    app.state.vector_store.close()
+
+def create_app() -> FastAPI:
+    app = FastAPI(
+        title="RAG System API",
+        description="문서 기반 질의응답 시스템",
+        version="1.0.0",
+        lifespan=lifespan
+    )
+    
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    
+    app.include_router(router)
+    return app
+
+@router.get("/")
 async def root():
     return {"message": "RAG System API is running"}
 
-@app.post("/upload", response_model=dict)
+@router.get("/ready")
+async def ready(request: Request):
+    if getattr(request.app.state, "ready", False):
+        return {"status": "ready"}
+    
+    return JSONResponse(
+        status_code=503,
+        content={
+            "status": "starting",
+            "error": getattr(request.app.state, "warmup_error", None)
+        }
+    )
+
+def check_collection_name(collection_name: str) -> str:
+    # 컬렉션 이름은 저장소 파일 경로에 쓰이므로 적재 전에 검증
+    try:
+        return validate_collection_name(collection_name)
+    except InvalidCollectionNameError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def save_upload(file: UploadFile) -> str:
+    if not file.filename.endswith(('.pdf', '.docx', '.txt')):
+        raise HTTPException(
+            status_code=400,
+            detail="지원하지 않는 파일 형식입니다. PDF, DOCX, TXT 파일만 업로드 가능합니다."
+        )
+    
+    upload_dir = os.getenv("UPLOAD_DIR", "./documents")
+    os.makedirs(upload_dir, exist_ok=True)
+    
+    file_path = os.path.join(upload_dir, file.filename)
+    
+    async with aiofiles.open(file_path, "wb") as buffer:
+        content = await file.read()
+        await buffer.write(content)
+    return file_path
+
+def ingest_streamed_upload(
+    file_path: str,
+    collection_name: str,
+    doc_processor: DocumentProcessor,
+    vector_store: VectorStore
+) -> Optional[Dict[str, Any]]:
+    """대용량 PDF는 페이지 단위로 추출/분할하면서 배치별로 임베딩 (메모리 사용량 제한), 스트리밍 대상이 아니면 None"""
+    if not doc_processor.should_stream(file_path):
+        return None
+    return vector_store.add_document_stream(doc_processor.iter_chunks(file_path), collection_name)
+
+@router.post("/upload", response_model=dict)
 async def upload_document(
     file: UploadFile = File(...),
-    collection_name: str = "default"
+    collection_name: str = "default",
+    doc_processor: DocumentProcessor = Depends(get_doc_processor),
+    vector_store: VectorStore = Depends(get_vector_store)
 ):
+    check_collection_name(collection_name)
     try:
-        if not file.filename.endswith(('.pdf', '.docx', '.txt')):
-            raise HTTPException(
-                status_code=400, 
-                detail="지원하지 않는 파일 형식입니다. PDF, DOCX, TXT 파일만 업로드 가능합니다."
-            )
-        
-        upload_dir = os.getenv("UPLOAD_DIR", "./documents")
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        file_path = os.path.join(upload_dir, file.filename)
-        
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        file_path = await save_upload(file)
         
-        chunks = doc_processor.process_document(file_path)
-        
-        success_count = vector_store.add_documents(chunks, collection_name)
+        # PDF를 여는 스트리밍 여부 판단도 이벤트 루프를 막지 않도록 수집 스레드에서 추출과 함께 실행
+        add_stats = await run_in_executor(
+            get_ingest_executor(), ingest_streamed_upload, file_path, collection_name, doc_processor, vector_store
+        )
+        if add_stats is not None:
+            if "error" in add_stats:
+                raise ValueError(add_stats["error"])
+            chunks_count = add_stats["chunks_count"]
+        else:
+            # 파싱은 추출 프로세스 풀, 임베딩/저장은 수집 스레드 풀에서 실행
+            chunks = await doc_processor.process_document_async(file_path)
+            add_stats = await vector_store.add_documents_async(chunks, collection_name)
+            if "error" in add_stats:
+                raise ValueError(add_stats["error"])
+            chunks_count = len(chunks)
         
         return {
             "message": f"문서가 성공적으로 업로드되었습니다.",
             "filename": file.filename,
-            "chunks_count": len(chunks),
-            "stored_count": success_count,
+            "chunks_count": chunks_count,
+            "stored_count": add_stats["stored_count"],
+            "embedded_count": add_stats["embedded_count"],
+            "skipped_count": add_stats["skipped_count"],
+            "near_duplicate_count": add_stats["near_duplicate_count"],
+            "embedding_seconds": add_stats["embedding_seconds"],
+            "chunks_per_sec": add_stats["chunks_per_sec"],
             "collection": collection_name
         }
-        
+    
+    except InsufficientSamplesError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"문서 처리 중 오류가 발생했습니다: {str(e)}")
 
-@app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+def resolve_ingest_path(path: Optional[str]) -> str:
+    # 서버의 임의 경로를 읽지 않도록 BULK_INGEST_ROOT 아래로 제한
+    root = os.path.abspath(os.getenv("BULK_INGEST_ROOT", os.getenv("UPLOAD_DIR", "./documents")))
+    resolved = os.path.abspath(os.path.join(root, path or ""))
+    if os.path.commonpath([resolved, root]) != root:
+        raise HTTPException(status_code=400, detail="허용되지 않는 경로입니다.")
+    if not os.path.exists(resolved):
+        raise HTTPException(status_code=404, detail="경로를 찾을 수 없습니다.")
+    return resolved
+
+@router.post("/ingest/bulk")
+async def bulk_ingest(
+    request: BulkIngestRequest,
+    doc_processor: DocumentProcessor = Depends(get_doc_processor),
+    vector_store: VectorStore = Depends(get_vector_store)
+):
+    # 추출 -> 임베딩 -> 저장 단계를 겹쳐 실행하고 단계별 처리량과 파일별 실패를 보고
+    check_collection_name(request.collection_name)
+    source = resolve_ingest_path(request.path)
+    try:
+        return await run_in_executor(
+            get_ingest_executor(),
+            ingest_path,
+            source,
+            doc_processor,
+            vector_store,
+            collection_name=request.collection_name,
+            batch_size=request.batch_size
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"대량 적재 중 오류가 발생했습니다: {str(e)}")
+
+@router.post("/ingest/archive")
+async def ingest_archive(
+    file: UploadFile = File(...),
+    collection_name: str = "default",
+    doc_processor: DocumentProcessor = Depends(get_doc_processor),
+    vector_store: VectorStore = Depends(get_vector_store)
+):
+    check_collection_name(collection_name)
+    filename = os.path.basename(file.filename or "")
+    if not filename.lower().endswith(ARCHIVE_EXTENSIONS):
+        raise HTTPException(status_code=400, detail="zip 또는 tar 아카이브만 업로드할 수 있습니다.")
+    
+    # 업로드 디렉터리의 같은 이름 문서를 덮어쓰거나 지우지 않도록 임시 디렉터리에 받음 (압축은 UPLOAD_DIR 아래에 풂)
+    tmp_dir = tempfile.mkdtemp(prefix="archive-")
+    archive_path = os.path.join(tmp_dir, filename)
+    try:
+        async with aiofiles.open(archive_path, "wb") as buffer:
+            while block := await file.read(1 << 20):
+                await buffer.write(block)
+        
+        if not is_archive(archive_path):
+            raise HTTPException(status_code=400, detail="zip 또는 tar 아카이브만 업로드할 수 있습니다.")
+        return await run_in_executor(
+            get_ingest_executor(),
+            ingest_path,
+            archive_path,
+            doc_processor,
+            vector_store,
+            collection_name=collection_name
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"대량 적재 중 오류가 발생했습니다: {str(e)}")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+@router.post("/chat", response_model=ChatResponse)
+async def chat(
+    request: ChatRequest,
+    rag_service: RAGService = Depends(get_rag_service)
+):
     try:
         response = await rag_service.get_answer(
             question=request.question,
-            collection_name=request.collection_name
+            collection_name=request.collection_names or request.collection_name,
+            filters=request.filters.model_dump(exclude_none=True) if request.filters else None
         )
         
         return ChatResponse(
             answer=response["answer"],
             sources=response["sources"],
-            confidence=response["confidence"]
+            confidence=response["confidence"],
+            collection_latencies=response.get("collection_latencies", {}),
+            cached=response.get("cached", False)
         )
-        
+    
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"답변 생성 중 오류가 발생했습니다: {str(e)}")
 
-@app.get("/collections")
-async def list_collections():
+@router.post("/chat/stream")
+async def chat_stream(
+    request: ChatRequest,
+    rag_service: RAGService = Depends(get_rag_service)
+):
+    # Server-Sent Events: sources -> token ... -> done(ttft_ms 포함) 또는 error
+    async def generate():
+        async for event in rag_service.stream_answer(
+            question=request.question,
+            collection_name=request.collection_names or request.collection_name,
+            filters=request.filters.model_dump(exclude_none=True) if request.filters else None
+        ):
+            yield f"event: {event['event']}\ndata: {json.dumps(event['data'], ensure_ascii=False)}\n\n"
+    
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        # 프록시(nginx 등)가 이벤트를 모아 보내지 않도록 버퍼링 비활성화
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/chat/batch")
+async def chat_batch(
+    request: BatchChatRequest,
+    rag_service: RAGService = Depends(get_rag_service)
+):
+    # 완료되는 순서대로 NDJSON 한 줄씩 스트리밍 (각 줄의 index로 원래 순서 확인)
+    async def generate():
+        async for result in rag_service.get_answers(
+            request.questions,
+            collection_name=request.collection_name,
+            filters=request.filters.model_dump(exclude_none=True) if request.filters else None,
+            max_concurrency=request.max_concurrency
+        ):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+@router.get("/collections")
+async def list_collections(vector_store: VectorStore = Depends(get_vector_store)):
     try:
-        collections = vector_store.list_collections()
+        collections = await vector_store.list_collections_async()
         return {"collections": collections}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"컬렉션 조회 중 오류가 발생했습니다: {str(e)}")
 
-@app.delete("/collections/{collection_name}")
-async def delete_collection(collection_name: str):
+@router.post("/collections")
+async def create_collection(
+    request: CreateCollectionRequest,
+    vector_store: VectorStore = Depends(get_vector_store)
+):
+    check_collection_name(request.name)
+    try:
+        return await vector_store.create_collection_async(
+            request.name,
+            reduced_dim=request.reduced_dim,
+            reduction=request.reduction
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"컬렉션 생성 중 오류가 발생했습니다: {str(e)}")
+
+@router.get("/collections/{collection_name}")
+async def get_collection_info(
+    collection_name: str,
+    vector_store: VectorStore = Depends(get_vector_store)
+):
+    info = await vector_store.get_collection_info_async(collection_name)
+    if not info:
+        raise HTTPException(status_code=404, detail="컬렉션을 찾을 수 없습니다.")
+    return info
+
+@router.get("/collections/{collection_name}/documents")
+async def list_documents(
+    collection_name: str,
+    vector_store: VectorStore = Depends(get_vector_store)
+):
+    if collection_name not in await vector_store.list_collections_async():
+        raise HTTPException(status_code=404, detail="컬렉션을 찾을 수 없습니다.")
+    try:
+        documents = await vector_store.list_documents_async(collection_name)
+        return {"collection": collection_name, "documents": documents}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"문서 목록 조회 중 오류가 발생했습니다: {str(e)}")
+
+@router.put("/collections/{collection_name}/documents", response_model=dict)
+async def replace_document(
+    collection_name: str,
+    file: UploadFile = File(...),
+    doc_processor: DocumentProcessor = Depends(get_doc_processor),
+    vector_store: VectorStore = Depends(get_vector_store)
+):
+    # 같은 파일명의 기존 청크를 새 버전으로 교체 (변경되지 않은 청크는 재임베딩하지 않음)
+    check_collection_name(collection_name)
+    file_path = await save_upload(file)
+    try:
+        chunks = await doc_processor.process_document_async(file_path)
+        stats = await vector_store.replace_document_async(chunks, collection_name)
+        return {
+            "message": f"문서 '{file.filename}'이 교체되었습니다.",
+            "filename": file.filename,
+            "chunks_count": len(chunks),
+            "collection": collection_name,
+            **stats
+        }
+    except InsufficientSamplesError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"문서 교체 중 오류가 발생했습니다: {str(e)}")
+
+@router.delete("/collections/{collection_name}/documents")
+async def delete_document(
+    collection_name: str,
+    filename: Optional[str] = None,
+    document_id: Optional[str] = None,
+    vector_store: VectorStore = Depends(get_vector_store)
+):
+    if filename is None and document_id is None:
+        raise HTTPException(status_code=400, detail="filename 또는 document_id를 지정해주세요.")
+    if collection_name not in await vector_store.list_collections_async():
+        raise HTTPException(status_code=404, detail="컬렉션을 찾을 수 없습니다.")
     try:
-        success = vector_store.delete_collection(collection_name)
+        deleted_count = await vector_store.delete_document_async(
+            collection_name,
+            filename=filename,
+            document_id=document_id
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"문서 삭제 중 오류가 발생했습니다: {str(e)}")
+    
+    if deleted_count == 0:
+        raise HTTPException(status_code=404, detail="문서를 찾을 수 없습니다.")
+    return {"message": "문서가 삭제되었습니다.", "deleted_count": deleted_count}
+
+@router.get("/cache/stats")
+async def cache_stats(
+    vector_store: VectorStore = Depends(get_vector_store),
+    doc_processor: DocumentProcessor = Depends(get_doc_processor),
+    rag_service: RAGService = Depends(get_rag_service)
+):
+    def collect_stats():
+        stats = vector_store.get_cache_stats()
+        # 추출 캐시는 디스크 기준 (hits/misses는 이 프로세스에서 직접 처리한 문서만 집계)
+        stats["extraction_cache"] = doc_processor.extraction_cache.stats() if doc_processor.extraction_cache else None
+        stats["answer_cache"] = rag_service.answer_cache.stats() if rag_service.answer_cache else None
+        return stats
+    
+    # 임베딩 캐시(SQLite)와 추출 캐시 디렉터리 조회는 이벤트 루프 밖에서 실행
+    return await run_in_executor(get_query_executor(), collect_stats)
+
+@router.get("/embedding/parity")
+async def embedding_parity(vector_store: VectorStore = Depends(get_vector_store)):
+    # 현재 임베딩 엔진(EMBEDDING_ENGINE)과 PyTorch 기준 임베딩의 코사인 유사도와 속도 비교
+    try:
+        return await vector_store.check_embedding_parity_async()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"임베딩 일치도 확인 중 오류가 발생했습니다: {str(e)}")
+
+@router.get("/collections/{collection_name}/quantization")
+async def evaluate_quantization(
+    collection_name: str,
+    k: int = 10,
+    n_queries: int = 100,
+    vector_store: VectorStore = Depends(get_vector_store)
+):
+    try:
+        report = await vector_store.evaluate_quantization_async(collection_name, k=k, n_queries=n_queries)
+        if not report:
+            raise HTTPException(status_code=404, detail="컬렉션이 비어 있거나 존재하지 않습니다.")
+        return report
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"양자화 평가 중 오류가 발생했습니다: {str(e)}")
+
+@router.delete("/collections/{collection_name}")
+async def delete_collection(
+    collection_name: str,
+    vector_store: VectorStore = Depends(get_vector_store)
+):
+    try:
+        success = await vector_store.delete_collection_async(collection_name)
         if success:
             return {"message": f"컬렉션 '{collection_name}'이 삭제되었습니다."}
         else:
@@ -114,10 +510,12 @@ async def delete_collection(collection_name: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"컬렉션 삭제 중 오류가 발생했습니다: {str(e)}")
 
+app = create_app()
+
 if __name__ == "__main__":
     import uvicorn
     host = os.getenv("APP_HOST", "0.0.0.0")
     port = int(os.getenv("APP_PORT", "8000"))
     debug = os.getenv("DEBUG", "True").lower() == "true"
     
-    uvicorn.run(app, host=host, port=port, reload=debug)
\ No newline at end of file
+    uvicorn.run(app, host=host, port=port, reload=debug)
@@ -0,0 +1,308 @@
+import os
+import time
+import queue
+import tarfile
+import zipfile
+import threading
+from collections import deque
+from typing import List, Dict, Any, Optional
+
+from .document_processor import DocumentProcessor, DocumentChunk, _process_document_in_worker
+from .vector_store import VectorStore
+from .executors import get_extraction_executor, shutdown_executors
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.txt')
+ARCHIVE_EXTENSIONS = ('.tar.gz', '.tgz', '.tar.bz2', '.tar', '.zip')
+
+_DONE = object()
+
+def collect_files(source: str) -> List[str]:
+    """디렉터리 아래의 지원 형식 파일 목록 (정렬된 순서)"""
+    if os.path.isfile(source):
+        return [source] if source.lower().endswith(SUPPORTED_EXTENSIONS) else []
+
+    files = []
+    for root, _, names in os.walk(source):
+        for name in names:
+            if name.lower().endswith(SUPPORTED_EXTENSIONS) and not name.startswith('.'):
+                files.append(os.path.join(root, name))
+    return sorted(files)
+
+def is_archive(path: str) -> bool:
+    return os.path.isfile(path) and (zipfile.is_zipfile(path) or tarfile.is_tarfile(path))
+
+def extract_archive(archive_path: str, target_dir: str) -> str:
+    """zip/tar 아카이브를 target_dir 아래 아카이브 이름의 디렉터리에 풀고 그 경로를 반환"""
+    name = os.path.basename(archive_path)
+    for suffix in ARCHIVE_EXTENSIONS:
+        if name.lower().endswith(suffix):
+            name = name[:-len(suffix)]
+            break
+    destination = os.path.abspath(os.path.join(target_dir, name))
+    os.makedirs(destination, exist_ok=True)
+
+    def safe_path(member_name: str) -> str:
+        # 아카이브 밖으로 벗어나는 경로(../, 절대 경로)는 거부
+        path = os.path.abspath(os.path.join(destination, member_name))
+        if os.path.commonpath([path, destination]) != destination:
+            raise ValueError(f"아카이브에 허용되지 않는 경로가 있습니다: {member_name}")
+        return path
+
+    if zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as archive:
+            for member in archive.infolist():
+                safe_path(member.filename)
+            archive.extractall(destination)
+    else:
+        with tarfile.open(archive_path) as archive:
+            members = [member for member in archive.getmembers() if member.isfile() or member.isdir()]
+            for member in members:
+                safe_path(member.name)
+            archive.extractall(destination, members=members)
+    return destination
+
+class _StageStats:
+    def __init__(self, unit: str):
+        self.unit = unit
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    def report(self) -> Dict[str, Any]:
+        elapsed = (self.finished or time.perf_counter()) - (self.started or time.perf_counter())
+        return {
+            "unit": self.unit,
+            "items": self.items,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "elapsed_seconds": round(elapsed, 3),
+            "items_per_sec": round(self.items / elapsed, 1) if elapsed > 0 else 0.0,
+            # 큐 대기 시간을 뺀 단계 자체의 처리 속도
+            "busy_items_per_sec": round(self.items / self.busy_seconds, 1) if self.busy_seconds > 0 else 0.0
+        }
+
+class BulkIngestPipeline:
+    """추출/분할 -> 배치 임베딩 -> 배치 저장을 겹쳐 실행하는 대량 적재 파이프라인
+
+    단계 사이는 크기가 제한된 큐로 연결되어 느린 단계가 앞 단계를 자연스럽게 늦춥니다.
+    파일 하나의 실패는 기록만 하고 나머지 파일은 계속 처리합니다.
+    """
+
+    def __init__(
+        self,
+        doc_processor: DocumentProcessor,
+        vector_store: VectorStore,
+        collection_name: str = "default",
+        batch_size: Optional[int] = None,
+        queue_size: int = 4,
+        max_files_in_flight: Optional[int] = None
+    ):
+        self.doc_processor = doc_processor
+        self.vector_store = vector_store
+        self.collection_name = collection_name
+        self.batch_size = batch_size or vector_store.stream_batch_size
+        self.max_files_in_flight = max_files_in_flight or 2 * int(os.getenv("EXTRACTION_PROCESSES", "2"))
+
+        self._chunk_queue: queue.Queue = queue.Queue(maxsize=self.batch_size * queue_size)
+        self._prepared_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._failures: Dict[str, Dict[str, str]] = {}
+        self._stages = {
+            "extract": _StageStats("files"),
+            "embed": _StageStats("chunks"),
+            "store": _StageStats("chunks")
+        }
+        self._counts = {"chunks_count": 0, "stored_count": 0, "skipped_count": 0, "near_duplicate_count": 0}
+
+    def _fail(self, file_paths, stage: str, error: Exception):
+        with self._lock:
+            for file_path in file_paths:
+                self._failures.setdefault(file_path, {"file": file_path, "stage": stage, "error": str(error)})
+        print(f"대량 적재 {stage} 단계 오류 ({', '.join(file_paths)}): {str(error)}")
+
+    def run(self, files: List[str]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        threads = [
+            threading.Thread(target=self._extract_stage, args=(files,), name="bulk-extract"),
+            threading.Thread(target=self._embed_stage, name="bulk-embed"),
+            threading.Thread(target=self._store_stage, name="bulk-store")
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if self._counts["stored_count"]:
+            self.vector_store.flush_indexes(self.collection_name)
+
+        failed = list(self._failures.values())
+        return {
+            "collection": self.collection_name,
+            "files_total": len(files),
+            "files_succeeded": len(files) - len(failed),
+            "files_failed": failed,
+            **self._counts,
+            "elapsed_seconds": round(time.perf_counter() - start, 3),
+            "stages": {name: stats.report() for name, stats in self._stages.items()}
+        }
+
+    def _extract_stage(self, files: List[str]):
+        # 파일 단위로 추출 프로세스 풀에 제출 (대용량 PDF는 페이지 단위 스트리밍)
+        stats = self._stages["extract"]
+        stats.started = time.perf_counter()
+        executor = get_extraction_executor()
+        config = self.doc_processor._worker_config()
+        pending = deque()
+        handled = set()
+
+        def emit(file_path: str, chunks):
+            for chunk in chunks:
+                self._chunk_queue.put(chunk)
+                self._counts["chunks_count"] += 1
+            stats.items += 1
+
+        def drain_one():
+            file_path, future = pending.popleft()
+            try:
+                emit(file_path, future.result())
+            except Exception as e:
+                self._fail([file_path], "extract", e)
+            handled.add(file_path)
+
+        try:
+            for file_path in files:
+                if self._stream_one(file_path, emit):
+                    handled.add(file_path)
+                    continue
+
+                pending.append((file_path, executor.submit(_process_document_in_worker, config, file_path)))
+                if len(pending) >= self.max_files_in_flight:
+                    drain_one()
+            while pending:
+                drain_one()
+        except Exception as e:
+            # 단계 자체가 실패해도 (프로세스 풀 종료 등) 스레드가 조용히 죽지 않도록 끝나지 않은 파일을 모두 실패로 기록
+            for _, future in pending:
+                future.cancel()
+            self._fail([file_path for file_path in files if file_path not in handled], "extract", e)
+        finally:
+            stats.finished = time.perf_counter()
+            stats.busy_seconds = stats.finished - stats.started
+            self._chunk_queue.put(_DONE)
+
+    def _stream_one(self, file_path: str, emit) -> bool:
+        """대용량 PDF는 이 스레드에서 페이지 단위로 스트리밍 (처리했으면 True)"""
+        try:
+            if not self.doc_processor.should_stream(file_path):
+                return False
+            emit(file_path, self.doc_processor.iter_chunks(file_path))
+        except Exception as e:
+            self._fail([file_path], "extract", e)
+        return True
+
+    def _embed_stage(self):
+        stats = self._stages["embed"]
+        stats.started = time.perf_counter()
+        batch: List[DocumentChunk] = []
+        done = False
+        # PCA 투영을 학습하기 전이면 첫 배치를 학습에 충분한 크기까지 모아서 처리
+        first_batch_size = self.vector_store._projection_samples_needed(self.collection_name)
+        while not done:
+            item = self._chunk_queue.get()
+            if item is _DONE:
+                done = True
+            else:
+                batch.append(item)
+            if batch and (done or len(batch) >= max(self.batch_size, first_batch_size)):
+                first_batch_size = 0
+                busy_start = time.perf_counter()
+                prepared = None
+                try:
+                    prepared = self.vector_store.prepare_batch(batch, self.collection_name)
+                    self._prepared_queue.put((batch, prepared))
+                except Exception as e:
+                    # prepare_batch 안에서의 실패는 스스로 되돌리고, 준비를 마친 뒤 실패하면 여기서 근사 중복 서명을 제거
+                    if prepared is not None:
+                        self.vector_store.discard_batch(prepared)
+                    self._fail(self._batch_files(batch), "embed", e)
+                stats.busy_seconds += time.perf_counter() - busy_start
+                stats.items += len(batch)
+                batch = []
+        stats.finished = time.perf_counter()
+        self._prepared_queue.put(_DONE)
+
+    def _store_stage(self):
+        stats = self._stages["store"]
+        stats.started = time.perf_counter()
+        while True:
+            item = self._prepared_queue.get()
+            if item is _DONE:
+                break
+            batch, prepared = item
+            busy_start = time.perf_counter()
+            try:
+                self.vector_store.store_batch(prepared, save_indexes=False)
+                self._counts["stored_count"] += len(prepared["ids"])
+                self._counts["skipped_count"] += prepared["skipped_count"]
+                self._counts["near_duplicate_count"] += prepared["near_duplicate_count"]
+            except Exception as e:
+                self.vector_store.discard_batch(prepared)
+                self._fail(self._batch_files(batch), "store", e)
+            stats.busy_seconds += time.perf_counter() - busy_start
+            stats.items += len(batch)
+        stats.finished = time.perf_counter()
+
+    @staticmethod
+    def _batch_files(batch: List[DocumentChunk]) -> List[str]:
+        return list(dict.fromkeys(chunk.metadata.get("file_path", "") for chunk in batch))
+
+def ingest_path(
+    source: str,
+    doc_processor: DocumentProcessor,
+    vector_store: VectorStore,
+    collection_name: str = "default",
+    extract_to: Optional[str] = None,
+    batch_size: Optional[int] = None
+) -> Dict[str, Any]:
+    """디렉터리, 단일 파일 또는 zip/tar 아카이브를 적재"""
+    if not os.path.exists(source):
+        raise ValueError(f"경로를 찾을 수 없습니다: {source}")
+    if is_archive(source) and not source.lower().endswith(SUPPORTED_EXTENSIONS):
+        source = extract_archive(source, extract_to or os.getenv("UPLOAD_DIR", "./documents"))
+
+    files = collect_files(source)
+    pipeline = BulkIngestPipeline(doc_processor, vector_store, collection_name, batch_size=batch_size)
+    report = pipeline.run(files)
+    report["source"] = source
+    return report
+
+def main():
+    import argparse
+    import json
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="디렉터리 또는 zip/tar 아카이브의 문서를 한 번에 적재")
+    parser.add_argument("source", nargs="?", default=os.getenv("UPLOAD_DIR", "./documents"))
+    parser.add_argument("--collection", default="default")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--extract-to", default=None, help="아카이브를 풀 디렉터리 (기본값: UPLOAD_DIR)")
+    args = parser.parse_args()
+
+    vector_store = VectorStore()
+    try:
+        report = ingest_path(
+            args.source,
+            DocumentProcessor(),
+            vector_store,
+            collection_name=args.collection,
+            extract_to=args.extract_to,
+            batch_size=args.batch_size
+        )
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    finally:
+        vector_store.close()
+        shutdown_executors()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+import os
+import json
+import tempfile
+import uuid
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Union
+
+import numpy as np
+
+from .vector_backends import collection_file
+from .file_lock import file_lock
+
+class LRUCache:
+    """크기 제한과 TTL을 가진 스레드 안전 LRU 캐시"""
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, stored_at = entry
+            if self.ttl_seconds is not None and time.monotonic() - stored_at > self.ttl_seconds:
+                del self._data[key]
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0
+            }
+
+class CollectionVersions:
+    """컬렉션 변경 시 바뀌는 버전 (캐시 무효화용)
+
+    path를 지정하면 컬렉션별 파일에 버전을 저장해 재시작 후에도, 다른 워커 프로세스 사이에서도
+    같은 버전을 봅니다. 이때 버전은 카운터 대신 매번 새로 만든 토큰이므로 재시작 후
+    이전 버전 값과 겹치지 않습니다.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._versions: Dict[str, Union[int, str]] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+
+    def _file(self, collection_name: str) -> str:
+        return collection_file(self.path, collection_name, ".version")
+
+    def get(self, collection_name: str) -> Union[int, str]:
+        with self._lock:
+            if self.path is None:
+                return self._versions.get(collection_name, 0)
+
+            path = self._file(collection_name)
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                return 0
+            if self._mtimes.get(collection_name) != mtime:
+                with open(path, "r", encoding="utf-8") as file:
+                    self._versions[collection_name] = file.read().strip()
+                self._mtimes[collection_name] = mtime
+            return self._versions[collection_name]
+
+    def bump(self, collection_name: str) -> Union[int, str]:
+        with self._lock:
+            if self.path is None:
+                version = self._versions.get(collection_name, 0) + 1
+                self._versions[collection_name] = version
+                return version
+
+            version = uuid.uuid4().hex
+            path = self._file(collection_name)
+            tmp_path = f"{path}.{version}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                file.write(version)
+            os.replace(tmp_path, path)
+            self._versions[collection_name] = version
+            self._mtimes[collection_name] = os.path.getmtime(path)
+            return version
+
+class SemanticAnswerCache:
+    """질문 임베딩의 코사인 유사도로 찾는 답변 캐시
+
+    같은 범위(scope: 모델, 컬렉션과 그 버전, 필터 등) 안에서 이전 질문과의 코사인 유사도가
+    threshold 이상이면 저장된 답변을 돌려줍니다. 크기는 max_size로 제한되며 가장 오래 사용되지
+    않은 항목부터 삭제하고, path를 지정하면 save()로 디스크에 기록해 재시작 후에도 사용합니다.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        max_size: int = 1000,
+        ttl_seconds: Optional[float] = None,
+        path: Optional[str] = None
+    ):
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        # 항목 ID -> (scope, 정규화된 임베딩, 값, 저장 시각)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # 마지막으로 읽거나 쓴 파일의 (inode, mtime_ns) (다른 워커가 저장했는지 확인용)
+        self._file_state = None
+        self.hits = 0
+        self.misses = 0
+        if path is not None and os.path.exists(path):
+            try:
+                with file_lock(f"{path}.lock", shared=True):
+                    self._merge_from_disk()
+            except Exception as e:
+                print(f"답변 캐시 로드 중 오류 발생: {str(e)}")
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl_seconds is not None and time.time() - stored_at > self.ttl_seconds
+
+    def get(self, scope: str, embedding) -> Optional[Dict[str, Any]]:
+        """같은 scope에서 가장 비슷한 질문의 답변 (유사도 similarity 포함), 없으면 None"""
+        query = self._normalize(embedding)
+        with self._lock:
+            for entry_id in [entry_id for entry_id, entry in self._entries.items() if self._expired(entry[3])]:
+                del self._entries[entry_id]
+
+            candidates = [
+                (entry_id, entry) for entry_id, entry in self._entries.items()
+                if entry[0] == scope and entry[1].shape == query.shape
+            ]
+            if candidates:
+                similarities = np.stack([entry[1] for _, entry in candidates]) @ query
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    entry_id, entry = candidates[best]
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    return {**entry[2], "similarity": round(float(similarities[best]), 4)}
+
+            self.misses += 1
+            return None
+
+    def set(self, scope: str, embedding, value: Dict[str, Any]):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[uuid.uuid4().hex] = (scope, self._normalize(embedding), value, time.time())
+            self._evict()
+
+    def _evict(self):
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _disk_state(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    def _merge_from_disk(self):
+        # 다른 워커가 저장한 항목 중 없는 것만 추가 (호출 측에서 잠금)
+        with np.load(self.path) as data:
+            embeddings = data["embeddings"]
+            meta = json.loads(str(data["meta"]))
+        for row, item in enumerate(meta):
+            if item["id"] in self._entries or self._expired(item["stored_at"]):
+                continue
+            self._entries[item["id"]] = (item["scope"], embeddings[row], item["value"], item["stored_at"])
+        # 오래된 항목이 먼저 삭제되도록 저장 시각 순으로 정렬
+        self._entries = OrderedDict(sorted(self._entries.items(), key=lambda item: item[1][3]))
+        self._evict()
+        self._file_state = self._disk_state()
+
+    def save(self):
+        if self.path is None:
+            return
+        # 여러 워커가 동시에 저장해도 다른 워커의 항목을 덮어쓰지 않도록 읽기-병합-쓰기를 파일 잠금 안에서 수행
+        with self._lock, file_lock(f"{self.path}.lock"):
+            state = self._disk_state()
+            if state is not None and state != self._file_state:
+                self._merge_from_disk()
+
+            items = list(self._entries.items())
+            dimension = items[0][1][1].shape[0] if items else 0
+            items = [item for item in items if item[1][1].shape[0] == dimension]
+            meta = [
+                {"id": entry_id, "scope": scope, "value": value, "stored_at": stored_at}
+                for entry_id, (scope, _, value, stored_at) in items
+            ]
+            embeddings = (
+                np.stack([entry[1] for _, entry in items]) if items else np.zeros((0, 0), dtype=np.float32)
+            )
+
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f"{os.path.basename(self.path)}.", suffix=".tmp.npz")
+            os.close(fd)
+            try:
+                np.savez_compressed(tmp_path, embeddings=embeddings, meta=np.array(json.dumps(meta, ensure_ascii=False)))
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self._file_state = self._disk_state()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0
+            }
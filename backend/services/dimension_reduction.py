@@ -0,0 +1,92 @@
+import os
+from typing import Optional
+
+import numpy as np
+
+REDUCTION_METHODS = ("pca", "truncate")
+
+class InsufficientSamplesError(ValueError):
+    """PCA 학습에 필요한 청크 수보다 적게 적재하려 할 때 (요청 오류로 처리)"""
+    pass
+
+class Projection:
+    """컬렉션별 임베딩 차원 축소 (PCA 또는 Matryoshka 방식 앞부분 절단)
+
+    축소 후 다시 L2 정규화하므로 축소된 벡터끼리의 거리도 원래와 같은 척도를 가집니다.
+    """
+
+    def __init__(
+        self,
+        method: str,
+        input_dim: int,
+        output_dim: int,
+        mean: Optional[np.ndarray] = None,
+        components: Optional[np.ndarray] = None
+    ):
+        if method not in REDUCTION_METHODS:
+            raise ValueError(f"지원하지 않는 차원 축소 방식: {method}")
+        if not 0 < output_dim <= input_dim:
+            raise ValueError(f"축소 차원은 1 이상 {input_dim} 이하여야 합니다: {output_dim}")
+
+        self.method = method
+        self.input_dim = input_dim
+        self.output_dim = output_dim
+        self.mean = mean
+        self.components = components
+
+    @classmethod
+    def fit_pca(cls, embeddings: np.ndarray, output_dim: int, max_samples: int = 5000) -> "Projection":
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if len(embeddings) < output_dim:
+            raise InsufficientSamplesError(
+                f"PCA 학습에는 최소 {output_dim}개의 청크가 필요합니다 (현재 {len(embeddings)}개)"
+            )
+
+        if len(embeddings) > max_samples:
+            rng = np.random.default_rng(0)
+            embeddings = embeddings[rng.choice(len(embeddings), size=max_samples, replace=False)]
+
+        mean = embeddings.mean(axis=0)
+        _, _, vt = np.linalg.svd(embeddings - mean, full_matrices=False)
+        return cls("pca", embeddings.shape[1], output_dim, mean=mean, components=vt[:output_dim])
+
+    @classmethod
+    def truncate(cls, input_dim: int, output_dim: int) -> "Projection":
+        return cls("truncate", input_dim, output_dim)
+
+    def transform(self, embeddings: np.ndarray) -> np.ndarray:
+        embeddings = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+        if self.method == "pca":
+            reduced = (embeddings - self.mean) @ self.components.T
+        else:
+            reduced = embeddings[:, :self.output_dim]
+
+        norms = np.linalg.norm(reduced, axis=1, keepdims=True)
+        return (reduced / np.maximum(norms, 1e-12)).astype(np.float32)
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        arrays = {
+            "method": np.array(self.method),
+            "input_dim": np.array(self.input_dim),
+            "output_dim": np.array(self.output_dim)
+        }
+        if self.method == "pca":
+            arrays["mean"] = self.mean
+            arrays["components"] = self.components
+
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "Projection":
+        with np.load(path) as data:
+            method = str(data["method"])
+            return cls(
+                method,
+                int(data["input_dim"]),
+                int(data["output_dim"]),
+                mean=data["mean"] if method == "pca" else None,
+                components=data["components"] if method == "pca" else None
+            )
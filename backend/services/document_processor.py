@@ -1,71 +1,493 @@
 import os
-from typing import List
+import time
+import bisect
+import hashlib
+import itertools
+import multiprocessing
+from collections import deque
+from typing import List, Tuple, Iterator, Iterable, Optional
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 import pypdf
 from docx import Document
 
+from .executors import get_extraction_executor, run_in_executor
+from .text_splitter import TokenTextSplitter, load_encoding
+from .extraction_cache import ExtractionCache
+from .text_store import create_text_store
+
 class DocumentChunk:
-    def __init__(self, content: str, metadata: dict):
-        self.content = content
-        self.metadata = metadata
+    """문서 원문의 [start, end) 구간을 가리키는 청크
+
+    본문은 문서마다 한 번만 보관하는 원문(문자열 또는 TextStore)에서 필요할 때 잘라 읽으므로
+    overlap으로 겹치는 텍스트를 청크마다 복사해 두지 않습니다.
+    content를 직접 지정해 만든 청크는 기존처럼 본문을 그대로 보관합니다.
+    """
+    __slots__ = ("doc_id", "start", "end", "metadata", "_content", "_source")
+
+    def __init__(
+        self,
+        content: Optional[str] = None,
+        metadata: Optional[dict] = None,
+        doc_id: Optional[str] = None,
+        start: int = 0,
+        end: Optional[int] = None,
+        source=None
+    ):
+        self.metadata = metadata if metadata is not None else {}
+        self.doc_id = doc_id
+        self.start = start
+        self.end = end
+        self._content = content
+        self._source = source
+
+    @property
+    def content(self) -> str:
+        if self._content is not None:
+            return self._content
+        if isinstance(self._source, str):
+            return self._source[self.start:self.end]
+        return self._source.slice(self.doc_id, self.start, self.end)
+
+    @content.setter
+    def content(self, value: str):
+        self._content = value
+        self._source = None
+
+    def attach(self, source):
+        # 같은 문서의 청크가 공유하는 원문으로 바꾸고 개별 본문 사본은 버림
+        self._source = source
+        self._content = None
+
+    def hold(self, content: str):
+        # 원문 저장소에 아직 기록 중인 구간: 기록이 끝날 때까지 본문 사본을 함께 들고 있음
+        self._content = content
+
+    @property
+    def text_pending(self) -> bool:
+        """원문 저장소에 기록 중인 문서의 청크 (벡터 DB에는 본문 없이 오프셋만 저장해도 됨)"""
+        return (
+            self._content is not None and self.end is not None
+            and self._source is not None and not isinstance(self._source, str)
+        )
+
+    def __getstate__(self):
+        # 프로세스 간 전달: 원문 문자열은 pickle이 한 번만 직렬화하고, TextStore 원문은 본문으로 풀어 보냄
+        if self._source is not None and not isinstance(self._source, str):
+            return (self.metadata, self.doc_id, self.start, self.end, self.content, None)
+        return (self.metadata, self.doc_id, self.start, self.end, self._content, self._source)
+
+    def __setstate__(self, state):
+        self.metadata, self.doc_id, self.start, self.end, self._content, self._source = state
+
+_worker_processors = {}
+
+def _process_document_in_worker(config: tuple, file_path: str) -> List["DocumentChunk"]:
+    # 추출 프로세스마다 설정별 DocumentProcessor를 한 번만 생성해 재사용
+    processor = _worker_processors.get(config)
+    if processor is None:
+        processor = DocumentProcessor(*config)
+        _worker_processors[config] = processor
+    return processor.process_document(file_path)
+
+def _extract_pdf_page_range(file_path: str, start: int, end: int) -> List[Tuple[int, str]]:
+    # 병렬 추출 작업 단위: 각 프로세스가 파일을 따로 열어 [start, end) 페이지만 추출
+    with open(file_path, 'rb') as file:
+        reader = pypdf.PdfReader(file)
+        pages = []
+        for page_num in range(start, end):
+            text = reader.pages[page_num].extract_text()
+            if text.strip():
+                pages.append((page_num + 1, text))
+        return pages
 
 class DocumentProcessor:
-    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
-        self.chunk_size = chunk_size
-        self.chunk_overlap = chunk_overlap
+    def __init__(
+        self,
+        chunk_size: Optional[int] = None,
+        chunk_overlap: Optional[int] = None,
+        length_unit: Optional[str] = None
+    ):
+        # CHUNK_LENGTH_UNIT=chars(기본값, 문자 수) | tokens(tiktoken 토큰 수)
+        # 기존 배포의 청크 경계가 바뀌지 않도록 기본값은 문자 수 기준을 유지
+        self.length_unit = (length_unit or os.getenv("CHUNK_LENGTH_UNIT", "chars")).lower()
+        if self.length_unit not in ("tokens", "chars"):
+            raise ValueError(f"지원하지 않는 청크 길이 단위: {self.length_unit}")
+        
+        # 청크 메타데이터의 token_count 계산용 (인코딩을 불러올 수 없으면 생략)
+        self.token_encoding = None
+        try:
+            self.token_encoding = load_encoding(os.getenv("TIKTOKEN_ENCODING", "cl100k_base"))
+        except Exception as e:
+            print(f"tiktoken 인코딩을 불러올 수 없습니다: {str(e)}")
+            if self.length_unit == "tokens" and chunk_size is None:
+                print("문자 수 기준 분할을 사용합니다")
+                self.length_unit = "chars"
+        
+        if self.length_unit == "tokens":
+            self.chunk_size = chunk_size or int(os.getenv("CHUNK_SIZE_TOKENS", "256"))
+            self.chunk_overlap = chunk_overlap if chunk_overlap is not None else int(os.getenv("CHUNK_OVERLAP_TOKENS", "50"))
+            self.token_splitter = TokenTextSplitter(self.chunk_size, self.chunk_overlap, encoding=self.token_encoding)
+        else:
+            self.chunk_size = chunk_size or 1000
+            self.chunk_overlap = chunk_overlap if chunk_overlap is not None else 200
+            self.token_splitter = None
+        # 스트리밍 분할 시 한 번에 분할하는 버퍼 크기 (청크 수 기준)
+        self.stream_window_chunks = 8
+        # 이 페이지 수 이상인 PDF는 페이지 단위 스트리밍으로 처리
+        self.stream_min_pages = int(os.getenv("PDF_STREAM_MIN_PAGES", "200"))
+        # 이 페이지 수 이상인 PDF는 페이지 범위를 나눠 추출 프로세스 풀에서 병렬 추출
+        self.parallel_min_pages = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "100"))
+        self.parallel_pages_per_task = int(os.getenv("PDF_PAGES_PER_TASK", "25"))
+        # (파일 SHA-256, 분할 설정) 키의 추출/분할 결과 디스크 캐시
+        self.extraction_cache = None
+        if os.getenv("EXTRACTION_CACHE_ENABLED", "True").lower() == "true":
+            try:
+                self.extraction_cache = ExtractionCache(
+                    cache_dir=os.getenv(
+                        "EXTRACTION_CACHE_DIR",
+                        os.path.join(os.getenv("CHROMA_DB_PATH", "./vector_db"), "extraction_cache")
+                    ),
+                    max_bytes=int(float(os.getenv("EXTRACTION_CACHE_MAX_MB", "512")) * 1024 * 1024)
+                )
+            except Exception as e:
+                print(f"추출 캐시 초기화 중 오류 발생: {str(e)}")
+        # 문서 원문 사이드카 (CHUNK_TEXT_STORAGE=offsets). 청크는 원문 오프셋만 보관
+        self.text_store = create_text_store()
+        
         self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
             length_function=len,
             separators=["\n\n", "\n", " ", ""]
         )
     
+    def _worker_config(self) -> tuple:
+        return (self.chunk_size, self.chunk_overlap, self.length_unit)
+    
+    def _max_chunk_chars(self) -> int:
+        # 토큰 기준일 때 한 청크가 차지할 수 있는 문자 수의 여유 있는 상한
+        return self.chunk_size * 8 if self.token_splitter else self.chunk_size
+    
+    async def process_document_async(self, file_path: str) -> List[DocumentChunk]:
+        return await run_in_executor(
+            get_extraction_executor(), _process_document_in_worker, self._worker_config(), file_path
+        )
+    
     def process_document(self, file_path: str) -> List[DocumentChunk]:
+        chunks = list(self.iter_chunks(file_path))
+        # 목록 전체를 들고 있는 경우 청크마다 본문을 복사하지 않고 문서 원문 하나를 공유
+        text = self._shared_text(chunks)
+        for chunk in chunks:
+            chunk.metadata["total_chunks"] = len(chunks)
+            if text is not None and chunk.end is not None:
+                chunk.attach(text)
+        return chunks
+    
+    def _shared_text(self, chunks: List[DocumentChunk]) -> Optional[str]:
+        if self.text_store is None or not chunks or chunks[0].doc_id is None:
+            return None
+        try:
+            return self.text_store.read(chunks[0].doc_id)
+        except (KeyError, ValueError):
+            return None
+    
+    def should_stream(self, file_path: str) -> bool:
+        # 병렬 추출은 메인 프로세스에서만 가능하므로 병렬 추출 대상도 스트리밍 경로로 처리
+        if os.path.splitext(file_path)[1].lower() != '.pdf':
+            return False
+        try:
+            page_count = self._pdf_page_count(file_path)
+        except Exception:
+            return False
+        return page_count >= min(self.stream_min_pages, self.parallel_min_pages)
+    
+    def iter_chunks(self, file_path: str) -> Iterator[DocumentChunk]:
+        """문서를 청크 단위로 순차 생성
+        
+        PDF는 페이지를 하나씩 추출하면서 분할하므로 문서 전체 텍스트를 메모리에 올리지 않습니다.
+        전체 청크 수를 미리 알 수 없으므로 total_chunks는 process_document에서만 채웁니다.
+        같은 내용의 파일을 같은 분할 설정으로 다시 처리하면 추출 캐시에서 읽습니다.
+        원문 저장소가 있으면 추출한 원문을 문서 ID로 한 번만 저장하고 청크는 그 오프셋을 가리킵니다.
+        """
         file_extension = os.path.splitext(file_path)[1].lower()
-        filename = os.path.basename(file_path)
+        if file_extension not in ('.pdf', '.docx', '.txt'):
+            raise ValueError(f"지원하지 않는 파일 형식: {file_extension}")
+        
+        file_hash = self._file_sha256(file_path)
+        base_metadata = {
+            "filename": os.path.basename(file_path),
+            "file_path": file_path,
+            "file_type": file_extension,
+            "document_id": file_hash[:16],
+            "upload_date": int(time.time())
+        }
+        
+        doc_id = base_metadata["document_id"]
+        text_store = self.text_store
+        # 원문이 이미 저장된 문서는 다시 쓰지 않음
+        text_writer = None
+        if text_store is not None and not text_store.has(doc_id):
+            text_writer = text_store.writer(doc_id)
+        
+        cache_key = self._extraction_cache_key(file_hash)
+        if self.extraction_cache is not None and text_writer is None:
+            cached = self.extraction_cache.get(cache_key)
+            if cached is not None:
+                for record in cached:
+                    yield self._make_chunk(record, base_metadata, text_store)
+                return
+        
+        writer = self.extraction_cache.writer(cache_key) if self.extraction_cache is not None else None
+        yielded = False
+        try:
+            for record, chunk_content in self._iter_chunk_records(file_path, file_extension, text_writer):
+                if writer is not None:
+                    writer.write(record)
+                chunk = self._make_chunk(record, base_metadata, text_store)
+                if text_writer is not None and chunk.end is not None:
+                    # 원문 기록이 끝나기 전이므로 본문을 함께 들고 감 (벡터 DB에는 오프셋만 저장)
+                    chunk.hold(chunk_content)
+                yielded = True
+                yield chunk
+            if text_writer is not None:
+                text_writer.commit()
+            if writer is not None:
+                writer.commit()
+        finally:
+            if text_writer is not None:
+                if yielded and not text_writer.committed:
+                    # 스트리밍 적재가 중간에 끝나도 이미 저장된 청크가 가리키는 앞부분 원문은 남김
+                    try:
+                        text_writer.commit(complete=False)
+                    except Exception as e:
+                        print(f"원문 저장 중 오류 발생: {str(e)}")
+                text_writer.discard()
+            if writer is not None:
+                writer.discard()
+    
+    @staticmethod
+    def _make_chunk(record: dict, base_metadata: dict, text_store) -> DocumentChunk:
+        # 본문이 없는 레코드는 원문 저장소의 [text_start, text_end) 구간을 가리킴
+        record = dict(record)
+        content = record.pop("content", None)
+        return DocumentChunk(
+            content,
+            {**base_metadata, **record},
+            doc_id=base_metadata["document_id"],
+            start=record.get("text_start", 0),
+            end=record.get("text_end"),
+            source=text_store
+        )
+    
+    def _extraction_cache_key(self, file_hash: str) -> str:
+        # 분할 결과에 영향을 주는 설정이 바뀌면 다른 키가 되도록 함께 해시
+        params = [
+            file_hash, self.length_unit, str(self.chunk_size), str(self.chunk_overlap),
+            "offsets" if self.text_store is not None else "inline"
+        ]
+        if self.token_encoding is not None:
+            params.append(self.token_encoding.name)
+        return hashlib.sha256("\0".join(params).encode("utf-8")).hexdigest()
+    
+    def _iter_chunk_records(self, file_path: str, file_extension: str, text_writer=None) -> Iterator[Tuple[dict, str]]:
+        # 파일 내용에서만 결정되는 청크 필드 (파일명/경로/업로드 시각은 호출 측에서 채움)
+        # text_start/text_end는 "\n\n"으로 이어 붙인 문서 원문 기준 오프셋이며,
+        # 원문 저장소를 쓰면 본문(content)은 오프셋을 확인할 수 없는 청크에만 남김
+        page_starts: List[int] = []
+        page_numbers: List[int] = []
+        inline = self.text_store is None
         
         if file_extension == '.pdf':
-            content = self._extract_pdf_content(file_path)
-        elif file_extension == '.docx':
-            content = self._extract_docx_content(file_path)
-        elif file_extension == '.txt':
-            content = self._extract_txt_content(file_path)
+            parts = self._paged_parts(self._iter_pdf_pages(file_path), page_starts, page_numbers)
+            if text_writer is not None:
+                parts = self._record_parts(parts, text_writer)
+            pieces = self._stream_split(parts)
         else:
-            raise ValueError(f"지원하지 않는 파일 형식: {file_extension}")
+            if file_extension == '.docx':
+                content = self._extract_docx_content(file_path)
+            else:
+                content = self._extract_txt_content(file_path)
+            if not content.strip():
+                raise ValueError("문서에서 텍스트를 추출할 수 없습니다.")
+            if text_writer is not None:
+                text_writer.append(content)
+            pieces = iter(self._split_with_offsets(content))
         
-        if not content.strip():
-            raise ValueError("문서에서 텍스트를 추출할 수 없습니다.")
+        chunk_count = 0
+        for start, chunk_content, token_count in pieces:
+            record = {"chunk_index": chunk_count}
+            if start >= 0:
+                record["text_start"] = start
+                record["text_end"] = start + len(chunk_content)
+            if inline or start < 0:
+                record["content"] = chunk_content
+            if token_count is not None:
+                record["token_count"] = token_count
+            if page_starts:
+                record["page_start"] = self._page_at(page_starts, page_numbers, max(start, 0))
+                record["page_end"] = self._page_at(page_starts, page_numbers, max(start, 0) + len(chunk_content) - 1)
+            chunk_count += 1
+            yield record, chunk_content
         
-        text_chunks = self.text_splitter.split_text(content)
+        if chunk_count == 0:
+            raise ValueError("문서에서 텍스트를 추출할 수 없습니다.")
+    
+    @staticmethod
+    def _record_parts(parts: Iterable[str], text_writer) -> Iterator[str]:
+        # _stream_split과 같은 방식("\n\n" 구분)으로 이어 붙인 원문을 저장소에 기록
+        first = True
+        for part in parts:
+            text_writer.append(part if first else f"\n\n{part}")
+            first = False
+            yield part
+    
+    def _stream_split(self, parts: Iterable[str]) -> Iterator[Tuple[int, str, Optional[int]]]:
+        # 텍스트 조각을 "\n\n"으로 이어 붙이며 분할하되, 버퍼 끝에서 chunk_size 이상 떨어진
+        # (뒤에 올 텍스트의 영향을 받지 않는) 청크만 내보내고 나머지는 다음 조각과 함께 다시 분할
+        # 남겨 둔 첫 청크가 이미 내보낸 청크와 겹치므로 페이지 경계를 넘어 overlap이 유지됨
+        window = self._max_chunk_chars() * self.stream_window_chunks
+        buffer = ""
+        base = 0
+        for part in parts:
+            buffer = f"{buffer}\n\n{part}" if buffer else part
+            if len(buffer) < window:
+                continue
+            
+            safe_end = len(buffer) - self._max_chunk_chars()
+            keep_from = 0
+            for start, chunk, token_count in self._split_with_offsets(buffer):
+                if start >= 0 and start + len(chunk) > safe_end:
+                    keep_from = start
+                    break
+                yield (base + start if start >= 0 else -1), chunk, token_count
+            if keep_from > 0:
+                buffer = buffer[keep_from:]
+                base += keep_from
         
-        chunks = []
-        for i, chunk_content in enumerate(text_chunks):
-            metadata = {
-                "filename": filename,
-                "file_path": file_path,
-                "chunk_index": i,
-                "total_chunks": len(text_chunks),
-                "file_type": file_extension
-            }
-            chunks.append(DocumentChunk(chunk_content, metadata))
+        if buffer.strip():
+            for start, chunk, token_count in self._split_with_offsets(buffer):
+                yield (base + start if start >= 0 else -1), chunk, token_count
+    
+    def _split_with_offsets(self, content: str) -> List[Tuple[int, str, Optional[int]]]:
+        # 각 청크의 원문 내 시작 위치(페이지 번호 계산용)와 토큰 수를 함께 반환
+        if self.token_splitter is not None:
+            return self.token_splitter.split_with_offsets(content)
         
-        return chunks
+        results = []
+        index = 0
+        previous_chunk_len = 0
+        for chunk in self.text_splitter.split_text(content):
+            offset = index + previous_chunk_len - self.chunk_overlap
+            found = content.find(chunk, max(0, offset))
+            index = found if found >= 0 else index
+            previous_chunk_len = len(chunk)
+            # 원문에서 위치를 찾지 못한 청크는 -1 (오프셋 대신 본문을 그대로 보관)
+            results.append((found if found >= 0 else -1, chunk, self._count_tokens(chunk)))
+        return results
     
-    def _extract_pdf_content(self, file_path: str) -> str:
+    def _count_tokens(self, text: str) -> Optional[int]:
+        if self.token_encoding is None:
+            return None
+        return len(self.token_encoding.encode_ordinary(text))
+    
+    @staticmethod
+    def _file_sha256(file_path: str) -> str:
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    
+    @staticmethod
+    def _build_paged_content(pages: List[Tuple[int, str]]) -> Tuple[str, List[int], List[int]]:
+        # 페이지별 텍스트를 합치면서 각 페이지의 시작 오프셋을 기록
+        parts = []
+        page_starts = []
+        page_numbers = []
+        offset = 0
+        for page_num, text in pages:
+            part = f"[페이지 {page_num}]\n{text}"
+            page_starts.append(offset)
+            page_numbers.append(page_num)
+            parts.append(part)
+            offset += len(part) + 2
+        return "\n\n".join(parts), page_starts, page_numbers
+    
+    @staticmethod
+    def _paged_parts(pages: Iterable[Tuple[int, str]], page_starts: List[int], page_numbers: List[int]) -> Iterator[str]:
+        # _build_paged_content와 같은 형식/오프셋으로 페이지를 하나씩 생성
+        offset = 0
+        for page_num, text in pages:
+            part = f"[페이지 {page_num}]\n{text}"
+            page_starts.append(offset)
+            page_numbers.append(page_num)
+            offset += len(part) + 2
+            yield part
+    
+    @staticmethod
+    def _page_at(page_starts: List[int], page_numbers: List[int], position: int) -> int:
+        index = max(bisect.bisect_right(page_starts, position) - 1, 0)
+        return page_numbers[index]
+    
+    @staticmethod
+    def _pdf_page_count(file_path: str) -> int:
+        with open(file_path, 'rb') as file:
+            return len(pypdf.PdfReader(file).pages)
+    
+    def _iter_pdf_pages(self, file_path: str) -> Iterator[Tuple[int, str]]:
+        # 추출 프로세스 안에서는 다시 프로세스 풀을 만들지 않음
+        if multiprocessing.parent_process() is None:
+            try:
+                page_count = self._pdf_page_count(file_path)
+            except Exception as e:
+                raise ValueError(f"PDF 파일 읽기 오류: {str(e)}")
+            if page_count >= self.parallel_min_pages:
+                yield from self._iter_pdf_pages_parallel(file_path, page_count)
+                return
+        
         try:
             with open(file_path, 'rb') as file:
                 reader = pypdf.PdfReader(file)
-                content = []
-                
                 for page_num, page in enumerate(reader.pages):
                     text = page.extract_text()
                     if text.strip():
-                        content.append(f"[페이지 {page_num + 1}]\n{text}")
-                
-                return "\n\n".join(content)
+                        yield page_num + 1, text
         except Exception as e:
             raise ValueError(f"PDF 파일 읽기 오류: {str(e)}")
     
+    def _iter_pdf_pages_parallel(self, file_path: str, page_count: int) -> Iterator[Tuple[int, str]]:
+        # 페이지 범위를 순서대로 제출하되 동시에 진행 중인 작업 수를 제한해
+        # 결과를 페이지 순서대로 내보내면서 메모리 사용량을 일정하게 유지
+        executor = get_extraction_executor()
+        step = max(1, self.parallel_pages_per_task)
+        ranges = ((start, min(start + step, page_count)) for start in range(0, page_count, step))
+        max_in_flight = 2 * int(os.getenv("EXTRACTION_PROCESSES", "2"))
+        
+        pending = deque(
+            executor.submit(_extract_pdf_page_range, file_path, start, end)
+            for start, end in itertools.islice(ranges, max_in_flight)
+        )
+        try:
+            while pending:
+                try:
+                    pages = pending.popleft().result()
+                except Exception as e:
+                    raise ValueError(f"PDF 파일 읽기 오류: {str(e)}")
+                for start, end in itertools.islice(ranges, 1):
+                    pending.append(executor.submit(_extract_pdf_page_range, file_path, start, end))
+                yield from pages
+        finally:
+            for future in pending:
+                future.cancel()
+    
+    def _extract_pdf_pages(self, file_path: str) -> List[Tuple[int, str]]:
+        return list(self._iter_pdf_pages(file_path))
+    
+    def _extract_pdf_content(self, file_path: str) -> str:
+        content, _, _ = self._build_paged_content(self._extract_pdf_pages(file_path))
+        return content
+    
     def _extract_docx_content(self, file_path: str) -> str:
         try:
             doc = Document(file_path)
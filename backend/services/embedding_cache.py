@@ -0,0 +1,159 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import List, Tuple, Dict, Any
+
+import numpy as np
+
+class EmbeddingCache:
+    """(모델 이름, 텍스트 해시) 키로 임베딩을 디스크에 보관하는 캐시
+
+    벡터는 memmap float32 배열 파일에, 키 -> 슬롯 인덱스는 SQLite에 저장되므로
+    프로세스 재시작 후에도 유지되고 여러 워커 프로세스가 공유할 수 있습니다.
+    용량을 넘으면 가장 오래 사용되지 않은 항목의 슬롯을 재사용합니다.
+    """
+
+    def __init__(self, cache_dir: str, model_name: str, dimension: int, max_entries: int = 200000):
+        self.model_name = model_name
+        self.dimension = dimension
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        safe_model_name = re.sub(r"[^A-Za-z0-9_.-]", "_", model_name)
+        self.cache_dir = os.path.join(cache_dir, safe_model_name)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self._conn = sqlite3.connect(
+            os.path.join(self.cache_dir, "index.sqlite3"),
+            timeout=30,
+            check_same_thread=False,
+            isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, slot INTEGER UNIQUE NOT NULL, last_used REAL NOT NULL)"
+        )
+
+        # 용량이 줄어든 경우 범위를 벗어난 슬롯은 버림 (슬롯은 항상 0..n-1로 연속)
+        self._conn.execute("DELETE FROM entries WHERE slot >= ?", (max_entries,))
+
+        vectors_path = os.path.join(self.cache_dir, "vectors.f32")
+        expected_size = max_entries * dimension * 4
+        with open(vectors_path, "ab") as file:
+            file.truncate(expected_size)
+        self._vectors = np.memmap(vectors_path, dtype=np.float32, mode="r+", shape=(max_entries, dimension))
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _select_slots(self, keys: List[str]) -> Dict[str, int]:
+        found = {}
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT key, slot FROM entries WHERE key IN ({placeholders})", batch
+            ).fetchall()
+            found.update(rows)
+        return found
+
+    def lookup(self, texts: List[str]) -> Tuple[np.ndarray, List[int]]:
+        """캐시된 벡터 배열과 캐시에 없는 텍스트의 인덱스 목록을 반환"""
+        keys = [self._key(text) for text in texts]
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+
+        with self._lock:
+            # 슬롯 조회와 벡터 읽기를 한 쓰기 트랜잭션 안에서 해서, 그 사이 다른 프로세스가
+            # 슬롯을 교체(store의 BEGIN IMMEDIATE)해 다른 텍스트의 벡터를 읽는 일이 없게 함
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                found = self._select_slots(list(set(keys)))
+                if found:
+                    now = time.time()
+                    self._conn.executemany(
+                        "UPDATE entries SET last_used = ? WHERE key = ?",
+                        [(now, key) for key in found]
+                    )
+
+                missing = []
+                for i, key in enumerate(keys):
+                    slot = found.get(key)
+                    if slot is None:
+                        missing.append(i)
+                    else:
+                        vectors[i] = self._vectors[slot]
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+
+        return vectors, missing
+
+    def store(self, texts: List[str], vectors: np.ndarray):
+        entries = {}
+        for text, vector in zip(texts, vectors):
+            entries[self._key(text)] = vector
+        if not entries or self.max_entries <= 0:
+            return
+
+        with self._lock:
+            # BEGIN IMMEDIATE로 다른 프로세스와의 슬롯 할당 경쟁을 직렬화
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for key in self._select_slots(list(entries.keys())):
+                    entries.pop(key, None)
+
+                keys = list(entries.keys())[:self.max_entries]
+                count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+                free = min(self.max_entries - count, len(keys))
+                slots = list(range(count, count + free))
+
+                evict_count = len(keys) - free
+                if evict_count > 0:
+                    evicted = self._conn.execute(
+                        "SELECT key, slot FROM entries ORDER BY last_used LIMIT ?", (evict_count,)
+                    ).fetchall()
+                    self._conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key, _ in evicted])
+                    slots.extend(slot for _, slot in evicted)
+
+                for key, slot in zip(keys, slots):
+                    self._vectors[slot] = entries[key]
+                self._vectors.flush()
+
+                now = time.time()
+                self._conn.executemany(
+                    "INSERT INTO entries (key, slot, last_used) VALUES (?, ?, ?)",
+                    [(key, slot, now) for key, slot in zip(keys, slots)]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            total = self.hits + self.misses
+            return {
+                "model_name": self.model_name,
+                "size": size,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0
+            }
+
+    def close(self):
+        with self._lock:
+            self._vectors.flush()
+            self._conn.close()
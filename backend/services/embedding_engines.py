@@ -0,0 +1,354 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+EMBEDDING_ENGINES = ("torch", "onnx")
+
+PARITY_SAMPLE_TEXTS = [
+    "업로드된 문서를 기반으로 질문에 답합니다.",
+    "The quick brown fox jumps over the lazy dog.",
+    "벡터 검색은 임베딩 간의 거리를 이용해 관련 문서를 찾습니다.",
+    "Quarterly revenue grew 12% year over year, driven by cloud services.",
+    "계약서 제3조에 따라 계약 기간은 2년으로 한다.",
+    "How do I reset my password if I no longer have access to my email?",
+    "짧은 문장",
+    " ".join(["긴 문장의 잘림(truncation) 동작도 함께 확인합니다."] * 40)
+]
+
+_embedding_models: Dict[str, Any] = {}
+_engines: Dict[tuple, "EmbeddingEngine"] = {}
+_engines_lock = threading.Lock()
+
+def load_embedding_model(model_name: str = 'all-MiniLM-L6-v2'):
+    # 프로세스당 한 번만 로드 (pre-fork 시 워커들이 copy-on-write로 공유)
+    if model_name not in _embedding_models:
+        from sentence_transformers import SentenceTransformer
+        _embedding_models[model_name] = SentenceTransformer(model_name)
+    return _embedding_models[model_name]
+
+class EmbeddingEngine(ABC):
+    """텍스트 -> L2 정규화된 float32 임베딩 행렬"""
+
+    # 임베딩 디스크 캐시 키 등에 사용 (엔진마다 결과가 미세하게 다르므로 구분)
+    name: str
+    dimension: int
+
+    @abstractmethod
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        ...
+
+    def before_fork(self):
+        """gunicorn --preload로 워커를 fork하기 전에 호출 (fork에 안전하지 않은 런타임 자원을 정리)"""
+
+    def close(self):
+        pass
+
+class TorchEmbeddingEngine(EmbeddingEngine):
+    """PyTorch SentenceTransformer (대용량 배치는 선택적으로 멀티프로세스 풀 사용)"""
+
+    def __init__(
+        self,
+        model_name: str,
+        multiprocess_enabled: bool = False,
+        multiprocess_min_chunks: int = 512
+    ):
+        self.model = load_embedding_model(model_name)
+        self.name = model_name
+        self.dimension = self.model.get_sentence_embedding_dimension()
+        self.multiprocess_enabled = multiprocess_enabled
+        self.multiprocess_min_chunks = multiprocess_min_chunks
+        self._encode_pool = None
+
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        # 대용량 업로드는 모든 CPU 코어를 사용하는 멀티프로세스 풀로 인코딩
+        if self.multiprocess_enabled and len(texts) >= self.multiprocess_min_chunks:
+            if self._encode_pool is None:
+                self._encode_pool = self.model.start_multi_process_pool()
+            return self.model.encode_multi_process(texts, self._encode_pool, batch_size=batch_size)
+
+        return self.model.encode(
+            texts,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+
+    def close(self):
+        if self._encode_pool is not None:
+            self.model.stop_multi_process_pool(self._encode_pool)
+            self._encode_pool = None
+
+class OnnxEmbeddingEngine(EmbeddingEngine):
+    """onnxruntime으로 실행하는 SentenceTransformer (평균 풀링 + 정규화 포함 그래프)
+
+    model_dir에 모델이 없으면 PyTorch 모델에서 한 번 내보내고, quantize=True이면
+    가중치를 동적 int8로 양자화한 그래프를 사용합니다. 이후 실행에는 torch가 필요 없습니다.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        model_dir: str,
+        quantize: bool = True,
+        intra_op_threads: int = 0,
+        inter_op_threads: int = 0
+    ):
+        from transformers import AutoTokenizer
+
+        self.model_dir = model_dir
+        self.quantize = quantize
+        self.variant = "int8" if quantize else "fp32"
+        # 이번에 새로 내보낸(또는 양자화한) 모델이면 True: 이때 한 번 PyTorch와 일치도를 확인
+        self.exported = False
+        model_path = self._ensure_model(model_name, model_dir, quantize)
+
+        config = self._read_config()
+        self.dimension = int(config["dimension"])
+        self.max_seq_length = int(config["max_seq_length"])
+        self.name = f"{model_name}-onnx-{self.variant}"
+        # 내보낼 때 기록한 PyTorch 대비 일치도 (없으면 None)
+        self.parity = config.get("parity", {}).get(self.variant)
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+        self.model_path = model_path
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        # onnxruntime 세션의 스레드 풀은 fork에 안전하지 않으므로 세션은 처음 인코딩할 때
+        # (pre-fork 시에는 각 워커에서) 만듦
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        with self._session_lock:
+            if self._session is None:
+                import onnxruntime as ort
+
+                options = ort.SessionOptions()
+                options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+                # 0이면 onnxruntime 기본값(물리 코어 수)
+                options.intra_op_num_threads = self.intra_op_threads
+                options.inter_op_num_threads = self.inter_op_threads
+                self._session = ort.InferenceSession(self.model_path, options, providers=["CPUExecutionProvider"])
+                self._input_names = {item.name for item in self._session.get_inputs()}
+            return self._session
+
+    def before_fork(self):
+        # 마스터에서 (일치도 확인 등으로) 만든 세션은 버리고 워커마다 새로 만듦
+        with self._session_lock:
+            self._session = None
+
+    def _read_config(self) -> Dict[str, Any]:
+        with open(os.path.join(self.model_dir, "engine.json"), "r", encoding="utf-8") as file:
+            return json.load(file)
+
+    def save_parity(self, report: Dict[str, Any]):
+        # 일치도 결과를 engine.json에 남겨 이후 시작 때는 PyTorch 모델 없이 판단
+        config = self._read_config()
+        config.setdefault("parity", {})[self.variant] = report
+        path = os.path.join(self.model_dir, "engine.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(config, file)
+        os.replace(tmp_path, path)
+        self.parity = report
+
+    def _ensure_model(self, model_name: str, model_dir: str, quantize: bool) -> str:
+        fp32_path = os.path.join(model_dir, "model.onnx")
+        int8_path = os.path.join(model_dir, "model.int8.onnx")
+        target_path = int8_path if quantize else fp32_path
+        if os.path.exists(target_path):
+            return target_path
+
+        self.exported = True
+        os.makedirs(model_dir, exist_ok=True)
+        if not os.path.exists(fp32_path):
+            _export_onnx(model_name, model_dir, fp32_path)
+        if quantize:
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+            tmp_path = f"{int8_path}.tmp"
+            quantize_dynamic(fp32_path, tmp_path, weight_type=QuantType.QInt8)
+            os.replace(tmp_path, int8_path)
+        return target_path
+
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        embeddings = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        session = self.session
+        # 길이순으로 배치를 묶어 패딩 낭비를 줄임
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        for start in range(0, len(texts), batch_size):
+            batch_idx = order[start:start + batch_size]
+            tokens = self.tokenizer(
+                [texts[i] for i in batch_idx],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np"
+            )
+            feeds = {
+                name: np.asarray(value, dtype=np.int64)
+                for name, value in tokens.items()
+                if name in self._input_names
+            }
+            embeddings[batch_idx] = session.run(None, feeds)[0]
+        return embeddings
+
+def _export_onnx(model_name: str, model_dir: str, path: str):
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    # 내보내기에만 쓰는 모델은 프로세스 캐시에 올리지 않음 (ONNX 노드에 PyTorch 모델이 남지 않도록)
+    model = _embedding_models.get(model_name) or SentenceTransformer(model_name)
+    transformer = model[0].auto_model.eval()
+
+    class MeanPooledEncoder(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.transformer = transformer
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            output = self.transformer(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                token_type_ids=token_type_ids
+            )[0]
+            mask = attention_mask.unsqueeze(-1).to(output.dtype)
+            pooled = (output * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+            return torch.nn.functional.normalize(pooled, p=2, dim=1)
+
+    sample = model.tokenizer(["export sample"], return_tensors="pt")
+    dynamic_axes = {0: "batch", 1: "sequence"}
+    tmp_path = f"{path}.tmp"
+    with torch.no_grad():
+        torch.onnx.export(
+            MeanPooledEncoder(),
+            (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+            tmp_path,
+            input_names=["input_ids", "attention_mask", "token_type_ids"],
+            output_names=["embeddings"],
+            dynamic_axes={
+                "input_ids": dynamic_axes,
+                "attention_mask": dynamic_axes,
+                "token_type_ids": dynamic_axes,
+                "embeddings": {0: "batch"}
+            },
+            opset_version=14
+        )
+    os.replace(tmp_path, path)
+
+    model.tokenizer.save_pretrained(model_dir)
+    with open(os.path.join(model_dir, "engine.json"), "w", encoding="utf-8") as file:
+        json.dump({
+            "model_name": model_name,
+            "dimension": model.get_sentence_embedding_dimension(),
+            "max_seq_length": model.max_seq_length
+        }, file)
+
+@contextmanager
+def reference_engine(model_name: str = 'all-MiniLM-L6-v2'):
+    """일치도 확인용 PyTorch 기준 엔진 (확인을 위해 새로 로드한 모델은 끝나면 캐시에서 내림)"""
+    cached = model_name in _embedding_models
+    engine = TorchEmbeddingEngine(model_name)
+    try:
+        yield engine
+    finally:
+        engine.close()
+        if not cached:
+            _embedding_models.pop(model_name, None)
+
+def check_parity(
+    reference: EmbeddingEngine,
+    candidate: EmbeddingEngine,
+    texts: Optional[List[str]] = None,
+    batch_size: int = 64
+) -> Dict[str, Any]:
+    """두 엔진의 임베딩 일치도(행별 코사인 유사도)와 인코딩 속도 비교"""
+    texts = texts or PARITY_SAMPLE_TEXTS
+
+    report = {"reference": reference.name, "candidate": candidate.name, "n_texts": len(texts)}
+    outputs = []
+    for label, engine in (("reference", reference), ("candidate", candidate)):
+        engine.encode(texts[:1], batch_size=batch_size)
+        start = time.perf_counter()
+        outputs.append(np.asarray(engine.encode(texts, batch_size=batch_size), dtype=np.float32))
+        report[f"{label}_seconds"] = round(time.perf_counter() - start, 4)
+
+    expected, actual = outputs
+    norms = np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1)
+    cosines = (expected * actual).sum(axis=1) / np.maximum(norms, 1e-12)
+    report["min_cosine"] = round(float(cosines.min()), 6)
+    report["mean_cosine"] = round(float(cosines.mean()), 6)
+    report["max_abs_diff"] = round(float(np.abs(expected - actual).max()), 6)
+    if report["candidate_seconds"] > 0:
+        report["speedup"] = round(report["reference_seconds"] / report["candidate_seconds"], 2)
+    return report
+
+def create_embedding_engine(model_name: str = 'all-MiniLM-L6-v2', engine_name: Optional[str] = None) -> EmbeddingEngine:
+    engine_name = (engine_name or os.getenv("EMBEDDING_ENGINE", "torch")).lower()
+    if engine_name not in EMBEDDING_ENGINES:
+        raise ValueError(f"지원하지 않는 임베딩 엔진: {engine_name}")
+
+    if engine_name == "onnx":
+        try:
+            engine = OnnxEmbeddingEngine(
+                model_name,
+                model_dir=os.getenv(
+                    "ONNX_MODEL_DIR",
+                    os.path.join(os.getenv("CHROMA_DB_PATH", "./vector_db"), "onnx", model_name)
+                ),
+                quantize=os.getenv("ONNX_QUANTIZE", "True").lower() == "true",
+                intra_op_threads=int(os.getenv("ONNX_INTRA_OP_THREADS", "0")),
+                inter_op_threads=int(os.getenv("ONNX_INTER_OP_THREADS", "0"))
+            )
+        except Exception as e:
+            print(f"ONNX 임베딩 엔진 초기화 중 오류 발생, PyTorch 엔진을 사용합니다: {str(e)}")
+            return create_embedding_engine(model_name, "torch")
+
+        # 모델을 내보낼 때(또는 ONNX_PARITY_CHECK=True일 때)만 PyTorch 임베딩과 비교하고 결과를 저장
+        # 이후 시작 때는 저장된 결과로 판단하므로 PyTorch 모델을 로드하거나 추론하지 않음
+        min_cosine = float(os.getenv("ONNX_PARITY_MIN_COSINE", "0.99"))
+        report = engine.parity
+        if engine.exported or os.getenv("ONNX_PARITY_CHECK", "False").lower() == "true":
+            try:
+                with reference_engine(model_name) as reference:
+                    report = check_parity(reference, engine)
+                engine.save_parity(report)
+                print(f"ONNX 임베딩 일치도: {report}")
+            except Exception as e:
+                print(f"ONNX 임베딩 일치도 확인 중 오류 발생: {str(e)}")
+        if report is not None and report["min_cosine"] < min_cosine:
+            print(f"ONNX 임베딩 일치도가 기준({min_cosine}) 미만이므로 PyTorch 엔진을 사용합니다")
+            return create_embedding_engine(model_name, "torch")
+        return engine
+
+    return TorchEmbeddingEngine(
+        model_name,
+        multiprocess_enabled=os.getenv("EMBEDDING_MULTIPROCESS", "False").lower() == "true",
+        multiprocess_min_chunks=int(os.getenv("EMBEDDING_MULTIPROCESS_MIN_CHUNKS", "512"))
+    )
+
+def load_embedding_engine(model_name: str = 'all-MiniLM-L6-v2', engine_name: Optional[str] = None) -> EmbeddingEngine:
+    # 같은 프로세스의 VectorStore들은 엔진(모델, 세션)을 공유
+    # EMBEDDING_SERVICE_SOCKET이 설정되면 (엔진을 직접 지정한 경우 제외) 공유 임베딩 서비스를 사용
+    socket_path = os.getenv("EMBEDDING_SERVICE_SOCKET", "") if engine_name is None else ""
+    key = (model_name, (engine_name or os.getenv("EMBEDDING_ENGINE", "torch")).lower(), socket_path)
+    with _engines_lock:
+        if key not in _engines:
+            if socket_path:
+                from .embedding_service import SharedEmbeddingEngine
+                _engines[key] = SharedEmbeddingEngine(
+                    socket_path,
+                    fallback_factory=lambda: create_embedding_engine(model_name, engine_name),
+                    timeout=float(os.getenv("EMBEDDING_SERVICE_TIMEOUT", "60")),
+                    retry_seconds=float(os.getenv("EMBEDDING_SERVICE_RETRY_SECONDS", "30"))
+                )
+            else:
+                _engines[key] = create_embedding_engine(model_name, engine_name)
+        return _engines[key]
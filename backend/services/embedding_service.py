@@ -0,0 +1,288 @@
+import os
+import json
+import time
+import socket
+import struct
+import asyncio
+import threading
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+import numpy as np
+
+from .embedding_engines import EmbeddingEngine, create_embedding_engine
+
+# 프레임: 4바이트 길이 + JSON 헤더, 응답은 헤더 뒤에 float32 벡터 바이트가 이어짐
+_LENGTH = struct.Struct("!I")
+
+def _read_exactly(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray()
+    while len(buffer) < size:
+        part = sock.recv(size - len(buffer))
+        if not part:
+            raise ConnectionError("임베딩 서비스 연결이 끊어졌습니다")
+        buffer.extend(part)
+    return bytes(buffer)
+
+async def _read_frame(reader: asyncio.StreamReader) -> Dict[str, Any]:
+    (length,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+    return json.loads(await reader.readexactly(length))
+
+def _encode_frame(header: Dict[str, Any], payload: bytes = b"") -> bytes:
+    data = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    return _LENGTH.pack(len(data)) + data + payload
+
+class EmbeddingServer:
+    """모델을 한 번만 로드해 여러 API 워커/Streamlit 프로세스의 인코딩 요청을 처리하는 서버
+
+    동시에 들어온 요청은 max_wait_ms 동안 모아 한 번의 배치로 인코딩합니다.
+    """
+
+    def __init__(
+        self,
+        engine: EmbeddingEngine,
+        socket_path: str,
+        batch_size: int = 64,
+        max_batch_texts: int = 256,
+        max_wait_ms: float = 5.0
+    ):
+        self.engine = engine
+        self.socket_path = socket_path
+        self.batch_size = batch_size
+        self.max_batch_texts = max_batch_texts
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.requests = 0
+        self._queue: Optional[asyncio.Queue] = None
+
+    async def serve(self):
+        self._queue = asyncio.Queue()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.socket_path)), exist_ok=True)
+
+        server = await asyncio.start_unix_server(self._handle_client, path=self.socket_path)
+        batcher = asyncio.ensure_future(self._batch_loop())
+        print(f"임베딩 서비스 시작: {self.socket_path} ({self.engine.name}, dim={self.engine.dimension})")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                request = await _read_frame(reader)
+                if request.get("op") == "info":
+                    writer.write(_encode_frame({
+                        "name": self.engine.name,
+                        "dimension": self.engine.dimension,
+                        "requests": self.requests,
+                        "batches": self.batches
+                    }))
+                else:
+                    future = loop.create_future()
+                    await self._queue.put((request["texts"], future))
+                    try:
+                        vectors = await future
+                        writer.write(_encode_frame({"n": len(vectors)}, vectors.astype(np.float32).tobytes()))
+                    except Exception as e:
+                        writer.write(_encode_frame({"error": str(e)}))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self._queue.get()]
+            n_texts = len(pending[0][0])
+
+            # 다른 워커의 요청이 도착할 때까지 잠깐 기다려 한 배치로 묶음
+            deadline = loop.time() + self.max_wait
+            while n_texts < self.max_batch_texts:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                n_texts += len(item[0])
+
+            texts = [text for request_texts, _ in pending for text in request_texts]
+            try:
+                vectors = await loop.run_in_executor(None, self.engine.encode, texts, self.batch_size)
+            except Exception as e:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.requests += len(pending)
+            offset = 0
+            for request_texts, future in pending:
+                if not future.done():
+                    future.set_result(vectors[offset:offset + len(request_texts)])
+                offset += len(request_texts)
+
+class SharedEmbeddingEngine(EmbeddingEngine):
+    """임베딩 서비스 클라이언트
+
+    서비스에 연결할 수 없으면 프로세스 내 엔진으로 인코딩하고,
+    retry_seconds가 지나면 다시 서비스 연결을 시도합니다.
+    엔진 이름/차원은 서비스 핸드셰이크(시작 시 서비스가 없으면 프로세스 내 엔진)로 정하고,
+    서비스와 프로세스 내 엔진이 다르면 한 컬렉션에 다른 엔진의 벡터가 섞이지 않도록 대체하지 않습니다.
+    """
+
+    def __init__(
+        self,
+        socket_path: str,
+        fallback_factory: Callable[[], EmbeddingEngine],
+        timeout: float = 60.0,
+        retry_seconds: float = 30.0
+    ):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.retry_seconds = retry_seconds
+        self._fallback_factory = fallback_factory
+        self._fallback: Optional[EmbeddingEngine] = None
+        self._fallback_lock = threading.Lock()
+        self._local = threading.local()
+        self._unavailable_until = 0.0
+        # 서비스의 엔진이 이 클라이언트의 엔진(name, dimension)과 같은지 확인했는지
+        self._service_checked = False
+
+        try:
+            info, _ = self._request({"op": "info"})
+            self.name = info["name"]
+            self.dimension = int(info["dimension"])
+            self._service_checked = True
+        except (OSError, ConnectionError, ValueError) as e:
+            print(f"임베딩 서비스에 연결할 수 없어 프로세스 내 인코딩을 사용합니다: {str(e)}")
+            self._mark_unavailable()
+            fallback = self._get_fallback()
+            self.name = fallback.name
+            self.dimension = fallback.dimension
+
+    def _connection(self) -> socket.socket:
+        # 스레드마다 연결을 하나씩 유지 (요청/응답이 섞이지 않도록)
+        # fork 이전에 만든 연결은 부모 프로세스와 공유되므로 다시 연결
+        sock = getattr(self._local, "sock", None)
+        if sock is not None and self._local.pid != os.getpid():
+            sock = None
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+            self._local.pid = os.getpid()
+        return sock
+
+    def _reset_connection(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None and self._local.pid == os.getpid():
+            sock.close()
+        self._local.sock = None
+
+    def _request(self, header: Dict[str, Any]) -> Tuple[Dict[str, Any], bytes]:
+        try:
+            sock = self._connection()
+            sock.sendall(_encode_frame(header))
+            (length,) = _LENGTH.unpack(_read_exactly(sock, _LENGTH.size))
+            response = json.loads(_read_exactly(sock, length))
+            payload = b""
+            if "n" in response:
+                payload = _read_exactly(sock, response["n"] * self.dimension * 4)
+            return response, payload
+        except (OSError, ConnectionError, ValueError):
+            self._reset_connection()
+            raise
+
+    def _mark_unavailable(self):
+        self._unavailable_until = time.monotonic() + self.retry_seconds
+
+    def _get_fallback(self) -> EmbeddingEngine:
+        with self._fallback_lock:
+            if self._fallback is None:
+                self._fallback = self._fallback_factory()
+            return self._fallback
+
+    def _service_matches(self) -> bool:
+        # 시작 시 프로세스 내 엔진으로 정해졌으면, 나중에 연결된 서비스가 같은 엔진일 때만 사용
+        if self._service_checked:
+            return True
+        info, _ = self._request({"op": "info"})
+        if info["name"] != self.name or int(info["dimension"]) != self.dimension:
+            print(
+                f"임베딩 서비스의 엔진({info['name']}, dim={info['dimension']})이 "
+                f"이 프로세스의 엔진({self.name}, dim={self.dimension})과 달라 서비스를 사용하지 않습니다"
+            )
+            self._mark_unavailable()
+            return False
+        self._service_checked = True
+        return True
+
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+
+        if time.monotonic() >= self._unavailable_until:
+            try:
+                if self._service_matches():
+                    response, payload = self._request({"texts": list(texts)})
+                    if "error" in response:
+                        raise ValueError(response["error"])
+                    return np.frombuffer(payload, dtype=np.float32).reshape(len(texts), self.dimension).copy()
+            except (OSError, ConnectionError, ValueError) as e:
+                print(f"임베딩 서비스 요청 실패, 프로세스 내 인코딩으로 대체합니다: {str(e)}")
+                self._mark_unavailable()
+
+        fallback = self._get_fallback()
+        if fallback.name != self.name or fallback.dimension != self.dimension:
+            raise RuntimeError(
+                f"임베딩 서비스를 사용할 수 없고, 프로세스 내 엔진({fallback.name}, dim={fallback.dimension})이 "
+                f"서비스 엔진({self.name}, dim={self.dimension})과 달라 대체할 수 없습니다"
+            )
+        return fallback.encode(texts, batch_size=batch_size)
+
+    def before_fork(self):
+        self._reset_connection()
+        if self._fallback is not None:
+            self._fallback.before_fork()
+
+    def close(self):
+        self._reset_connection()
+        if self._fallback is not None:
+            self._fallback.close()
+
+def main():
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    engine = create_embedding_engine()
+    server = EmbeddingServer(
+        engine,
+        socket_path=os.getenv("EMBEDDING_SERVICE_SOCKET", "/tmp/rag-embedding.sock"),
+        batch_size=int(os.getenv("EMBEDDING_BATCH_SIZE", "64")),
+        max_batch_texts=int(os.getenv("EMBEDDING_SERVICE_MAX_BATCH", "256")),
+        max_wait_ms=float(os.getenv("EMBEDDING_SERVICE_MAX_WAIT_MS", "5"))
+    )
+    try:
+        asyncio.run(server.serve())
+    finally:
+        engine.close()
+
+if __name__ == "__main__":
+    main()
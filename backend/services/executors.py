@@ -0,0 +1,59 @@
+import os
+import asyncio
+import functools
+import threading
+import multiprocessing
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Callable, Optional
+
+# 수집(업로드)과 질의 작업이 서로를 막지 않도록 풀을 분리
+_ingest_executor: Optional[ThreadPoolExecutor] = None
+_query_executor: Optional[ThreadPoolExecutor] = None
+_extraction_executor: Optional[ProcessPoolExecutor] = None
+_lock = threading.Lock()
+
+def get_ingest_executor() -> ThreadPoolExecutor:
+    global _ingest_executor
+    with _lock:
+        if _ingest_executor is None:
+            _ingest_executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv("INGEST_THREADS", "2")),
+                thread_name_prefix="ingest"
+            )
+        return _ingest_executor
+
+def get_query_executor() -> ThreadPoolExecutor:
+    global _query_executor
+    with _lock:
+        if _query_executor is None:
+            _query_executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv("QUERY_THREADS", "4")),
+                thread_name_prefix="query"
+            )
+        return _query_executor
+
+def get_extraction_executor() -> ProcessPoolExecutor:
+    # 순수 파이썬 문서 파싱(GIL 점유)은 별도 프로세스에서 실행
+    # torch 스레드가 있는 프로세스를 fork하지 않도록 spawn 사용
+    global _extraction_executor
+    with _lock:
+        if _extraction_executor is None:
+            _extraction_executor = ProcessPoolExecutor(
+                max_workers=int(os.getenv("EXTRACTION_PROCESSES", "2")),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _extraction_executor
+
+async def run_in_executor(executor: Executor, func: Callable, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+def shutdown_executors():
+    global _ingest_executor, _query_executor, _extraction_executor
+    with _lock:
+        for executor in (_ingest_executor, _query_executor, _extraction_executor):
+            if executor is not None:
+                executor.shutdown(wait=False)
+        _ingest_executor = None
+        _query_executor = None
+        _extraction_executor = None
@@ -0,0 +1,105 @@
+import os
+import gzip
+import json
+import uuid
+import threading
+from typing import Dict, Any, Iterator, Optional
+
+class ExtractionCache:
+    """문서 추출/분할 결과를 (파일 SHA-256, 분할 설정) 키로 보관하는 디스크 캐시
+
+    항목마다 gzip으로 압축한 JSON Lines 파일 하나에 청크를 한 줄씩 저장하므로
+    대용량 문서도 한 청크씩 읽고 쓸 수 있습니다. 전체 크기가 max_bytes를 넘으면
+    가장 오래 사용되지 않은(수정 시각 기준) 항목부터 삭제합니다.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.jsonl.gz")
+
+    def get(self, key: str) -> Optional[Iterator[Dict[str, Any]]]:
+        path = self._path(key)
+        try:
+            # 사용 시각 갱신 (LRU 삭제 순서)
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self._read(path)
+
+    @staticmethod
+    def _read(path: str) -> Iterator[Dict[str, Any]]:
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            for line in file:
+                yield json.loads(line)
+
+    def writer(self, key: str) -> "_CacheWriter":
+        return _CacheWriter(self, key)
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith(".jsonl.gz"):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, name in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+                total -= size
+
+    def stats(self) -> Dict[str, Any]:
+        total = 0
+        count = 0
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".jsonl.gz"):
+                count += 1
+                total += os.path.getsize(os.path.join(self.cache_dir, name))
+        return {
+            "entries": count,
+            "size_bytes": total,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+class _CacheWriter:
+    # 임시 파일에 한 줄씩 기록하고 commit 시 원자적으로 교체 (중간에 중단되면 버림)
+    def __init__(self, cache: ExtractionCache, key: str):
+        self.cache = cache
+        self.path = cache._path(key)
+        self.tmp_path = f"{self.path}.{uuid.uuid4().hex}.tmp"
+        self.file = gzip.open(self.tmp_path, "wt", encoding="utf-8", compresslevel=6)
+
+    def write(self, record: Dict[str, Any]):
+        self.file.write(json.dumps(record, ensure_ascii=False))
+        self.file.write("\n")
+
+    def commit(self):
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+        self.cache._evict()
+
+    def discard(self):
+        if not self.file.closed:
+            self.file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
@@ -0,0 +1,25 @@
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: 단일 프로세스 실행만 지원
+    fcntl = None
+
+@contextmanager
+def file_lock(path: str, shared: bool = False):
+    """path 잠금 파일에 대한 flock (여러 워커 프로세스 사이의 배타/공유 잠금)
+
+    flock은 열린 파일마다 걸리므로 같은 프로세스의 다른 스레드와도 배타적이지만,
+    재진입은 되지 않으니 중첩해서 잡지 않아야 합니다.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "a") as file:
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(file.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(file.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,90 @@
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+def _to_timestamp(value) -> int:
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    return int(value)
+
+def build_where(filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """검색 필터를 벡터 저장소의 where 절(Chroma 문법)로 변환
+
+    지원 키: filename, file_type, document_id (문자열 또는 목록),
+    page_from / page_to (페이지 범위와 겹치는 청크), uploaded_after / uploaded_before
+    """
+    if not filters:
+        return None
+
+    conditions = []
+    for key in ("filename", "file_type", "document_id"):
+        value = filters.get(key)
+        if value is None:
+            continue
+        values = list(value) if isinstance(value, (list, tuple)) else [value]
+        if len(values) == 1:
+            conditions.append({key: {"$eq": values[0]}})
+        elif values:
+            # chromadb 0.4.18에는 $in이 없으므로 $or로 표현
+            conditions.append({"$or": [{key: {"$eq": item}} for item in values]})
+
+    if filters.get("page_from") is not None:
+        conditions.append({"page_end": {"$gte": int(filters["page_from"])}})
+    if filters.get("page_to") is not None:
+        conditions.append({"page_start": {"$lte": int(filters["page_to"])}})
+    if filters.get("uploaded_after") is not None:
+        conditions.append({"upload_date": {"$gte": _to_timestamp(filters["uploaded_after"])}})
+    if filters.get("uploaded_before") is not None:
+        conditions.append({"upload_date": {"$lte": _to_timestamp(filters["uploaded_before"])}})
+
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
+
+_MISSING = object()
+
+def _compare(value, operator: str, expected) -> bool:
+    if value is _MISSING:
+        return operator in ("$ne", "$nin")
+    if operator == "$eq":
+        return value == expected
+    if operator == "$ne":
+        return value != expected
+    if operator == "$in":
+        return value in expected
+    if operator == "$nin":
+        return value not in expected
+    try:
+        if operator == "$gt":
+            return value > expected
+        if operator == "$gte":
+            return value >= expected
+        if operator == "$lt":
+            return value < expected
+        if operator == "$lte":
+            return value <= expected
+    except TypeError:
+        return False
+    raise ValueError(f"지원하지 않는 필터 연산자: {operator}")
+
+def matches_where(metadata: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    """Chroma where 절을 메타데이터 하나에 대해 평가 (NumPy 백엔드용)"""
+    if not where:
+        return True
+
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_where(metadata, sub) for sub in condition):
+                return False
+        else:
+            value = metadata.get(key, _MISSING)
+            if isinstance(condition, dict):
+                if not all(_compare(value, op, expected) for op, expected in condition.items()):
+                    return False
+            elif not _compare(value, "$eq", condition):
+                return False
+    return True
@@ -0,0 +1,149 @@
+import os
+import re
+import gzip
+import json
+import math
+import tempfile
+from collections import Counter
+from typing import List, Dict, Tuple
+
+_ASCII_TOKEN = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+_CJK_RUN = re.compile(r"[가-힣ㄱ-ㆎ一-鿿぀-ヿ]+")
+
+def tokenize(text: str) -> List[str]:
+    """영문/숫자는 단어 단위, 한글 등 CJK는 문자 바이그램 단위로 토큰화
+
+    제품 코드나 ID(예: AB-1234)는 통째로 하나의 토큰으로, 구성 요소도 각각 토큰으로 색인합니다.
+    """
+    text = text.lower()
+    tokens = []
+
+    for match in _ASCII_TOKEN.finditer(text):
+        token = match.group()
+        tokens.append(token)
+        parts = re.split(r"[-_./]", token)
+        if len(parts) > 1:
+            tokens.extend(parts)
+
+    for match in _CJK_RUN.finditer(text):
+        run = match.group()
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+
+    return tokens
+
+class BM25Index:
+    """증분 추가/삭제가 가능한 인메모리 BM25 역색인"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(self, doc_ids: List[str], texts: List[str]):
+        for doc_id, text in zip(doc_ids, texts):
+            if doc_id in self.doc_lengths:
+                continue
+
+            term_counts = Counter(tokenize(text))
+            for term, count in term_counts.items():
+                self.postings.setdefault(term, {})[doc_id] = count
+
+            length = sum(term_counts.values())
+            self.doc_lengths[doc_id] = length
+            self.total_length += length
+
+    def merge(self, other: "BM25Index"):
+        """other에만 있는 문서를 추가 (다른 워커가 저장한 색인에 이 워커의 추가분을 다시 반영할 때 사용)"""
+        new_ids = {doc_id for doc_id in other.doc_lengths if doc_id not in self.doc_lengths}
+        if not new_ids:
+            return
+
+        for term, posting in other.postings.items():
+            for doc_id, count in posting.items():
+                if doc_id in new_ids:
+                    self.postings.setdefault(term, {})[doc_id] = count
+
+        for doc_id in new_ids:
+            self.doc_lengths[doc_id] = other.doc_lengths[doc_id]
+            self.total_length += other.doc_lengths[doc_id]
+
+    def remove(self, doc_ids: List[str]):
+        removed = {doc_id for doc_id in doc_ids if doc_id in self.doc_lengths}
+        if not removed:
+            return
+
+        for term in list(self.postings.keys()):
+            posting = self.postings[term]
+            for doc_id in removed.intersection(posting.keys()):
+                del posting[doc_id]
+            if not posting:
+                del self.postings[term]
+
+        for doc_id in removed:
+            self.total_length -= self.doc_lengths.pop(doc_id)
+
+    def search(self, query: str, n_results: int = 10) -> List[Tuple[str, float]]:
+        if not self.doc_lengths:
+            return []
+
+        n_docs = len(self.doc_lengths)
+        avg_length = self.total_length / n_docs if n_docs else 0.0
+        scores: Dict[str, float] = {}
+
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+
+            idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc_id, tf in posting.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:n_results]
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 임시 파일 이름이 겹치지 않도록 같은 디렉터리에 고유한 이름으로 쓰고 교체
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+        os.close(fd)
+        try:
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as file:
+                json.dump({
+                    "k1": self.k1,
+                    "b": self.b,
+                    "postings": self.postings,
+                    "doc_lengths": self.doc_lengths
+                }, file, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            data = json.load(file)
+
+        index = cls(k1=data["k1"], b=data["b"])
+        index.postings = data["postings"]
+        index.doc_lengths = data["doc_lengths"]
+        index.total_length = sum(index.doc_lengths.values())
+        return index
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, 1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,162 @@
+import os
+import re
+import zlib
+import tempfile
+from typing import List, Dict, Tuple, Optional, Iterable
+
+import numpy as np
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_WHITESPACE = re.compile(r"\s+")
+
+def optimal_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """LSH 밴드 수와 밴드당 행 수 (임계값 기준 오탐/미탐 확률 면적의 합이 최소인 조합)"""
+    grid, step = np.linspace(0.0, 1.0, 201, retstep=True)
+    best = (num_perm, 1)
+    best_error = float("inf")
+    for bands in range(1, num_perm + 1):
+        if num_perm % bands:
+            continue
+        rows = num_perm // bands
+        probability = 1 - (1 - grid ** rows) ** bands
+        below = grid <= threshold
+        false_positive = probability[below].sum() * step
+        false_negative = (1 - probability[~below]).sum() * step
+        if false_positive + false_negative < best_error:
+            best_error = false_positive + false_negative
+            best = (bands, rows)
+    return best
+
+class MinHasher:
+    """문자 n-gram(shingle) 집합의 MinHash 서명
+
+    공백을 정리하고 소문자로 바꾼 텍스트의 shingle_size 문자 n-gram을 crc32로 해시한 뒤
+    num_perm개의 (a*x + b) mod p 해시 함수별 최솟값을 서명으로 사용합니다.
+    해시는 프로세스와 무관하게 같으므로 서명을 디스크에 저장해 재사용할 수 있습니다.
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.seed = seed
+        generator = np.random.RandomState(seed)
+        self._a = generator.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = generator.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def _shingles(self, text: str) -> List[str]:
+        text = _WHITESPACE.sub(" ", text.lower()).strip()
+        if len(text) <= self.shingle_size:
+            return [text]
+        return list({text[i:i + self.shingle_size] for i in range(len(text) - self.shingle_size + 1)})
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in self._shingles(text)),
+            dtype=np.uint64
+        )
+        # uint64 곱셈은 2^64에서 순환하므로 결과도 결정적
+        with np.errstate(over="ignore"):
+            permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _MERSENNE_PRIME
+        return (permuted & _MAX_HASH).min(axis=1).astype(np.uint32)
+
+class MinHashLSHIndex:
+    """MinHash 서명의 LSH 색인으로 Jaccard 유사도가 threshold 이상인 근사 중복 청크를 찾음
+
+    서명을 bands개 구간으로 나눠 구간별 버킷에 넣고, 버킷을 공유하는 후보만
+    서명 일치 비율(추정 Jaccard 유사도)로 다시 확인합니다.
+    """
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError(f"threshold는 0보다 크고 1 이하여야 합니다: {threshold}")
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm, shingle_size, seed)
+        self.bands, self.rows = optimal_bands(threshold, num_perm)
+        self.signatures: Dict[str, np.ndarray] = {}
+        self.buckets: Dict[Tuple[int, bytes], set] = {}
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def signature(self, text: str) -> np.ndarray:
+        return self.hasher.signature(text)
+
+    def _band_keys(self, signature: np.ndarray) -> Iterable[Tuple[int, bytes]]:
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def query(self, signature: np.ndarray) -> Optional[Tuple[str, float]]:
+        """가장 비슷한 근사 중복 청크의 (ID, 추정 유사도), 없으면 None"""
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self.buckets.get(key, ()))
+
+        best = None
+        for doc_id in candidates:
+            similarity = float(np.mean(self.signatures[doc_id] == signature))
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (doc_id, similarity)
+        return best
+
+    def add(self, doc_id: str, signature: np.ndarray):
+        if doc_id in self.signatures:
+            return
+        self.signatures[doc_id] = signature
+        for key in self._band_keys(signature):
+            self.buckets.setdefault(key, set()).add(doc_id)
+
+    def merge(self, other: "MinHashLSHIndex"):
+        """other에만 있는 서명을 추가 (다른 워커가 저장한 색인에 이 워커의 추가분을 다시 반영할 때 사용)"""
+        for doc_id, signature in other.signatures.items():
+            self.add(doc_id, signature)
+
+    def remove(self, doc_ids: List[str]):
+        for doc_id in doc_ids:
+            signature = self.signatures.pop(doc_id, None)
+            if signature is None:
+                continue
+            for key in self._band_keys(signature):
+                bucket = self.buckets.get(key)
+                if bucket is not None:
+                    bucket.discard(doc_id)
+                    if not bucket:
+                        del self.buckets[key]
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 임시 파일 이름이 겹치지 않도록 같은 디렉터리에 고유한 이름으로 쓰고 교체
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f"{os.path.basename(path)}.", suffix=".tmp.npz")
+        os.close(fd)
+        ids = list(self.signatures.keys())
+        try:
+            np.savez_compressed(
+                tmp_path,
+                ids=np.array(ids, dtype=str),
+                signatures=np.stack([self.signatures[doc_id] for doc_id in ids]) if ids
+                else np.zeros((0, self.hasher.num_perm), dtype=np.uint32),
+                params=np.array([self.hasher.num_perm, self.hasher.shingle_size, self.hasher.seed], dtype=np.int64)
+            )
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(
+        cls,
+        path: str,
+        threshold: float = 0.85,
+        num_perm: int = 128,
+        shingle_size: int = 5,
+        seed: int = 1
+    ) -> Optional["MinHashLSHIndex"]:
+        """저장된 서명으로 색인을 복원 (서명 설정이 다르면 None, 임계값만 다르면 버킷을 다시 구성)"""
+        index = cls(threshold, num_perm, shingle_size, seed)
+        with np.load(path) as data:
+            if data["params"].tolist() != [num_perm, shingle_size, seed]:
+                return None
+            for doc_id, signature in zip(data["ids"].tolist(), data["signatures"]):
+                index.add(doc_id, signature)
+        return index
@@ -0,0 +1,72 @@
+from typing import List
+
+import numpy as np
+
+QUANTIZATION_MODES = ("none", "int8", "binary")
+
+# 정규화된 임베딩은 각 성분이 [-1, 1] 범위이므로 고정 스케일로 int8 양자화
+INT8_SCALE = 127.0
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+def quantize(embeddings: np.ndarray, mode: str) -> np.ndarray:
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if mode == "int8":
+        return np.clip(np.rint(embeddings * INT8_SCALE), -127, 127).astype(np.int8)
+    if mode == "binary":
+        return np.packbits(embeddings > 0, axis=1)
+    raise ValueError(f"지원하지 않는 양자화 방식: {mode}")
+
+def code_width(dimension: int, mode: str) -> int:
+    if mode == "int8":
+        return dimension
+    if mode == "binary":
+        return (dimension + 7) // 8
+    raise ValueError(f"지원하지 않는 양자화 방식: {mode}")
+
+def approximate_distances(codes: np.ndarray, query: np.ndarray, mode: str, block_size: int = 65536) -> np.ndarray:
+    """양자화 코드로 근사 거리(작을수록 가까움)를 블록 단위로 계산"""
+    query = np.asarray(query, dtype=np.float32)
+    distances = np.empty(len(codes), dtype=np.float32)
+
+    if mode == "int8":
+        for start in range(0, len(codes), block_size):
+            block = codes[start:start + block_size].astype(np.float32)
+            distances[start:start + block_size] = -(block @ query)
+    elif mode == "binary":
+        query_code = quantize(query[None, :], "binary")[0]
+        for start in range(0, len(codes), block_size):
+            xor = np.bitwise_xor(codes[start:start + block_size], query_code)
+            distances[start:start + block_size] = _POPCOUNT[xor].sum(axis=1)
+    else:
+        raise ValueError(f"지원하지 않는 양자화 방식: {mode}")
+
+    return distances
+
+def shortlist(codes: np.ndarray, query: np.ndarray, mode: str, size: int) -> np.ndarray:
+    distances = approximate_distances(codes, query, mode)
+    if size >= len(distances):
+        return np.arange(len(distances))
+    return np.argpartition(distances, size - 1)[:size]
+
+def exact_top_k(matrix: np.ndarray, rows: np.ndarray, query: np.ndarray, k: int):
+    """후보 행에 대해 전체 정밀도 제곱 L2 거리로 재계산한 top-k (행 번호, 거리)"""
+    rows = np.sort(rows)
+    candidates = np.asarray(matrix[rows], dtype=np.float32)
+    diff = candidates - query[None, :]
+    distances = np.einsum("ij,ij->i", diff, diff)
+    k = min(k, len(rows))
+    if k < len(rows):
+        top = np.argpartition(distances, k - 1)[:k]
+    else:
+        top = np.arange(len(rows))
+    top = top[np.argsort(distances[top])]
+    return rows[top], distances[top]
+
+def recall_at_k(exact: List[List[int]], approximate: List[List[int]]) -> float:
+    total = 0
+    found = 0
+    for exact_ids, approx_ids in zip(exact, approximate):
+        total += len(exact_ids)
+        found += len(set(exact_ids) & set(approx_ids))
+    return found / total if total else 1.0
@@ -1,14 +1,33 @@
 import os
-from typing import Dict, Any, List
+import json
+import time
+import asyncio
+from typing import Dict, Any, List, Tuple, Union, Optional, AsyncIterator
 import openai
-from openai import OpenAI
+from openai import AsyncOpenAI
 
 from .vector_store import VectorStore
+from .cache import SemanticAnswerCache
+from .executors import get_query_executor, run_in_executor
+
+def create_answer_cache() -> Optional[SemanticAnswerCache]:
+    # ANSWER_CACHE_ENABLED=False이면 사용하지 않음, ANSWER_CACHE_TTL=0이면 만료 없음
+    if os.getenv("ANSWER_CACHE_ENABLED", "True").lower() != "true":
+        return None
+    ttl = float(os.getenv("ANSWER_CACHE_TTL", "86400"))
+    return SemanticAnswerCache(
+        threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95")),
+        max_size=int(os.getenv("ANSWER_CACHE_SIZE", "1000")),
+        ttl_seconds=ttl if ttl > 0 else None,
+        path=os.getenv("ANSWER_CACHE_PATH", os.path.join(os.getenv("CHROMA_DB_PATH", "./vector_db"), "answer_cache.npz"))
+    )
 
 class RAGService:
     def __init__(self, vector_store: VectorStore):
         self.vector_store = vector_store
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.answer_cache = create_answer_cache()
+        self._read_settings()
         
         self.system_prompt = """당신은 업로드된 문서를 기반으로 질문에 답하는 AI 어시스턴트입니다.
 
@@ -19,56 +38,349 @@ class RAGService:
 4. 가능한 한 구체적이고 정확한 답변을 제공해주세요.
 5. 답변의 근거가 되는 문서의 부분을 명시해주세요."""
 
+    no_documents_message = "관련 문서를 찾을 수 없습니다. 먼저 문서를 업로드해주세요."
+    
+    llm_model = "gpt-3.5-turbo"
+    
+    _save_task: Optional[asyncio.Task] = None
+    
+    def _read_settings(self):
+        # 환경 변수는 main.py의 load_dotenv() 이후에 읽도록 클래스 정의가 아닌 생성 시점에 읽음
+        # 프롬프트에 넣을 문서 내용의 최대 토큰 수 (청크 메타데이터의 token_count 사용)
+        self.max_context_tokens = int(os.getenv("MAX_CONTEXT_TOKENS", "3000"))
+        # 새 답변을 캐시에 넣은 뒤 디스크에 저장하기까지 기다리는 시간 (그 사이의 답변은 한 번에 저장)
+        self.answer_cache_save_delay = float(os.getenv("ANSWER_CACHE_SAVE_DELAY", "5"))
+        # /chat/batch 요청이 지정할 수 있는 LLM 동시 호출 수의 상한
+        self.max_batch_concurrency = int(os.getenv("CHAT_BATCH_MAX_CONCURRENCY", "16"))
+
     async def get_answer(
         self, 
         question: str, 
-        collection_name: str = "default",
-        n_context_docs: int = 5
+        collection_name: Union[str, List[str]] = "default",
+        n_context_docs: int = 5,
+        filters: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         try:
-            similar_docs = self.vector_store.search_similar_documents(
-                query=question,
-                collection_name=collection_name,
-                n_results=n_context_docs
+            # 질문 임베딩은 답변 캐시 조회와 검색에 함께 사용
+            query_embedding = await self.vector_store.encode_query_async(question)
+            # 컬렉션 목록과 버전 파일 조회는 이벤트 루프 밖에서 실행
+            scope = await run_in_executor(
+                get_query_executor(), self._answer_cache_scope, collection_name, n_context_docs, filters
             )
+            cached = self._cached_answer(scope, query_embedding)
+            if cached is not None:
+                return cached
             
-            if not similar_docs:
-                return {
-                    "answer": "관련 문서를 찾을 수 없습니다. 먼저 문서를 업로드해주세요.",
-                    "sources": [],
-                    "confidence": 0.0
-                }
-            
-            context = self._build_context(similar_docs)
-            sources = self._extract_sources(similar_docs)
+            similar_docs, latencies = await self._retrieve(
+                question, collection_name, n_context_docs, filters, query_embedding=query_embedding
+            )
+            result = await self._answer_from_docs(question, similar_docs, latencies)
+            if similar_docs:
+                self._store_answer(scope, query_embedding, result)
+            return result
             
-            prompt = self._build_prompt(question, context)
+        except Exception as e:
+            return {
+                "answer": f"답변 생성 중 오류가 발생했습니다: {str(e)}",
+                "sources": [],
+                "confidence": 0.0
+            }
+    
+    async def get_answers(
+        self,
+        questions: List[str],
+        collection_name: str = "default",
+        n_context_docs: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+        max_concurrency: int = 8
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """여러 질문을 한 번의 인코딩/검색으로 처리하고, LLM 호출은 동시성을 제한해 완료 순서대로 반환"""
+        all_docs = await self.vector_store.search_batch_async(
+            questions,
+            collection_name,
+            n_results=n_context_docs,
+            filters=filters
+        )
+        semaphore = asyncio.Semaphore(min(max(1, max_concurrency), max(1, self.max_batch_concurrency)))
+        
+        async def answer_one(index: int, question: str, similar_docs: List[Dict[str, Any]]) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    result = await self._answer_from_docs(question, similar_docs, {})
+                except Exception as e:
+                    result = {
+                        "answer": f"답변 생성 중 오류가 발생했습니다: {str(e)}",
+                        "sources": [],
+                        "confidence": 0.0
+                    }
+            result["index"] = index
+            result["question"] = question
+            return result
+        
+        tasks = [
+            asyncio.ensure_future(answer_one(i, question, docs))
+            for i, (question, docs) in enumerate(zip(questions, all_docs))
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def stream_answer(
+        self,
+        question: str,
+        collection_name: Union[str, List[str]] = "default",
+        n_context_docs: int = 5,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """검색 결과(sources)를 먼저 보내고 답변 토큰을 생성되는 대로 보내는 이벤트 스트림
+        
+        이벤트는 {"event": sources|token|done|error, "data": {...}} 형식이며,
+        마지막 done 이벤트에 전체 답변과 첫 토큰까지 걸린 시간(ttft_ms)을 담습니다.
+        """
+        start = time.perf_counter()
+        answer_parts = []
+        ttft_ms = None
+        try:
+            query_embedding = await self.vector_store.encode_query_async(question)
+            # 컬렉션 목록과 버전 파일 조회는 이벤트 루프 밖에서 실행
+            scope = await run_in_executor(
+                get_query_executor(), self._answer_cache_scope, collection_name, n_context_docs, filters
+            )
+            cached = self._cached_answer(scope, query_embedding)
+            if cached is not None:
+                elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+                yield {"event": "sources", "data": {
+                    "sources": cached["sources"],
+                    "confidence": cached["confidence"],
+                    "collection_latencies": {},
+                    "retrieval_ms": elapsed_ms,
+                    "cached": True
+                }}
+                yield {"event": "token", "data": {"text": cached["answer"]}}
+                yield {"event": "done", "data": {
+                    "answer": cached["answer"],
+                    "ttft_ms": elapsed_ms,
+                    "total_ms": elapsed_ms,
+                    "cached": True
+                }}
+                return
             
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": self.system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=1500
+            similar_docs, latencies = await self._retrieve(
+                question, collection_name, n_context_docs, filters, query_embedding=query_embedding
             )
+            retrieval_ms = (time.perf_counter() - start) * 1000
             
-            answer = response.choices[0].message.content
-            confidence = self._calculate_confidence(similar_docs)
+            if similar_docs:
+                similar_docs = self._fit_context_budget(similar_docs)
+                sources = self._extract_sources(similar_docs)
+                confidence = self._calculate_confidence(similar_docs)
+                tokens = self._generate_stream(self._build_prompt(question, self._build_context(similar_docs)))
+            else:
+                sources = []
+                confidence = 0.0
+                tokens = self._single_token(self.no_documents_message)
             
-            return {
-                "answer": answer,
+            yield {"event": "sources", "data": {
                 "sources": sources,
-                "confidence": confidence
-            }
+                "confidence": confidence,
+                "collection_latencies": latencies,
+                "retrieval_ms": round(retrieval_ms, 2),
+                "cached": False
+            }}
+            
+            async for token in tokens:
+                if not token:
+                    continue
+                if ttft_ms is None:
+                    ttft_ms = (time.perf_counter() - start) * 1000
+                answer_parts.append(token)
+                yield {"event": "token", "data": {"text": token}}
             
+            answer = "".join(answer_parts)
+            yield {"event": "done", "data": {
+                "answer": answer,
+                "ttft_ms": round(ttft_ms, 2) if ttft_ms is not None else None,
+                "total_ms": round((time.perf_counter() - start) * 1000, 2),
+                "cached": False
+            }}
+            if similar_docs and answer:
+                self._store_answer(
+                    scope, query_embedding, {"answer": answer, "sources": sources, "confidence": confidence}
+                )
         except Exception as e:
+            yield {"event": "error", "data": {"message": f"답변 생성 중 오류가 발생했습니다: {str(e)}"}}
+    
+    def _answer_cache_scope(
+        self,
+        collection_name: Union[str, List[str]],
+        n_context_docs: int,
+        filters: Optional[Dict[str, Any]]
+    ) -> str:
+        # 모델, 검색 대상 컬렉션의 현재 버전, 검색 조건이 모두 같을 때만 캐시된 답변을 재사용
+        collection_names = self.vector_store.resolve_collections(collection_name)
+        return json.dumps({
+            "model": self.model_id,
+            "collections": {name: self.vector_store.collection_versions.get(name) for name in collection_names},
+            "n_context_docs": n_context_docs,
+            "filters": filters
+        }, sort_keys=True, default=str, ensure_ascii=False)
+    
+    def _cached_answer(self, scope: str, query_embedding: List[float]) -> Optional[Dict[str, Any]]:
+        if self.answer_cache is None:
+            return None
+        cached = self.answer_cache.get(scope, query_embedding)
+        if cached is None:
+            return None
+        return {
+            "answer": cached["answer"],
+            "sources": cached["sources"],
+            "confidence": cached["confidence"],
+            "collection_latencies": {},
+            "cached": True,
+            "cache_similarity": cached["similarity"]
+        }
+    
+    def _store_answer(self, scope: str, query_embedding: List[float], result: Dict[str, Any]):
+        if self.answer_cache is None:
+            return
+        self.answer_cache.set(scope, query_embedding, {
+            "answer": result["answer"],
+            "sources": result["sources"],
+            "confidence": result["confidence"]
+        })
+        # 디스크 저장은 응답을 기다리게 하지 않도록 백그라운드에서 모아서 한 번에 기록
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.ensure_future(self._save_answer_cache_later())
+    
+    async def _save_answer_cache_later(self):
+        await asyncio.sleep(self.answer_cache_save_delay)
+        try:
+            await asyncio.to_thread(self.answer_cache.save)
+        except Exception as e:
+            print(f"답변 캐시 저장 중 오류 발생: {str(e)}")
+    
+    async def close(self):
+        """종료 시 아직 기록하지 않은 답변 캐시를 저장"""
+        if self._save_task is None or self._save_task.done():
+            return
+        self._save_task.cancel()
+        try:
+            await asyncio.to_thread(self.answer_cache.save)
+        except Exception as e:
+            print(f"답변 캐시 저장 중 오류 발생: {str(e)}")
+    
+    @property
+    def model_id(self) -> str:
+        return f"openai:{self.llm_model}"
+    
+    @staticmethod
+    async def _single_token(text: str) -> AsyncIterator[str]:
+        yield text
+    
+    async def _answer_from_docs(
+        self,
+        question: str,
+        similar_docs: List[Dict[str, Any]],
+        latencies: Dict[str, float]
+    ) -> Dict[str, Any]:
+        if not similar_docs:
             return {
-                "answer": f"답변 생성 중 오류가 발생했습니다: {str(e)}",
+                "answer": self.no_documents_message,
                 "sources": [],
-                "confidence": 0.0
+                "confidence": 0.0,
+                "collection_latencies": latencies
             }
+        
+        similar_docs = self._fit_context_budget(similar_docs)
+        context = self._build_context(similar_docs)
+        sources = self._extract_sources(similar_docs)
+        
+        prompt = self._build_prompt(question, context)
+        answer = await self._generate(prompt)
+        confidence = self._calculate_confidence(similar_docs)
+        
+        return {
+            "answer": answer,
+            "sources": sources,
+            "confidence": confidence,
+            "collection_latencies": latencies,
+            "cached": False
+        }
+    
+    async def _generate(self, prompt: str) -> str:
+        response = await self.client.chat.completions.create(
+            model=self.llm_model,
+            messages=[
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.3,
+            max_tokens=1500
+        )
+        return response.choices[0].message.content
+    
+    async def _generate_stream(self, prompt: str) -> AsyncIterator[str]:
+        stream = await self.client.chat.completions.create(
+            model=self.llm_model,
+            messages=[
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.3,
+            max_tokens=1500,
+            stream=True
+        )
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            # 클라이언트가 중간에 끊으면 생성 요청도 닫음
+            await stream.response.aclose()
+    
+    async def _retrieve(
+        self,
+        question: str,
+        collection_name: Union[str, List[str]],
+        n_context_docs: int,
+        filters: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[List[float]] = None
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
+        # 컬렉션 목록 또는 "all"이면 여러 컬렉션을 동시에 검색
+        # 인코딩/검색은 질의 전용 스레드 풀에서 실행해 이벤트 루프를 막지 않음
+        if isinstance(collection_name, list) or collection_name == "all":
+            return await self.vector_store.search_collections_async(
+                question,
+                collection_name,
+                n_results=n_context_docs,
+                filters=filters,
+                query_embedding=query_embedding
+            )
+        
+        similar_docs = await self.vector_store.search_similar_documents_async(
+            question,
+            collection_name,
+            n_results=n_context_docs,
+            filters=filters,
+            query_embedding=query_embedding
+        )
+        return similar_docs, {}
+    
+    def _fit_context_budget(self, similar_docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # 관련도 순으로 토큰 예산 안에 들어가는 문서만 사용 (최소 1개)
+        selected = []
+        used_tokens = 0
+        for doc in similar_docs:
+            # token_count가 없는 이전 청크는 문자 수로 대략 추정
+            tokens = doc['metadata'].get('token_count') or len(doc['content']) // 2
+            if selected and used_tokens + tokens > self.max_context_tokens:
+                break
+            selected.append(doc)
+            used_tokens += tokens
+        return selected
     
     def _build_context(self, similar_docs: List[Dict[str, Any]]) -> str:
         context_parts = []
@@ -115,6 +427,8 @@ class LocalRAGService(RAGService):
     def __init__(self, vector_store: VectorStore, model_name: str = "llama2"):
         self.vector_store = vector_store
         self.model_name = model_name
+        self.answer_cache = create_answer_cache()
+        self._read_settings()
         self.system_prompt = """당신은 업로드된 문서를 기반으로 질문에 답하는 AI 어시스턴트입니다.
 
 다음 지침을 따라주세요:
@@ -123,58 +437,57 @@ class LocalRAGService(RAGService):
 3. 답변은 한국어로 작성해주세요.
 4. 가능한 한 구체적이고 정확한 답변을 제공해주세요."""
 
-    async def get_answer(
-        self, 
-        question: str, 
-        collection_name: str = "default",
-        n_context_docs: int = 5
-    ) -> Dict[str, Any]:
-        try:
-            import requests
-            
-            similar_docs = self.vector_store.search_similar_documents(
-                query=question,
-                collection_name=collection_name,
-                n_results=n_context_docs
-            )
-            
-            if not similar_docs:
-                return {
-                    "answer": "관련 문서를 찾을 수 없습니다.",
-                    "sources": [],
-                    "confidence": 0.0
-                }
-            
-            context = self._build_context(similar_docs)
-            sources = self._extract_sources(similar_docs)
-            prompt = self._build_prompt(question, context)
-            
-            # Ollama API 호출
-            response = requests.post(
-                'http://localhost:11434/api/generate',
+    no_documents_message = "관련 문서를 찾을 수 없습니다."
+    
+    ollama_generate_url = 'http://localhost:11434/api/generate'
+    
+    @property
+    def model_id(self) -> str:
+        return f"ollama:{self.model_name}"
+
+    async def _generate(self, prompt: str) -> str:
+        import requests
+        
+        # Ollama API 호출 (동기 HTTP 호출은 스레드에서 실행)
+        response = await asyncio.to_thread(
+            requests.post,
+            self.ollama_generate_url,
+            json={
+                'model': self.model_name,
+                'prompt': f"{self.system_prompt}\n\n{prompt}",
+                'stream': False
+            }
+        )
+        
+        # 오류 응답은 답변이 아니므로 예외로 알려 답변 캐시에 저장되지 않게 함
+        if response.status_code != 200:
+            raise RuntimeError(f"로컬 LLM 서버에 연결할 수 없습니다. (HTTP {response.status_code})")
+        answer = response.json().get('response')
+        if not answer:
+            raise RuntimeError("로컬 LLM 서버가 빈 답변을 반환했습니다.")
+        return answer
+    
+    async def _generate_stream(self, prompt: str) -> AsyncIterator[str]:
+        import httpx
+        
+        # Ollama 스트리밍 응답은 한 줄에 JSON 하나 ({"response": 토큰, "done": bool})
+        async with httpx.AsyncClient(timeout=httpx.Timeout(10.0, read=None)) as client:
+            async with client.stream(
+                'POST',
+                self.ollama_generate_url,
                 json={
                     'model': self.model_name,
                     'prompt': f"{self.system_prompt}\n\n{prompt}",
-                    'stream': False
+                    'stream': True
                 }
-            )
-            
-            if response.status_code == 200:
-                answer = response.json().get('response', '답변을 생성할 수 없습니다.')
-            else:
-                answer = "로컬 LLM 서버에 연결할 수 없습니다."
-            
-            confidence = self._calculate_confidence(similar_docs)
-            
-            return {
-                "answer": answer,
-                "sources": sources,
-                "confidence": confidence
-            }
-            
-        except Exception as e:
-            return {
-                "answer": f"답변 생성 중 오류가 발생했습니다: {str(e)}",
-                "sources": [],
-                "confidence": 0.0
-            }
\ No newline at end of file
+            ) as response:
+                if response.status_code != 200:
+                    raise RuntimeError(f"로컬 LLM 서버에 연결할 수 없습니다. (HTTP {response.status_code})")
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    if data.get('response'):
+                        yield data['response']
+                    if data.get('done'):
+                        break
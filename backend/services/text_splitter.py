@@ -0,0 +1,123 @@
+import re
+import bisect
+from typing import List, Tuple
+
+import numpy as np
+
+# 구분자 우선순위: 문단 > 줄 > 단어 (RecursiveCharacterTextSplitter와 같은 순서)
+_SEPARATORS = (
+    (re.compile(r"\n\s*\n\s*"), 3),
+    (re.compile(r"\n\s*"), 2),
+    (re.compile(r"[ \t]+"), 1)
+)
+
+def load_encoding(encoding_name: str = "cl100k_base"):
+    import tiktoken
+    return tiktoken.get_encoding(encoding_name)
+
+class TokenTextSplitter:
+    """모델 토큰 수 기준으로 청크를 나누는 분할기
+
+    텍스트를 한 번만 토큰화해 각 토큰의 문자 위치를 구하고, 구분자 위치도 한 번의 스캔으로
+    우선순위별로 모아 둔 뒤 앞에서부터 한 번 훑으며 청크 경계를 정합니다.
+    청크는 chunk_size 토큰을 넘지 않는 범위에서 가장 높은 우선순위의 구분자에서 끊고,
+    다음 청크는 약 chunk_overlap 토큰 앞의 단어 경계에서 시작합니다.
+    """
+
+    def __init__(self, chunk_size: int = 256, chunk_overlap: int = 50, encoding=None, encoding_name: str = "cl100k_base"):
+        if chunk_overlap >= chunk_size:
+            raise ValueError(f"chunk_overlap({chunk_overlap})은 chunk_size({chunk_size})보다 작아야 합니다")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.encoding = encoding or load_encoding(encoding_name)
+        self._token_byte_lengths = None
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.encoding.encode_ordinary(text))
+
+    def _byte_lengths(self) -> np.ndarray:
+        # 토큰 ID -> UTF-8 바이트 길이 표 (어휘마다 한 번만 생성)
+        if self._token_byte_lengths is None:
+            lengths = np.zeros(self.encoding.n_vocab, dtype=np.int64)
+            for token in range(self.encoding.n_vocab):
+                try:
+                    lengths[token] = len(self.encoding.decode_single_token_bytes(token))
+                except KeyError:
+                    pass
+            self._token_byte_lengths = lengths
+        return self._token_byte_lengths
+
+    def _token_starts(self, text: str) -> List[int]:
+        # 각 토큰의 시작 문자 위치 (decode_with_offsets와 같은 결과를 벡터 연산으로 계산)
+        tokens = np.asarray(self.encoding.encode_ordinary(text), dtype=np.int64)
+        if len(tokens) == 0:
+            return []
+        byte_starts = np.concatenate(([0], np.cumsum(self._byte_lengths()[tokens])[:-1]))
+
+        data = np.frombuffer(text.encode("utf-8"), dtype=np.uint8)
+        char_of_byte = np.cumsum((data & 0xC0) != 0x80) - 1
+        return char_of_byte[byte_starts].tolist()
+
+    @staticmethod
+    def _breaks(text: str) -> List[List[int]]:
+        # 우선순위별 분할 가능 위치 (구분자 바로 뒤 = 다음 청크가 시작할 수 있는 위치)
+        breaks = [[] for _ in range(4)]
+        for pattern, priority in _SEPARATORS:
+            breaks[priority] = [match.end() for match in pattern.finditer(text)]
+        return breaks
+
+    def split_with_offsets(self, text: str) -> List[Tuple[int, str, int]]:
+        """(원문 내 시작 위치, 청크, 토큰 수) 목록"""
+        if not text.strip():
+            return []
+
+        token_starts = self._token_starts(text)
+        n_tokens = len(token_starts)
+        breaks = self._breaks(text)
+        word_breaks = sorted(set(breaks[1] + breaks[2] + breaks[3]))
+
+        def char_at(token_index: int) -> int:
+            return token_starts[token_index] if token_index < n_tokens else len(text)
+
+        def token_at(position: int) -> int:
+            return bisect.bisect_left(token_starts, position)
+
+        results = []
+        start = 0
+        while start < len(text):
+            start_token = token_at(start)
+            limit = char_at(start_token + self.chunk_size)
+
+            end = limit
+            if limit < len(text):
+                # 청크의 절반 이후에 있는 가장 높은 우선순위의 구분자에서 끊음
+                lower = char_at(start_token + self.chunk_size // 2)
+                for priority in (3, 2, 1):
+                    index = bisect.bisect_right(breaks[priority], limit) - 1
+                    if index >= 0 and breaks[priority][index] > lower:
+                        end = breaks[priority][index]
+                        break
+
+            chunk = text[start:end]
+            stripped = chunk.strip()
+            if stripped:
+                chunk_start = start + (len(chunk) - len(chunk.lstrip()))
+                chunk_end = chunk_start + len(stripped)
+                results.append((chunk_start, stripped, token_at(chunk_end) - token_at(chunk_start)))
+
+            if end >= len(text):
+                break
+
+            # overlap: 끝에서 chunk_overlap 토큰 앞 위치 이후의 첫 단어 경계에서 다음 청크 시작
+            next_start = end
+            if self.chunk_overlap > 0:
+                target = char_at(max(token_at(end) - self.chunk_overlap, start_token + 1))
+                index = bisect.bisect_left(word_breaks, target)
+                if index < len(word_breaks) and word_breaks[index] < end:
+                    next_start = word_breaks[index]
+            start = max(next_start, start + 1)
+
+        return results
+
+    def split_text(self, text: str) -> List[str]:
+        return [chunk for _, chunk, _ in self.split_with_offsets(text)]
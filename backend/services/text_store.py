@@ -0,0 +1,232 @@
+import os
+import json
+import mmap
+import uuid
+import zlib
+import struct
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+_MAGIC = b"RAGTXT01"
+_TRAILER = struct.Struct("<Q8s")
+
+class TextStore:
+    """문서별 추출 원문을 한 번만 저장하는 압축 사이드카
+
+    문서마다 파일 하나에 원문을 block_chars 문자 단위 블록으로 나눠 zlib으로 압축해 이어 쓰고,
+    파일 끝에 블록별 바이트 오프셋 색인을 둡니다. 읽을 때는 파일을 mmap으로 열고
+    요청한 [start, end) 구간이 걸친 블록만 압축을 풀므로 청크는 (문서 ID, 시작, 끝) 오프셋만
+    보관하면 됩니다. 최근에 푼 블록은 LRU로 메모리에 유지합니다.
+    """
+
+    def __init__(self, root: str, block_chars: int = 65536, cache_blocks: int = 64, max_open_files: int = 64):
+        self.root = root
+        self.block_chars = block_chars
+        self.cache_blocks = cache_blocks
+        self.max_open_files = max_open_files
+        self._lock = threading.Lock()
+        self._files: "OrderedDict[str, tuple]" = OrderedDict()
+        self._blocks: "OrderedDict[tuple, str]" = OrderedDict()
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, doc_id: str) -> str:
+        return os.path.join(self.root, f"{doc_id}.txt.z")
+
+    def has(self, doc_id: str) -> bool:
+        """끝까지 기록된 원문이 있는지 (적재가 중간에 실패해 앞부분만 남은 원문이면 False)"""
+        with self._lock:
+            try:
+                return self._open(doc_id)[1].get("complete", True)
+            except (KeyError, ValueError):
+                return False
+
+    def writer(self, doc_id: str) -> "_TextWriter":
+        return _TextWriter(self, doc_id)
+
+    def put(self, doc_id: str, text: str):
+        writer = self.writer(doc_id)
+        try:
+            writer.append(text)
+            writer.commit()
+        finally:
+            writer.discard()
+
+    def _open(self, doc_id: str) -> tuple:
+        # (mmap, 색인, inode) - 호출 측에서 self._lock을 잡고 있어야 함
+        # 파일이 교체되었으면(일부만 기록된 원문을 다시 쓴 경우 등) 새로 엶
+        try:
+            inode = os.stat(self._path(doc_id)).st_ino
+        except OSError:
+            inode = None
+        entry = self._files.get(doc_id)
+        if entry is not None:
+            if entry[2] == inode:
+                self._files.move_to_end(doc_id)
+                return entry
+            del self._files[doc_id]
+            entry[0].close()
+        if inode is None:
+            raise KeyError(f"문서 원문을 찾을 수 없습니다: {doc_id}")
+
+        try:
+            with open(self._path(doc_id), "rb") as file:
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                inode = os.fstat(file.fileno()).st_ino
+        except (OSError, ValueError):
+            raise KeyError(f"문서 원문을 찾을 수 없습니다: {doc_id}")
+
+        index_length, magic = _TRAILER.unpack(data[-_TRAILER.size:])
+        if magic != _MAGIC:
+            data.close()
+            raise ValueError(f"손상된 원문 파일입니다: {doc_id}")
+        index_end = len(data) - _TRAILER.size
+        index = json.loads(data[index_end - index_length:index_end].decode("utf-8"))
+
+        entry = (data, index, inode)
+        self._files[doc_id] = entry
+        while len(self._files) > self.max_open_files:
+            _, (old_data, _, _) = self._files.popitem(last=False)
+            old_data.close()
+        return entry
+
+    def length(self, doc_id: str) -> int:
+        with self._lock:
+            return self._open(doc_id)[1]["length"]
+
+    def _block(self, doc_id: str, block_index: int) -> str:
+        with self._lock:
+            data, index, inode = self._open(doc_id)
+            key = (doc_id, inode, block_index)
+            block = self._blocks.get(key)
+            if block is not None:
+                self._blocks.move_to_end(key)
+                return block
+            offsets = index["offsets"]
+            compressed = data[offsets[block_index]:offsets[block_index + 1]]
+
+        block = zlib.decompress(compressed).decode("utf-8")
+        with self._lock:
+            self._blocks[key] = block
+            while len(self._blocks) > self.cache_blocks:
+                self._blocks.popitem(last=False)
+        return block
+
+    def slice(self, doc_id: str, start: int, end: int) -> str:
+        """문서 원문의 [start, end) 구간"""
+        with self._lock:
+            index = self._open(doc_id)[1]
+        block_chars = index["block_chars"]
+        end = min(end, index["length"])
+        if start >= end:
+            return ""
+
+        first = start // block_chars
+        last = (end - 1) // block_chars
+        text = "".join(self._block(doc_id, block_index) for block_index in range(first, last + 1))
+        base = first * block_chars
+        return text[start - base:end - base]
+
+    def read(self, doc_id: str) -> str:
+        return self.slice(doc_id, 0, self.length(doc_id))
+
+    def delete(self, doc_id: str):
+        with self._lock:
+            entry = self._files.pop(doc_id, None)
+            if entry is not None:
+                entry[0].close()
+            for key in [key for key in self._blocks if key[0] == doc_id]:
+                del self._blocks[key]
+        try:
+            os.remove(self._path(doc_id))
+        except OSError:
+            pass
+
+    def close(self):
+        with self._lock:
+            for data, _, _ in self._files.values():
+                data.close()
+            self._files.clear()
+            self._blocks.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = 0
+        count = 0
+        for name in os.listdir(self.root):
+            if name.endswith(".txt.z"):
+                count += 1
+                total += os.path.getsize(os.path.join(self.root, name))
+        return {
+            "documents": count,
+            "size_bytes": total,
+            "block_chars": self.block_chars,
+            "cached_blocks": len(self._blocks)
+        }
+
+class _TextWriter:
+    # 블록이 찰 때마다 압축해 임시 파일에 쓰고 commit 시 색인을 붙여 원자적으로 교체
+    def __init__(self, store: TextStore, doc_id: str):
+        self.store = store
+        self.doc_id = doc_id
+        self.path = store._path(doc_id)
+        self.tmp_path = f"{self.path}.{uuid.uuid4().hex}.tmp"
+        self.file = open(self.tmp_path, "wb")
+        self.pending: List[str] = []
+        self.pending_chars = 0
+        self.length = 0
+        self.offsets = [0]
+        self.committed = False
+
+    def append(self, text: str):
+        self.pending.append(text)
+        self.pending_chars += len(text)
+        self.length += len(text)
+        if self.pending_chars >= self.store.block_chars:
+            self._flush(final=False)
+
+    def _flush(self, final: bool):
+        buffer = "".join(self.pending)
+        block_chars = self.store.block_chars
+        position = 0
+        while len(buffer) - position >= block_chars or (final and position < len(buffer)):
+            block = buffer[position:position + block_chars]
+            self.file.write(zlib.compress(block.encode("utf-8"), 6))
+            self.offsets.append(self.file.tell())
+            position += len(block)
+        rest = buffer[position:]
+        self.pending = [rest] if rest else []
+        self.pending_chars = len(rest)
+
+    def commit(self, complete: bool = True):
+        # complete=False: 중간에 실패했지만 이미 저장된 청크가 가리키는 앞부분은 남김 (다음 적재 때 다시 씀)
+        self._flush(final=True)
+        index = json.dumps({
+            "length": self.length,
+            "block_chars": self.store.block_chars,
+            "offsets": self.offsets,
+            "complete": complete
+        }).encode("utf-8")
+        self.file.write(index)
+        self.file.write(_TRAILER.pack(len(index), _MAGIC))
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+        self.committed = True
+
+    def discard(self):
+        if not self.file.closed:
+            self.file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+def create_text_store() -> Optional[TextStore]:
+    """CHUNK_TEXT_STORAGE=offsets(기본값)이면 공유 원문 저장소, inline이면 None"""
+    if os.getenv("CHUNK_TEXT_STORAGE", "offsets").lower() != "offsets":
+        return None
+    try:
+        return TextStore(
+            root=os.getenv("TEXT_STORE_DIR", os.path.join(os.getenv("CHROMA_DB_PATH", "./vector_db"), "texts")),
+            block_chars=int(os.getenv("TEXT_STORE_BLOCK_CHARS", "65536"))
+        )
+    except Exception as e:
+        print(f"원문 저장소 초기화 중 오류 발생: {str(e)}")
+        return None
@@ -0,0 +1,690 @@
+import os
+import re
+import json
+import uuid
+import shutil
+import threading
+from contextlib import contextmanager
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from .quantization import quantize, code_width, shortlist, exact_top_k
+from .filters import matches_where
+from .file_lock import file_lock
+
+class CollectionNotFoundError(ValueError):
+    pass
+
+class InvalidCollectionNameError(ValueError):
+    pass
+
+# Chroma와 같은 규칙: 영문/숫자로 시작하는 3~63자, 영문/숫자/./_/- 만 허용 (경로 구분자 불가)
+_COLLECTION_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{1,62}$")
+
+def validate_collection_name(name: str) -> str:
+    """컬렉션 이름을 검증해 그대로 반환 (파일 경로에 쓰이므로 디렉터리를 벗어나는 이름은 거부)"""
+    if not isinstance(name, str) or not _COLLECTION_NAME.match(name):
+        raise InvalidCollectionNameError(
+            f"잘못된 컬렉션 이름입니다: {name!r} "
+            "(영문/숫자로 시작하는 3~63자, 영문/숫자/'.'/'_'/'-'만 사용할 수 있습니다)"
+        )
+    return name
+
+def collection_file(directory: str, name: str, suffix: str) -> str:
+    """directory 아래 컬렉션별 파일 경로 (이름을 검증하고 directory를 벗어나지 않는지 확인)"""
+    root = os.path.abspath(directory)
+    path = os.path.abspath(os.path.join(root, f"{validate_collection_name(name)}{suffix}"))
+    if os.path.commonpath([path, root]) != root:
+        raise InvalidCollectionNameError(f"잘못된 컬렉션 이름입니다: {name!r}")
+    return path
+
+class VectorBackend(ABC):
+    """VectorStore가 사용하는 벡터 저장소 인터페이스
+
+    검색 결과의 distance는 Chroma 기본값과 같은 제곱 L2 거리입니다.
+    """
+
+    @abstractmethod
+    def get_or_create_collection(self, name: str, metadata: Optional[Dict[str, Any]] = None):
+        """없으면 metadata로 생성 (이미 있으면 기존 메타데이터를 그대로 둠)"""
+
+    @abstractmethod
+    def add(
+        self,
+        name: str,
+        ids: List[str],
+        embeddings: np.ndarray,
+        documents: Optional[List[str]],
+        metadatas: List[Dict[str, Any]]
+    ):
+        """같은 ID가 이미 있으면 덮어씀 (upsert). documents가 None이면 본문 없이 저장"""
+
+    @abstractmethod
+    def update_metadata(self, name: str, ids: List[str], metadatas: List[Dict[str, Any]]):
+        """임베딩/본문은 그대로 두고 지정한 청크의 메타데이터만 교체"""
+
+    @abstractmethod
+    def existing_ids(self, name: str, ids: List[str]) -> List[str]:
+        ...
+
+    @abstractmethod
+    def search(
+        self,
+        name: str,
+        query_embeddings: np.ndarray,
+        n_results: int,
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """질의별로 {'id', 'content', 'metadata', 'distance'} 목록을 거리 오름차순으로 반환
+
+        where(Chroma 문법)가 주어지면 조건에 맞는 청크만 검색합니다.
+        """
+
+    @abstractmethod
+    def get(
+        self,
+        name: str,
+        ids: Optional[List[str]] = None,
+        include_embeddings: bool = False,
+        where: Optional[Dict[str, Any]] = None,
+        include_documents: bool = True
+    ) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def delete(self, name: str, ids: List[str]):
+        """지정한 청크만 삭제 (나머지 색인은 그대로 유지)"""
+
+    @abstractmethod
+    def list_collections(self) -> List[str]:
+        ...
+
+    @abstractmethod
+    def delete_collection(self, name: str):
+        ...
+
+    @abstractmethod
+    def collection_info(self, name: str) -> Dict[str, Any]:
+        """{'name', 'count', 'metadata'}"""
+
+    def count(self, name: str) -> int:
+        return self.collection_info(name)["count"]
+
+    def close(self):
+        pass
+
+class ChromaBackend(VectorBackend):
+    def __init__(self, path: str):
+        import chromadb
+        from chromadb.config import Settings
+
+        self.client = chromadb.PersistentClient(
+            path=path,
+            settings=Settings(anonymized_telemetry=False)
+        )
+
+    def _collection(self, name: str):
+        try:
+            return self.client.get_collection(name)
+        except ValueError as e:
+            raise CollectionNotFoundError(str(e))
+
+    def get_or_create_collection(self, name: str, metadata: Optional[Dict[str, Any]] = None):
+        # 이미 있는 컬렉션에 다른 metadata를 넘기면 Chroma가 메타데이터 전체를 교체하므로
+        # (create_collection이 기록한 reduced_dim/reduction 유실) 없을 때만 metadata와 함께 생성
+        try:
+            self.client.get_collection(name)
+        except ValueError:
+            self.client.get_or_create_collection(name=name, metadata=metadata)
+
+    def add(self, name, ids, embeddings, documents, metadatas):
+        self._collection(name).upsert(
+            documents=documents,
+            embeddings=np.asarray(embeddings).tolist(),
+            metadatas=metadatas,
+            ids=ids
+        )
+
+    def update_metadata(self, name, ids, metadatas):
+        if ids:
+            self._collection(name).update(ids=ids, metadatas=metadatas)
+
+    def existing_ids(self, name, ids):
+        if not ids:
+            return []
+        return self._collection(name).get(ids=ids, include=[])["ids"]
+
+    def search(self, name, query_embeddings, n_results, where=None):
+        results = self._collection(name).query(
+            query_embeddings=np.asarray(query_embeddings).tolist(),
+            n_results=n_results,
+            where=where,
+            include=['documents', 'metadatas', 'distances']
+        )
+
+        all_hits = []
+        for q in range(len(results['ids'])):
+            hits = []
+            for i in range(len(results['ids'][q])):
+                hits.append({
+                    'id': results['ids'][q][i],
+                    'content': results['documents'][q][i],
+                    'metadata': results['metadatas'][q][i],
+                    'distance': results['distances'][q][i] if results['distances'] else 0.0
+                })
+            all_hits.append(hits)
+        return all_hits
+
+    def get(self, name, ids=None, include_embeddings=False, where=None, include_documents=True):
+        include = ['metadatas']
+        if include_documents:
+            include.append('documents')
+        if include_embeddings:
+            include.append('embeddings')
+
+        results = self._collection(name).get(ids=ids, where=where, include=include)
+        records = []
+        for i, doc_id in enumerate(results['ids']):
+            record = {
+                'id': doc_id,
+                'content': results['documents'][i] if include_documents else None,
+                'metadata': results['metadatas'][i]
+            }
+            if include_embeddings:
+                record['embedding'] = results['embeddings'][i]
+            records.append(record)
+        return records
+
+    def delete(self, name, ids):
+        if ids:
+            self._collection(name).delete(ids=ids)
+
+    def list_collections(self):
+        return [collection.name for collection in self.client.list_collections()]
+
+    def delete_collection(self, name):
+        try:
+            self.client.delete_collection(name)
+        except ValueError as e:
+            raise CollectionNotFoundError(str(e))
+
+    def collection_info(self, name):
+        collection = self._collection(name)
+        return {
+            "name": name,
+            "count": collection.count(),
+            "metadata": collection.metadata
+        }
+
+class _NumpyCollection:
+    """memmap float32 임베딩 파일 + JSON 메타데이터 사이드카로 구성된 컬렉션
+
+    meta.json은 스냅샷이고, 이후 추가된 청크의 메타데이터는 스냅샷이 가리키는 로그 파일에
+    배치마다 한 줄씩 덧붙이므로 배치마다 전체 메타데이터를 다시 쓰지 않습니다.
+    로그가 스냅샷보다 커지거나 삭제로 행을 압축하면 새 스냅샷을 씁니다.
+    호출 측(NumpyBackend)이 lock_path의 flock을 잡은 상태에서만 읽고 씁니다.
+    """
+
+    def __init__(self, path: str, lock_path: str, quantization: str = "none"):
+        self.path = path
+        self.lock_path = lock_path
+        self.quantization = quantization
+        self.meta_path = os.path.join(path, "meta.json")
+        self.embeddings_path = os.path.join(path, "embeddings.f32")
+        self.codes_path = os.path.join(path, f"embeddings.{quantization}")
+        self.lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        self.meta_stat = None
+        self.log_name: Optional[str] = None
+        self.log_offset = 0
+        self.metadata: Dict[str, Any] = {}
+        self.dimension = 0
+        self.capacity = 0
+        self.ids: List[str] = []
+        self.documents: List[Optional[str]] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self.rows: Dict[str, int] = {}
+        self.embeddings: Optional[np.memmap] = None
+        self.codes: Optional[np.memmap] = None
+        self.sq_norms = np.zeros(0, dtype=np.float32)
+
+    @property
+    def count(self) -> int:
+        return len(self.ids)
+
+    @property
+    def log_path(self) -> Optional[str]:
+        return os.path.join(self.path, self.log_name) if self.log_name else None
+
+    def load(self):
+        stat = os.stat(self.meta_path)
+        with open(self.meta_path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+
+        self.metadata = data["metadata"]
+        self.dimension = data["dimension"]
+        self.capacity = data["capacity"]
+        self.ids = data["ids"]
+        self.documents = data["documents"]
+        self.metadatas = data["metadatas"]
+        self.rows = {doc_id: row for row, doc_id in enumerate(self.ids)}
+        self.log_name = data.get("log")
+        self.log_offset = 0
+        self.meta_stat = (stat.st_ino, stat.st_mtime_ns)
+        for entry in self._read_log():
+            self._apply_entry(entry)
+        self._open_embeddings()
+
+    def reload_if_changed(self):
+        # 다른 워커 프로세스가 갱신한 경우 다시 로드 (스냅샷이 바뀌면 전체, 로그만 늘었으면 추가분만)
+        stat = os.stat(self.meta_path)
+        if (stat.st_ino, stat.st_mtime_ns) != self.meta_stat:
+            self.load()
+            return
+
+        entries = self._read_log()
+        if not entries:
+            return
+        capacity = self.capacity
+        rows = np.concatenate([self._apply_entry(entry) for entry in entries])
+        if self.capacity != capacity or self.embeddings is None:
+            self._open_embeddings()
+        else:
+            self._update_norms(rows)
+
+    def _read_log(self) -> List[Dict[str, Any]]:
+        if self.log_path is None:
+            return []
+        try:
+            with open(self.log_path, "rb") as file:
+                file.seek(self.log_offset)
+                data = file.read()
+        except FileNotFoundError:
+            return []
+        # 줄 단위로만 반영 (끝까지 쓰이지 않은 마지막 줄은 건너뜀)
+        end = data.rfind(b"\n") + 1
+        self.log_offset += end
+        return [json.loads(line) for line in data[:end].splitlines() if line.strip()]
+
+    def _apply_entry(self, entry: Dict[str, Any]) -> np.ndarray:
+        if entry.get("op") == "metadata":
+            self._apply_metadata(entry["ids"], entry["metadatas"])
+            return np.zeros(0, dtype=np.int64)
+        self.dimension = entry["dimension"]
+        self.capacity = entry["capacity"]
+        return self._apply(entry["ids"], entry["documents"], entry["metadatas"])
+
+    def _apply_metadata(self, ids: List[str], metadatas: List[Dict[str, Any]]):
+        for doc_id, metadata in zip(ids, metadatas):
+            row = self.rows.get(doc_id)
+            if row is not None:
+                self.metadatas[row] = metadata
+
+    def _apply(self, ids: List[str], documents: Optional[List[str]], metadatas: List[Dict[str, Any]]) -> np.ndarray:
+        # 새 ID는 끝에 행을 추가하고 기존 ID는 덮어씀 (로그 재생과 직접 추가가 같은 행을 배정)
+        for doc_id in ids:
+            if doc_id not in self.rows:
+                self.rows[doc_id] = len(self.ids)
+                self.ids.append(doc_id)
+                self.documents.append(None)
+                self.metadatas.append({})
+
+        # documents=None: 본문 없이 메타데이터의 원문 오프셋만 저장
+        for doc_id, document, metadata in zip(ids, documents or [None] * len(ids), metadatas):
+            row = self.rows[doc_id]
+            self.documents[row] = document
+            self.metadatas[row] = metadata
+        return np.array([self.rows[doc_id] for doc_id in ids], dtype=np.int64)
+
+    def _update_norms(self, rows: np.ndarray):
+        if len(self.sq_norms) < self.count:
+            self.sq_norms = np.concatenate(
+                [self.sq_norms, np.zeros(self.count - len(self.sq_norms), dtype=np.float32)]
+            )
+        vectors = self.embeddings[rows]
+        self.sq_norms[rows] = np.einsum("ij,ij->i", vectors, vectors)
+
+    def _open_embeddings(self):
+        if self.dimension == 0 or self.capacity == 0:
+            self.embeddings = None
+            self.codes = None
+            self.sq_norms = np.zeros(0, dtype=np.float32)
+            return
+
+        self.embeddings = np.memmap(
+            self.embeddings_path, dtype=np.float32, mode="r+", shape=(self.capacity, self.dimension)
+        )
+        current = self.embeddings[:self.count]
+        self.sq_norms = np.einsum("ij,ij->i", current, current)
+
+        if self.quantization != "none":
+            # 양자화 사본: 1차 검색은 이 작은 배열로, 재점수화만 float32 원본으로 수행
+            width = code_width(self.dimension, self.quantization)
+            dtype = np.int8 if self.quantization == "int8" else np.uint8
+            rebuild = not os.path.exists(self.codes_path)
+            with open(self.codes_path, "ab") as file:
+                file.truncate(self.capacity * width * np.dtype(dtype).itemsize)
+            self.codes = np.memmap(self.codes_path, dtype=dtype, mode="r+", shape=(self.capacity, width))
+            if rebuild and self.count:
+                self.codes[:self.count] = quantize(current, self.quantization)
+                self.codes.flush()
+
+    def _grow(self, required: int):
+        capacity = max(self.capacity, 1024)
+        while capacity < required:
+            capacity *= 2
+        if capacity == self.capacity:
+            return
+
+        if self.embeddings is not None:
+            self.embeddings.flush()
+            self.embeddings = None
+        if self.codes is not None:
+            self.codes.flush()
+            self.codes = None
+        with open(self.embeddings_path, "ab") as file:
+            file.truncate(capacity * self.dimension * 4)
+        self.capacity = capacity
+        self._open_embeddings()
+
+    def save_meta(self):
+        # 현재 상태를 새 스냅샷으로 쓰고 빈 로그로 시작 (이전 로그는 스냅샷에 반영되었으므로 삭제)
+        old_log_path = self.log_path
+        self.log_name = f"meta.{uuid.uuid4().hex}.log"
+        tmp_path = f"{self.meta_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({
+                "metadata": self.metadata,
+                "dimension": self.dimension,
+                "capacity": self.capacity,
+                "ids": self.ids,
+                "documents": self.documents,
+                "metadatas": self.metadatas,
+                "log": self.log_name
+            }, file, ensure_ascii=False)
+        os.replace(tmp_path, self.meta_path)
+        stat = os.stat(self.meta_path)
+        self.meta_stat = (stat.st_ino, stat.st_mtime_ns)
+        self.log_offset = 0
+        if old_log_path is not None and os.path.exists(old_log_path):
+            os.remove(old_log_path)
+
+    def _append_log(self, entry: Dict[str, Any]):
+        if self.log_path is None:
+            # 로그 이전 형식의 스냅샷은 한 번 다시 써서 로그를 붙임 (entry는 이미 상태에 반영됨)
+            self.save_meta()
+            return
+
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+        with open(self.log_path, "ab") as file:
+            file.write(line)
+        self.log_offset += len(line)
+        if self.log_offset > max(os.path.getsize(self.meta_path), 1 << 20):
+            self.save_meta()
+
+    def add(self, ids, embeddings, documents, metadatas):
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if self.dimension == 0:
+            self.dimension = embeddings.shape[1]
+        elif embeddings.shape[1] != self.dimension:
+            raise ValueError(f"임베딩 차원 불일치: {embeddings.shape[1]} != {self.dimension}")
+
+        new_count = len({doc_id for doc_id in ids if doc_id not in self.rows})
+        self._grow(self.count + new_count)
+
+        rows = self._apply(ids, documents, metadatas)
+        self.embeddings[rows] = embeddings
+        self.embeddings.flush()
+        if self.codes is not None:
+            self.codes[rows] = quantize(embeddings, self.quantization)
+            self.codes.flush()
+        self._update_norms(rows)
+
+        # 임베딩을 먼저 기록한 뒤 메타데이터를 로그에 추가 (다른 워커는 로그 추가분만 읽음)
+        self._append_log({
+            "dimension": self.dimension,
+            "capacity": self.capacity,
+            "ids": ids,
+            "documents": documents,
+            "metadatas": metadatas
+        })
+
+    def update_metadata(self, ids: List[str], metadatas: List[Dict[str, Any]]):
+        self._apply_metadata(ids, metadatas)
+        self._append_log({"op": "metadata", "ids": ids, "metadatas": metadatas})
+
+    def delete(self, ids: List[str]):
+        removed = {self.rows[doc_id] for doc_id in ids if doc_id in self.rows}
+        if not removed:
+            return
+
+        # 남은 행을 앞으로 당겨 압축 (행 순서는 유지)
+        keep = np.array([row for row in range(self.count) if row not in removed], dtype=np.int64)
+        if self.embeddings is not None:
+            self.embeddings[:len(keep)] = self.embeddings[keep]
+            self.embeddings.flush()
+        if self.codes is not None:
+            self.codes[:len(keep)] = self.codes[keep]
+            self.codes.flush()
+
+        self.ids = [self.ids[row] for row in keep]
+        self.documents = [self.documents[row] for row in keep]
+        self.metadatas = [self.metadatas[row] for row in keep]
+        self.rows = {doc_id: row for row, doc_id in enumerate(self.ids)}
+        self.sq_norms = self.sq_norms[keep]
+        self.save_meta()
+
+    def filter_rows(self, where: Optional[Dict[str, Any]]) -> np.ndarray:
+        if not where:
+            return np.arange(self.count)
+        return np.array(
+            [row for row, metadata in enumerate(self.metadatas) if matches_where(metadata, where)],
+            dtype=np.int64
+        )
+
+    def record(self, row: int, include_embedding: bool = False, include_document: bool = True) -> Dict[str, Any]:
+        record = {
+            'id': self.ids[row],
+            'content': self.documents[row] if include_document else None,
+            'metadata': self.metadatas[row]
+        }
+        if include_embedding:
+            record['embedding'] = np.array(self.embeddings[row]).tolist()
+        return record
+
+class NumpyBackend(VectorBackend):
+    """작은/중간 규모 컬렉션을 위한 정확(exact) 검색 백엔드
+
+    임베딩은 memmap float32 배열로 저장하고, 검색은 NumPy 행렬곱과 argpartition으로
+    top-k를 계산합니다. 컬렉션별 질의 오버헤드가 Chroma보다 훨씬 작습니다.
+    quantization이 int8/binary이면 양자화 사본으로 후보를 추린 뒤
+    float32 원본으로 재점수화합니다.
+    """
+
+    def __init__(self, path: str, quantization: str = "none", rescore_factor: int = 10):
+        self.quantization = quantization
+        self.rescore_factor = rescore_factor
+        self.root = os.path.join(path, "numpy")
+        os.makedirs(self.root, exist_ok=True)
+        self._collections: Dict[str, _NumpyCollection] = {}
+        self._lock = threading.Lock()
+
+    def _collection_path(self, name: str) -> str:
+        return collection_file(self.root, name, "")
+
+    def _entry(self, name: str) -> _NumpyCollection:
+        path = self._collection_path(name)
+        with self._lock:
+            collection = self._collections.get(name)
+            if collection is None:
+                # 잠금 파일은 컬렉션 디렉터리 밖에 두어 삭제 후 다시 만들어도 같은 파일을 잠금
+                collection = _NumpyCollection(path, os.path.join(self.root, f".{name}.lock"), self.quantization)
+                self._collections[name] = collection
+            return collection
+
+    @contextmanager
+    def _collection(self, name: str, exclusive: bool = False):
+        # 스레드 잠금과 워커 프로세스 간 flock(읽기는 공유, 쓰기는 배타)을 잡고 최신 상태로 맞춘 컬렉션
+        collection = self._entry(name)
+        with collection.lock, file_lock(collection.lock_path, shared=not exclusive):
+            if not os.path.exists(collection.meta_path):
+                collection.reset()
+                raise CollectionNotFoundError(f"Collection {name} does not exist.")
+            collection.reload_if_changed()
+            yield collection
+
+    def get_or_create_collection(self, name, metadata=None):
+        collection = self._entry(name)
+        with collection.lock, file_lock(collection.lock_path):
+            if os.path.exists(collection.meta_path):
+                return
+            os.makedirs(collection.path, exist_ok=True)
+            collection.reset()
+            collection.metadata = metadata or {}
+            collection.save_meta()
+
+    def add(self, name, ids, embeddings, documents, metadatas):
+        if not ids:
+            return
+        with self._collection(name, exclusive=True) as collection:
+            collection.add(ids, embeddings, documents, metadatas)
+
+    def update_metadata(self, name, ids, metadatas):
+        if not ids:
+            return
+        with self._collection(name, exclusive=True) as collection:
+            collection.update_metadata(ids, metadatas)
+
+    def existing_ids(self, name, ids):
+        with self._collection(name) as collection:
+            return [doc_id for doc_id in ids if doc_id in collection.rows]
+
+    def search(self, name, query_embeddings, n_results, where=None):
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+
+        with self._collection(name) as collection:
+            rows = collection.filter_rows(where)
+            count = len(rows)
+            if count == 0:
+                return [[] for _ in range(len(queries))]
+
+            k = min(n_results, count)
+
+            if collection.codes is not None:
+                return [
+                    self._search_quantized(collection, rows, query, k)
+                    for query in queries
+                ]
+
+            # 필터가 있으면 조건에 맞는 행만 스캔
+            if where:
+                matrix = collection.embeddings[rows]
+                sq_norms = collection.sq_norms[rows]
+            else:
+                matrix = collection.embeddings[:count]
+                sq_norms = collection.sq_norms
+
+            # 제곱 L2 거리 = |x|^2 + |q|^2 - 2 x·q
+            distances = (
+                sq_norms[:, None]
+                + np.einsum("ij,ij->i", queries, queries)[None, :]
+                - 2.0 * (matrix @ queries.T)
+            )
+
+            all_hits = []
+            for q in range(len(queries)):
+                column = distances[:, q]
+                if k < count:
+                    top = np.argpartition(column, k - 1)[:k]
+                else:
+                    top = np.arange(count)
+                top = top[np.argsort(column[top])]
+
+                hits = []
+                for position in top:
+                    record = collection.record(int(rows[position]))
+                    record['distance'] = max(float(column[position]), 0.0)
+                    hits.append(record)
+                all_hits.append(hits)
+            return all_hits
+
+    def _search_quantized(
+        self,
+        collection: _NumpyCollection,
+        rows: np.ndarray,
+        query: np.ndarray,
+        k: int
+    ) -> List[Dict[str, Any]]:
+        if len(rows) == collection.count:
+            codes = collection.codes[:collection.count]
+        else:
+            codes = collection.codes[rows]
+        candidates = rows[shortlist(codes, query, collection.quantization, k * self.rescore_factor)]
+        top_rows, distances = exact_top_k(collection.embeddings, candidates, query, k)
+
+        hits = []
+        for row, distance in zip(top_rows, distances):
+            record = collection.record(int(row))
+            record['distance'] = float(distance)
+            hits.append(record)
+        return hits
+
+    def get(self, name, ids=None, include_embeddings=False, where=None, include_documents=True):
+        with self._collection(name) as collection:
+            if ids is None:
+                rows = range(collection.count)
+            else:
+                rows = [collection.rows[doc_id] for doc_id in ids if doc_id in collection.rows]
+            return [
+                collection.record(row, include_embeddings, include_documents)
+                for row in rows
+                if matches_where(collection.metadatas[row], where)
+            ]
+
+    def delete(self, name, ids):
+        if not ids:
+            return
+        with self._collection(name, exclusive=True) as collection:
+            collection.delete(ids)
+
+    def list_collections(self):
+        return sorted(
+            name for name in os.listdir(self.root)
+            if os.path.exists(os.path.join(self.root, name, "meta.json"))
+        )
+
+    def delete_collection(self, name):
+        collection = self._entry(name)
+        with collection.lock, file_lock(collection.lock_path):
+            if not os.path.exists(collection.meta_path):
+                raise CollectionNotFoundError(f"Collection {name} does not exist.")
+            collection.reset()
+            shutil.rmtree(collection.path)
+
+    def collection_info(self, name):
+        with self._collection(name) as collection:
+            return {
+                "name": name,
+                "count": collection.count,
+                "metadata": collection.metadata
+            }
+
+def create_vector_backend(path: str, backend_name: Optional[str] = None) -> VectorBackend:
+    backend_name = (backend_name or os.getenv("VECTOR_BACKEND", "chroma")).lower()
+    if backend_name == "chroma":
+        # 양자화 검색은 numpy 백엔드에만 구현되어 있으므로 Chroma에서는 설정이 적용되지 않음
+        quantization = os.getenv("VECTOR_QUANTIZATION", "none").lower()
+        if quantization != "none":
+            print(f"경고: VECTOR_QUANTIZATION={quantization}은 numpy 백엔드에서만 지원되어 chroma 백엔드에서는 무시됩니다")
+        return ChromaBackend(path)
+    if backend_name == "numpy":
+        return NumpyBackend(
+            path,
+            quantization=os.getenv("VECTOR_QUANTIZATION", "none").lower(),
+            rescore_factor=int(os.getenv("QUANTIZATION_RESCORE_FACTOR", "10"))
+        )
+    raise ValueError(f"지원하지 않는 벡터 백엔드: {backend_name}")
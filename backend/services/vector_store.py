@@ -1,122 +1,1101 @@
 import os
-import uuid
-from typing import List, Dict, Any
-import chromadb
-from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple, Union, Iterable
 import numpy as np
 
 from .document_processor import DocumentChunk
+from .cache import LRUCache, CollectionVersions
+from .embedding_cache import EmbeddingCache
+from .embedding_engines import load_embedding_engine, reference_engine, check_parity
+from .lexical_index import BM25Index, reciprocal_rank_fusion
+from .near_duplicates import MinHashLSHIndex
+from .vector_backends import create_vector_backend, collection_file
+from .dimension_reduction import Projection, InsufficientSamplesError
+from .filters import build_where
+from .executors import get_ingest_executor, get_query_executor, run_in_executor
+from .text_store import create_text_store
+from .file_lock import file_lock
+from .quantization import QUANTIZATION_MODES, quantize, code_width, shortlist, exact_top_k, recall_at_k
 
 class VectorStore:
     def __init__(self):
         self.chroma_db_path = os.getenv("CHROMA_DB_PATH", "./vector_db")
         os.makedirs(self.chroma_db_path, exist_ok=True)
         
-        self.client = chromadb.PersistentClient(
-            path=self.chroma_db_path,
-            settings=Settings(anonymized_telemetry=False)
+        # VECTOR_BACKEND=chroma|numpy
+        self.backend = create_vector_backend(self.chroma_db_path)
+        
+        # EMBEDDING_ENGINE=torch|onnx
+        self.embedding_model_name = 'all-MiniLM-L6-v2'
+        self.embedding_engine = load_embedding_engine(self.embedding_model_name)
+        
+        # 임베딩 배치 설정
+        self.embedding_batch_size = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+        # 스트리밍 적재 시 한 번에 임베딩/저장하는 청크 수
+        self.stream_batch_size = int(os.getenv("INGEST_STREAM_BATCH_SIZE", "256"))
+        
+        # 질의 임베딩 / 검색 결과 캐시
+        cache_size = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+        cache_ttl = float(os.getenv("QUERY_CACHE_TTL", "600"))
+        self.query_embedding_cache = LRUCache(max_size=cache_size, ttl_seconds=cache_ttl)
+        self.search_result_cache = LRUCache(max_size=cache_size, ttl_seconds=cache_ttl)
+        # 버전은 디스크에 저장되어 재시작/워커 간에도 유지 (영속 답변 캐시의 무효화 기준)
+        self.collection_versions = CollectionVersions(os.path.join(self.chroma_db_path, "versions"))
+        
+        # 컬렉션/재시작 간 공유되는 디스크 임베딩 캐시
+        self.embedding_cache = None
+        if os.getenv("EMBEDDING_CACHE_ENABLED", "True").lower() == "true":
+            try:
+                self.embedding_cache = EmbeddingCache(
+                    cache_dir=os.getenv("EMBEDDING_CACHE_DIR", os.path.join(self.chroma_db_path, "embedding_cache")),
+                    model_name=self.embedding_engine.name,
+                    dimension=self.embedding_engine.dimension,
+                    max_entries=int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+                )
+            except Exception as e:
+                print(f"임베딩 캐시 초기화 중 오류 발생: {str(e)}")
+        
+        # 하이브리드(BM25 + 벡터) 검색 설정
+        self.hybrid_search = os.getenv("HYBRID_SEARCH", "True").lower() == "true"
+        self.hybrid_candidate_multiplier = int(os.getenv("HYBRID_CANDIDATE_MULTIPLIER", "4"))
+        self.rrf_k = int(os.getenv("RRF_K", "60"))
+        self.lexical_index_path = os.path.join(self.chroma_db_path, "lexical")
+        self._lexical_indexes: Dict[str, BM25Index] = {}
+        self._lexical_mtimes: Dict[str, Optional[Tuple[int, int]]] = {}
+        # 아직 디스크에 저장하지 않은 이 워커의 추가분 (다른 워커가 먼저 저장하면 그 색인에 다시 반영)
+        self._lexical_pending: Dict[str, BM25Index] = {}
+        self._lexical_lock = threading.Lock()
+        
+        # 적재 시 MinHash/LSH 근사 중복 청크 제거 (반복되는 머리글/바닥글/템플릿 문단)
+        self.near_duplicate_filter = os.getenv("NEAR_DUPLICATE_FILTER", "False").lower() == "true"
+        self.near_duplicate_threshold = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.85"))
+        self.near_duplicate_num_perm = int(os.getenv("NEAR_DUPLICATE_NUM_PERM", "128"))
+        self.near_duplicate_shingle_size = int(os.getenv("NEAR_DUPLICATE_SHINGLE_SIZE", "5"))
+        self.near_duplicate_path = os.path.join(self.chroma_db_path, "near_duplicates")
+        self._near_duplicate_indexes: Dict[str, MinHashLSHIndex] = {}
+        self._near_duplicate_mtimes: Dict[str, Optional[Tuple[int, int]]] = {}
+        # 아직 디스크에 저장하지 않은 이 워커의 추가분 (다른 워커가 먼저 저장하면 그 색인에 다시 반영)
+        self._near_duplicate_pending: Dict[str, MinHashLSHIndex] = {}
+        self._near_duplicate_lock = threading.RLock()
+        
+        # 컬렉션별 차원 축소 (PCA / 앞부분 절단)
+        self.projection_path = os.path.join(self.chroma_db_path, "projections")
+        self.pca_sample_size = int(os.getenv("PCA_SAMPLE_SIZE", "5000"))
+        self._projections: Dict[str, Projection] = {}
+        self._projection_lock = threading.Lock()
+        
+        # 문서 원문 사이드카: 청크 본문 대신 (document_id, text_start, text_end)만 저장하고 조회 시 잘라 읽음
+        self.text_store = create_text_store()
+        
+        # 여러 컬렉션 동시 검색용 스레드 풀
+        self._search_pool = ThreadPoolExecutor(
+            max_workers=int(os.getenv("SEARCH_FANOUT_WORKERS", "8")),
+            thread_name_prefix="search-fanout"
         )
+    
+    @staticmethod
+    def _normalize_query(query: str) -> str:
+        # all-MiniLM-L6-v2 토크나이저는 소문자화하므로 임베딩 결과가 동일함
+        return " ".join(query.split()).lower()
+    
+    def _encode_query(self, query: str) -> List[float]:
+        normalized = self._normalize_query(query)
+        embedding = self.query_embedding_cache.get(normalized)
+        if embedding is None:
+            embedding = self._encode_with_model([normalized])[0].tolist()
+            self.query_embedding_cache.set(normalized, embedding)
+        return embedding
+    
+    async def encode_query_async(self, query: str) -> List[float]:
+        return await run_in_executor(get_query_executor(), self._encode_query, query)
+    
+    def _encode_queries(self, queries: List[str]) -> np.ndarray:
+        normalized = [self._normalize_query(query) for query in queries]
+        embeddings = [self.query_embedding_cache.get(text) for text in normalized]
         
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        missing = list(dict.fromkeys(text for text, embedding in zip(normalized, embeddings) if embedding is None))
+        if missing:
+            encoded = dict(zip(missing, self._encode_with_model(missing).tolist()))
+            for text, embedding in encoded.items():
+                self.query_embedding_cache.set(text, embedding)
+            embeddings = [
+                embedding if embedding is not None else encoded[text]
+                for text, embedding in zip(normalized, embeddings)
+            ]
+        
+        return np.asarray(embeddings, dtype=np.float32)
+    
+    def _encode_texts(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.embedding_engine.dimension), dtype=np.float32)
+        
+        if self.embedding_cache is None:
+            return self._encode_with_model(texts)
+        
+        embeddings, missing = self.embedding_cache.lookup(texts)
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            encoded = self._encode_with_model(missing_texts)
+            embeddings[missing] = encoded
+            self.embedding_cache.store(missing_texts, encoded)
+        return embeddings
+    
+    def _encode_with_model(self, texts: List[str]) -> np.ndarray:
+        return self.embedding_engine.encode(texts, batch_size=self.embedding_batch_size)
+    
+    def close(self):
+        self.embedding_engine.close()
+        if self.embedding_cache is not None:
+            self.embedding_cache.close()
+            self.embedding_cache = None
+        self._search_pool.shutdown(wait=False)
+        self.backend.close()
+        if self.text_store is not None:
+            self.text_store.close()
     
-    def add_documents(self, chunks: List[DocumentChunk], collection_name: str = "default") -> int:
+    def warmup(self, n_texts: int = 8):
+        # 첫 요청이 콜드 패스 비용을 내지 않도록 인코딩과 질의를 미리 실행
+        sample = ["워밍업 문장입니다. warmup sentence."] * n_texts
+        embeddings = self._encode_with_model(sample)[:1]
+        self._encode_with_model(sample[:1])
+        
+        for collection_name in self.list_collections():
+            if self.backend.count(collection_name) > 0:
+                self.backend.search(collection_name, self._project(collection_name, embeddings), n_results=1)
+    
+    def _lexical_index_file(self, collection_name: str) -> str:
+        return collection_file(self.lexical_index_path, collection_name, ".json.gz")
+    
+    @staticmethod
+    def _file_state(path: str) -> Optional[Tuple[int, int]]:
+        # os.replace로 교체될 때마다 바뀌는 (inode, mtime_ns), 파일이 없으면 None
         try:
-            collection = self.client.get_or_create_collection(
-                name=collection_name,
-                metadata={"description": f"Document collection: {collection_name}"}
-            )
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns)
+    
+    def _get_lexical_index(self, collection_name: str) -> BM25Index:
+        path = self._lexical_index_file(collection_name)
+        with self._lexical_lock:
+            # 다른 워커가 갱신한 경우 파일에서 다시 로드
+            state = self._file_state(path)
+            index = self._lexical_indexes.get(collection_name)
+            if index is not None and self._lexical_mtimes.get(collection_name) == state:
+                return index
             
-            documents = []
-            embeddings = []
-            metadatas = []
-            ids = []
+            if state is not None:
+                index = BM25Index.load(path)
+            else:
+                # 색인 이전에 생성된 컬렉션은 저장된 문서로 재구축
+                index = BM25Index()
+                if self.backend.count(collection_name) > 0:
+                    existing = self._hydrate(self.backend.get(collection_name))
+                    index.add([record['id'] for record in existing], [record['content'] for record in existing])
+                    with file_lock(f"{path}.lock"):
+                        if self._file_state(path) is None:
+                            index.save(path)
+                        else:
+                            index = BM25Index.load(path)
+                    state = self._file_state(path)
             
-            for chunk in chunks:
-                doc_id = str(uuid.uuid4())
-                embedding = self.embedding_model.encode(chunk.content).tolist()
-                
-                documents.append(chunk.content)
-                embeddings.append(embedding)
-                metadatas.append(chunk.metadata)
-                ids.append(doc_id)
+            pending = self._lexical_pending.get(collection_name)
+            if pending is not None:
+                index.merge(pending)
+            self._lexical_indexes[collection_name] = index
+            self._lexical_mtimes[collection_name] = state
+            return index
+    
+    def _hydrate(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # 본문 없이 오프셋만 저장된 청크는 원문 저장소에서 잘라 채움
+        # (스트리밍 적재 중이라 원문 기록이 아직 끝나지 않은 청크는 빈 본문)
+        for record in records:
+            if record.get('content'):
+                continue
+            metadata = record.get('metadata') or {}
+            if self.text_store is None or metadata.get('text_end') is None:
+                continue
+            try:
+                record['content'] = self.text_store.slice(
+                    metadata['document_id'], metadata['text_start'], metadata['text_end']
+                )
+            except KeyError:
+                record['content'] = ""
+            except ValueError as e:
+                print(f"청크 원문 조회 중 오류 발생: {str(e)}")
+                record['content'] = ""
+        return records
+    
+    def _release_texts(self, document_ids: Iterable[str]):
+        # 어느 컬렉션에서도 더 이상 참조하지 않는 문서 원문 삭제
+        if self.text_store is None:
+            return
+        collection_names = self.list_collections()
+        for document_id in set(document_ids):
+            if not document_id:
+                continue
+            if not any(
+                self.backend.get(name, where={"document_id": document_id}, include_documents=False)
+                for name in collection_names
+            ):
+                self.text_store.delete(document_id)
+    
+    def _update_lexical_index(self, collection_name: str, ids: List[str], documents: List[str], save: bool = True):
+        index = self._get_lexical_index(collection_name)
+        with self._lexical_lock:
+            index.add(ids, documents)
+            self._lexical_pending.setdefault(collection_name, BM25Index()).add(ids, documents)
+        if save:
+            self._save_lexical_index(collection_name)
+    
+    def _save_lexical_index(self, collection_name: str, removed_ids: Optional[List[str]] = None):
+        # 읽기-수정-쓰기 전체를 워커 간 파일 잠금으로 묶어 다른 워커의 갱신을 덮어쓰지 않음
+        # (잠금 순서는 항상 _lexical_lock -> 파일 잠금)
+        path = self._lexical_index_file(collection_name)
+        with self._lexical_lock, file_lock(f"{path}.lock"):
+            pending = self._lexical_pending.pop(collection_name, None)
+            try:
+                index = self._lexical_indexes.get(collection_name)
+                state = self._file_state(path)
+                if index is None or self._lexical_mtimes.get(collection_name) != state:
+                    # 마지막으로 읽은 뒤 다른 워커가 저장했으면 디스크의 색인에 이 워커의 추가분만 다시 반영
+                    index = BM25Index.load(path) if state is not None else BM25Index()
+                    if pending is not None:
+                        index.merge(pending)
+                if removed_ids:
+                    index.remove(removed_ids)
+                index.save(path)
+            except Exception:
+                if pending is not None:
+                    self._lexical_pending.setdefault(collection_name, BM25Index()).merge(pending)
+                raise
+            self._lexical_indexes[collection_name] = index
+            self._lexical_mtimes[collection_name] = self._file_state(path)
+    
+    def _remove_from_lexical_index(self, collection_name: str, ids: List[str]):
+        # 색인 파일이 없으면 먼저 재구축한 뒤 삭제
+        self._get_lexical_index(collection_name)
+        with self._lexical_lock:
+            pending = self._lexical_pending.get(collection_name)
+            if pending is not None:
+                pending.remove(ids)
+        self._save_lexical_index(collection_name, removed_ids=ids)
+    
+    def _near_duplicate_index_file(self, collection_name: str) -> str:
+        return collection_file(self.near_duplicate_path, collection_name, ".npz")
+    
+    def _new_near_duplicate_index(self) -> MinHashLSHIndex:
+        return MinHashLSHIndex(
+            threshold=self.near_duplicate_threshold,
+            num_perm=self.near_duplicate_num_perm,
+            shingle_size=self.near_duplicate_shingle_size
+        )
+    
+    def _get_near_duplicate_index(self, collection_name: str) -> MinHashLSHIndex:
+        path = self._near_duplicate_index_file(collection_name)
+        with self._near_duplicate_lock:
+            # 다른 워커가 갱신한 경우 파일에서 다시 로드
+            state = self._file_state(path)
+            index = self._near_duplicate_indexes.get(collection_name)
+            if index is not None and self._near_duplicate_mtimes.get(collection_name) == state:
+                return index
             
-            collection.add(
-                documents=documents,
-                embeddings=embeddings,
-                metadatas=metadatas,
-                ids=ids
-            )
+            index = self._load_near_duplicate_index(path) if state is not None else None
+            if index is None:
+                # 색인 이전에 생성된 컬렉션(또는 서명 설정 변경)은 저장된 문서로 재구축
+                index = self._new_near_duplicate_index()
+                if collection_name in self.list_collections() and self.backend.count(collection_name) > 0:
+                    for record in self._hydrate(self.backend.get(collection_name)):
+                        index.add(record['id'], index.signature(record['content'] or ""))
+                    with file_lock(f"{path}.lock"):
+                        if self._file_state(path) != state:
+                            # 그 사이 다른 워커가 먼저 저장했으면 그 색인을 사용
+                            index = self._load_near_duplicate_index(path) or index
+                        else:
+                            index.save(path)
+                    state = self._file_state(path)
+            
+            pending = self._near_duplicate_pending.get(collection_name)
+            if pending is not None:
+                index.merge(pending)
+            self._near_duplicate_indexes[collection_name] = index
+            self._near_duplicate_mtimes[collection_name] = state
+            return index
+    
+    def _load_near_duplicate_index(self, path: str) -> Optional[MinHashLSHIndex]:
+        return MinHashLSHIndex.load(
+            path,
+            threshold=self.near_duplicate_threshold,
+            num_perm=self.near_duplicate_num_perm,
+            shingle_size=self.near_duplicate_shingle_size
+        )
+    
+    def _filter_near_duplicates(self, collection_name: str, new_chunks: Dict[str, DocumentChunk]) -> List[str]:
+        # 기존 청크 또는 배치 안의 앞선 청크와 근사 중복인 청크를 new_chunks에서 제거하고
+        # 남은 청크는 색인에 추가한 뒤 그 ID 목록을 반환 (저장에 실패하면 discard_batch로 되돌림)
+        kept = []
+        with self._near_duplicate_lock:
+            index = self._get_near_duplicate_index(collection_name)
+            pending = self._near_duplicate_pending.setdefault(collection_name, self._new_near_duplicate_index())
+            for chunk_id in list(new_chunks.keys()):
+                signature = index.signature(new_chunks[chunk_id].content)
+                if index.query(signature) is not None:
+                    del new_chunks[chunk_id]
+                    continue
+                index.add(chunk_id, signature)
+                pending.add(chunk_id, signature)
+                kept.append(chunk_id)
+        return kept
+    
+    def _save_near_duplicate_index(self, collection_name: str, removed_ids: Optional[List[str]] = None):
+        # 읽기-수정-쓰기 전체를 워커 간 파일 잠금으로 묶어 다른 워커의 갱신을 덮어쓰지 않음
+        # (잠금 순서는 항상 _near_duplicate_lock -> 파일 잠금)
+        path = self._near_duplicate_index_file(collection_name)
+        with self._near_duplicate_lock, file_lock(f"{path}.lock"):
+            index = self._near_duplicate_indexes.get(collection_name)
+            if index is None:
+                return
+            pending = self._near_duplicate_pending.pop(collection_name, None)
+            try:
+                state = self._file_state(path)
+                if self._near_duplicate_mtimes.get(collection_name) != state:
+                    # 마지막으로 읽은 뒤 다른 워커가 저장했으면 디스크의 색인에 이 워커의 추가분만 다시 반영
+                    index = (self._load_near_duplicate_index(path) if state is not None else None) or self._new_near_duplicate_index()
+                    if pending is not None:
+                        index.merge(pending)
+                if removed_ids:
+                    index.remove(removed_ids)
+                index.save(path)
+            except Exception:
+                if pending is not None:
+                    self._near_duplicate_pending.setdefault(collection_name, self._new_near_duplicate_index()).merge(pending)
+                raise
+            self._near_duplicate_indexes[collection_name] = index
+            self._near_duplicate_mtimes[collection_name] = self._file_state(path)
+    
+    def _remove_from_near_duplicate_index(self, collection_name: str, ids: List[str], save: bool = True):
+        if not self.near_duplicate_filter or not ids:
+            return
+        with self._near_duplicate_lock:
+            self._get_near_duplicate_index(collection_name).remove(ids)
+            pending = self._near_duplicate_pending.get(collection_name)
+            if pending is not None:
+                pending.remove(ids)
+        if save:
+            self._save_near_duplicate_index(collection_name, removed_ids=ids)
+    
+    def _drop_near_duplicate_index(self, collection_name: str):
+        path = self._near_duplicate_index_file(collection_name)
+        with self._near_duplicate_lock:
+            self._near_duplicate_indexes.pop(collection_name, None)
+            self._near_duplicate_mtimes.pop(collection_name, None)
+            self._near_duplicate_pending.pop(collection_name, None)
+            if os.path.exists(path):
+                os.remove(path)
+    
+    def _drop_lexical_index(self, collection_name: str):
+        path = self._lexical_index_file(collection_name)
+        with self._lexical_lock:
+            self._lexical_indexes.pop(collection_name, None)
+            self._lexical_mtimes.pop(collection_name, None)
+            self._lexical_pending.pop(collection_name, None)
+            if os.path.exists(path):
+                os.remove(path)
+    
+    def _projection_file(self, collection_name: str) -> str:
+        return collection_file(self.projection_path, collection_name, ".npz")
+    
+    def _get_projection(self, collection_name: str) -> Optional[Projection]:
+        with self._projection_lock:
+            projection = self._projections.get(collection_name)
+            if projection is None and os.path.exists(self._projection_file(collection_name)):
+                projection = Projection.load(self._projection_file(collection_name))
+                self._projections[collection_name] = projection
+            return projection
+    
+    def _project(self, collection_name: str, embeddings: np.ndarray) -> np.ndarray:
+        projection = self._get_projection(collection_name)
+        if projection is None:
+            return np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+        return projection.transform(embeddings)
+    
+    def _projection_samples_needed(self, collection_name: str) -> int:
+        """PCA 축소 컬렉션의 투영이 아직 학습되지 않았으면 학습에 필요한 최소 청크 수, 아니면 0"""
+        if self._get_projection(collection_name) is not None:
+            return 0
+        try:
+            metadata = self.backend.collection_info(collection_name)["metadata"] or {}
+        except Exception:
+            return 0
+        if metadata.get("reduction") != "pca" or not metadata.get("reduced_dim"):
+            return 0
+        return int(metadata["reduced_dim"])
+    
+    def _fit_projection_if_needed(self, collection_name: str, embeddings: np.ndarray):
+        # PCA 축소 컬렉션은 첫 적재 시 해당 컬렉션 청크 샘플로 투영을 학습
+        reduced_dim = self._projection_samples_needed(collection_name)
+        if not reduced_dim:
+            return
+        
+        # 여러 워커가 동시에 첫 적재를 해도 한 번만 학습하도록 파일 잠금 안에서 다시 확인
+        path = self._projection_file(collection_name)
+        with file_lock(f"{path}.lock"):
+            if os.path.exists(path):
+                projection = Projection.load(path)
+            else:
+                projection = Projection.fit_pca(embeddings, int(reduced_dim), max_samples=self.pca_sample_size)
+                projection.save(path)
+        with self._projection_lock:
+            self._projections[collection_name] = projection
+    
+    def _drop_projection(self, collection_name: str):
+        path = self._projection_file(collection_name)
+        with self._projection_lock:
+            self._projections.pop(collection_name, None)
+            if os.path.exists(path):
+                os.remove(path)
+    
+    async def create_collection_async(self, collection_name: str, **kwargs) -> Dict[str, Any]:
+        return await run_in_executor(get_ingest_executor(), self.create_collection, collection_name, **kwargs)
+    
+    def create_collection(
+        self,
+        collection_name: str,
+        reduced_dim: Optional[int] = None,
+        reduction: str = "pca"
+    ) -> Dict[str, Any]:
+        metadata = {"description": f"Document collection: {collection_name}"}
+        full_dim = self.embedding_engine.dimension
+        
+        if reduced_dim:
+            if collection_name in self.list_collections():
+                raise ValueError(f"이미 존재하는 컬렉션의 차원은 변경할 수 없습니다: {collection_name}")
             
-            return len(documents)
+            # 설정 검증 (truncate는 학습이 필요 없으므로 바로 저장, PCA는 첫 적재 시 학습)
+            projection = Projection(reduction, full_dim, reduced_dim)
+            metadata["reduced_dim"] = reduced_dim
+            metadata["reduction"] = reduction
             
+            self._drop_projection(collection_name)
+            if reduction == "truncate":
+                projection.save(self._projection_file(collection_name))
+        
+        self.backend.get_or_create_collection(collection_name, metadata=metadata)
+        return self.get_collection_info(collection_name)
+    
+    @staticmethod
+    def _chunk_id(collection_name: str, filename: str, content: str) -> str:
+        digest = hashlib.sha256()
+        for part in (collection_name, filename, content):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+    
+    @staticmethod
+    def _new_add_stats() -> Dict[str, Any]:
+        return {
+            "stored_count": 0,
+            "embedded_count": 0,
+            "skipped_count": 0,
+            "near_duplicate_count": 0,
+            "embedding_seconds": 0.0,
+            "chunks_per_sec": 0.0
+        }
+    
+    @staticmethod
+    def _finish_add_stats(stats: Dict[str, Any], elapsed: float) -> Dict[str, Any]:
+        stats["embedding_seconds"] = round(elapsed, 3)
+        stats["chunks_per_sec"] = round(stats["embedded_count"] / elapsed, 1) if elapsed > 0 else 0.0
+        return stats
+    
+    def add_documents(self, chunks: List[DocumentChunk], collection_name: str = "default") -> Dict[str, Any]:
+        stats = self._new_add_stats()
+        elapsed = 0.0
+        try:
+            elapsed = self._add_batch(chunks, collection_name, stats)
+        except InsufficientSamplesError:
+            # 요청 오류이므로 호출자가 4xx로 응답할 수 있도록 그대로 전달
+            raise
         except Exception as e:
             print(f"문서 추가 중 오류 발생: {str(e)}")
-            return 0
+            stats["error"] = str(e)
+        return self._finish_add_stats(stats, elapsed)
+    
+    def add_document_stream(
+        self,
+        chunks: Iterable[DocumentChunk],
+        collection_name: str = "default",
+        batch_size: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """청크를 생성되는 대로 배치 단위로 임베딩/저장 (대용량 문서를 메모리 제한 내에서 적재)"""
+        batch_size = batch_size or self.stream_batch_size
+        stats = self._new_add_stats()
+        stats["chunks_count"] = 0
+        elapsed = 0.0
+        batch: List[DocumentChunk] = []
+        # PCA 투영을 학습하기 전이면 첫 배치를 학습에 충분한 크기까지 모아서 처리
+        first_batch_size = self._projection_samples_needed(collection_name)
+        try:
+            for chunk in chunks:
+                batch.append(chunk)
+                stats["chunks_count"] += 1
+                if len(batch) >= max(batch_size, first_batch_size):
+                    elapsed += self._add_batch(batch, collection_name, stats, save_indexes=False)
+                    batch = []
+                    first_batch_size = 0
+            if batch:
+                elapsed += self._add_batch(batch, collection_name, stats, save_indexes=False)
+        except InsufficientSamplesError:
+            raise
+        except Exception as e:
+            print(f"문서 추가 중 오류 발생: {str(e)}")
+            stats["error"] = str(e)
+        finally:
+            # BM25/근사 중복 색인은 배치마다 저장하지 않고 마지막에 한 번만 기록
+            if stats["stored_count"]:
+                self.flush_indexes(collection_name)
+        return self._finish_add_stats(stats, elapsed)
+    
+    def _add_batch(
+        self,
+        chunks: List[DocumentChunk],
+        collection_name: str,
+        stats: Dict[str, Any],
+        save_indexes: bool = True
+    ) -> float:
+        # 배치를 저장하고 stats를 누적, 임베딩에 걸린 시간을 반환
+        prepared = self.prepare_batch(chunks, collection_name)
+        try:
+            self.store_batch(prepared, save_indexes=save_indexes)
+        except Exception:
+            self.discard_batch(prepared)
+            raise
+        stats["skipped_count"] += prepared["skipped_count"]
+        stats["near_duplicate_count"] += prepared["near_duplicate_count"]
+        stats["stored_count"] += len(prepared["ids"])
+        stats["embedded_count"] += len(prepared["ids"])
+        return prepared["embedding_seconds"]
+    
+    def prepare_batch(self, chunks: List[DocumentChunk], collection_name: str = "default") -> Dict[str, Any]:
+        """저장 전 단계: 중복/근사 중복 제거, 임베딩, 차원 축소 (대량 적재 파이프라인에서 저장과 겹쳐 실행)"""
+        self.backend.get_or_create_collection(
+            collection_name,
+            metadata={"description": f"Document collection: {collection_name}"}
+        )
+        
+        # 내용 기반 ID: 동일한 청크는 항상 같은 ID를 가지므로 재업로드 시 건너뜀
+        new_chunks = {}
+        for chunk in chunks:
+            chunk_id = self._chunk_id(collection_name, chunk.metadata.get("filename", ""), chunk.content)
+            new_chunks.setdefault(chunk_id, chunk)
+        
+        for chunk_id in self.backend.existing_ids(collection_name, list(new_chunks.keys())):
+            new_chunks.pop(chunk_id, None)
+        exact_skipped = len(chunks) - len(new_chunks)
+        
+        indexed_ids = []
+        if self.near_duplicate_filter and new_chunks:
+            indexed_ids = self._filter_near_duplicates(collection_name, new_chunks)
+        
+        # 근사 중복 색인에 먼저 넣은 서명은 이후 단계(임베딩, PCA 학습/투영)가 실패하면 되돌림
+        # (남겨 두면 같은 파일을 다시 올릴 때 모두 근사 중복으로 건너뜀)
+        try:
+            ids = list(new_chunks.keys())
+            documents = [chunk.content for chunk in new_chunks.values()]
+            metadatas = [chunk.metadata for chunk in new_chunks.values()]
+            # 모든 청크가 원문 저장소의 구간을 가리키면 백엔드에는 본문 없이 메타데이터의 오프셋만 저장
+            # (스트리밍 적재 중인 문서는 원문 기록이 끝나기 전이어도 오프셋만 저장)
+            stored_documents = documents
+            if self.text_store is not None and documents and self._offsets_available(new_chunks.values()):
+                stored_documents = None
+            
+            start = time.perf_counter()
+            embeddings = self._encode_texts(documents)
+            elapsed = time.perf_counter() - start
+            
+            if documents:
+                self._fit_projection_if_needed(collection_name, embeddings)
+                embeddings = self._project(collection_name, embeddings)
+        except Exception:
+            self._remove_from_near_duplicate_index(collection_name, indexed_ids, save=False)
+            raise
+        
+        return {
+            "collection_name": collection_name,
+            "ids": ids,
+            "embeddings": embeddings,
+            "documents": documents,
+            "stored_documents": stored_documents,
+            "metadatas": metadatas,
+            "skipped_count": exact_skipped,
+            "near_duplicate_count": len(chunks) - exact_skipped - len(ids),
+            "embedding_seconds": elapsed
+        }
+    
+    def _offsets_available(self, chunks: Iterable[DocumentChunk]) -> bool:
+        available: Dict[str, bool] = {}
+        for chunk in chunks:
+            document_id = chunk.metadata.get("document_id")
+            if document_id is None or chunk.metadata.get("text_end") is None:
+                return False
+            if chunk.text_pending:
+                continue
+            if document_id not in available:
+                available[document_id] = self.text_store.has(document_id)
+            if not available[document_id]:
+                return False
+        return True
+    
+    def store_batch(self, prepared: Dict[str, Any], save_indexes: bool = True):
+        collection_name = prepared["collection_name"]
+        if not prepared["ids"]:
+            return
+        self.backend.add(
+            collection_name,
+            prepared["ids"],
+            prepared["embeddings"],
+            prepared.get("stored_documents", prepared["documents"]),
+            prepared["metadatas"]
+        )
+        if self.hybrid_search:
+            self._update_lexical_index(collection_name, prepared["ids"], prepared["documents"], save=save_indexes)
+        if self.near_duplicate_filter and save_indexes:
+            self._save_near_duplicate_index(collection_name)
+        self.collection_versions.bump(collection_name)
+    
+    def discard_batch(self, prepared: Dict[str, Any]):
+        # 저장하지 못한 배치의 서명을 근사 중복 색인에서 제거 (같은 내용을 다시 적재할 수 있도록)
+        self._remove_from_near_duplicate_index(prepared["collection_name"], prepared["ids"], save=False)
+    
+    def flush_indexes(self, collection_name: str):
+        # save_indexes=False로 저장한 배치들의 BM25/근사 중복 색인을 디스크에 기록
+        if self.hybrid_search:
+            self._save_lexical_index(collection_name)
+        if self.near_duplicate_filter:
+            self._save_near_duplicate_index(collection_name)
+    
+    async def add_documents_async(self, chunks: List[DocumentChunk], collection_name: str = "default") -> Dict[str, Any]:
+        return await run_in_executor(get_ingest_executor(), self.add_documents, chunks, collection_name)
+    
+    async def add_document_stream_async(self, chunks: Iterable[DocumentChunk], collection_name: str = "default", **kwargs) -> Dict[str, Any]:
+        return await run_in_executor(get_ingest_executor(), self.add_document_stream, chunks, collection_name, **kwargs)
+    
+    async def search_similar_documents_async(self, query: str, collection_name: str = "default", **kwargs) -> List[Dict[str, Any]]:
+        return await run_in_executor(get_query_executor(), self.search_similar_documents, query, collection_name, **kwargs)
+    
+    async def search_collections_async(self, query: str, collection_names: Union[str, List[str]] = "all", **kwargs):
+        return await run_in_executor(get_query_executor(), self.search_collections, query, collection_names, **kwargs)
     
     def search_similar_documents(
         self, 
         query: str, 
         collection_name: str = "default", 
-        n_results: int = 5
+        n_results: int = 5,
+        query_embedding: Optional[List[float]] = None,
+        filters: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
         try:
-            collection = self.client.get_collection(collection_name)
+            # 필터는 저장소의 where 절로 전달되어 해당 부분집합만 검색
+            where = build_where(filters)
+            cache_key = self._search_cache_key(collection_name, query, n_results, where)
+            cached = self.search_result_cache.get(cache_key)
+            if cached is not None:
+                return [dict(doc) for doc in cached]
             
-            query_embedding = self.embedding_model.encode(query).tolist()
-            
-            results = collection.query(
-                query_embeddings=[query_embedding],
-                n_results=n_results,
-                include=['documents', 'metadatas', 'distances']
-            )
+            if query_embedding is None:
+                query_embedding = self._encode_query(query)
+            query_embedding = self._project(collection_name, query_embedding)[0].tolist()
             
-            similar_docs = []
-            if results['documents'] and len(results['documents'][0]) > 0:
-                for i in range(len(results['documents'][0])):
-                    similar_docs.append({
-                        'content': results['documents'][0][i],
-                        'metadata': results['metadatas'][0][i],
-                        'similarity': 1 - results['distances'][0][i] if results['distances'] else 1.0
-                    })
+            n_candidates = self._n_candidates(n_results)
+            hits = self.backend.search(collection_name, np.asarray([query_embedding]), n_candidates, where=where)[0]
             
+            similar_docs = self._rank_hits(query, query_embedding, collection_name, hits, n_results, where)
+            self.search_result_cache.set(cache_key, [dict(doc) for doc in similar_docs])
             return similar_docs
             
         except Exception as e:
             print(f"문서 검색 중 오류 발생: {str(e)}")
             return []
     
+    def search_batch(
+        self,
+        queries: List[str],
+        collection_name: str = "default",
+        n_results: int = 5,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        # 캐시에 없는 질의를 한 번의 encode 배치와 한 번의 다중 임베딩 질의로 처리
+        where = build_where(filters)
+        results: List[Optional[List[Dict[str, Any]]]] = [None] * len(queries)
+        
+        pending = []
+        for i, query in enumerate(queries):
+            cached = self.search_result_cache.get(self._search_cache_key(collection_name, query, n_results, where))
+            if cached is not None:
+                results[i] = [dict(doc) for doc in cached]
+            else:
+                pending.append(i)
+        
+        if pending:
+            try:
+                query_embeddings = self._encode_queries([queries[i] for i in pending])
+                query_embeddings = self._project(collection_name, query_embeddings)
+                all_hits = self.backend.search(
+                    collection_name, query_embeddings, self._n_candidates(n_results), where=where
+                )
+                
+                for i, query_embedding, hits in zip(pending, query_embeddings, all_hits):
+                    similar_docs = self._rank_hits(
+                        queries[i], query_embedding.tolist(), collection_name, hits, n_results, where
+                    )
+                    self.search_result_cache.set(
+                        self._search_cache_key(collection_name, queries[i], n_results, where),
+                        [dict(doc) for doc in similar_docs]
+                    )
+                    results[i] = similar_docs
+            except Exception as e:
+                print(f"배치 문서 검색 중 오류 발생: {str(e)}")
+        
+        return [docs if docs is not None else [] for docs in results]
+    
+    async def search_batch_async(self, queries: List[str], collection_name: str = "default", **kwargs) -> List[List[Dict[str, Any]]]:
+        return await run_in_executor(get_query_executor(), self.search_batch, queries, collection_name, **kwargs)
+    
+    def _search_cache_key(self, collection_name: str, query: str, n_results: int, where: Optional[Dict[str, Any]]) -> tuple:
+        return (
+            collection_name, self.collection_versions.get(collection_name), self._normalize_query(query),
+            n_results, self.hybrid_search, json.dumps(where, sort_keys=True, default=str)
+        )
+    
+    def _n_candidates(self, n_results: int) -> int:
+        return n_results * self.hybrid_candidate_multiplier if self.hybrid_search else n_results
+    
+    def _rank_hits(
+        self,
+        query: str,
+        query_embedding: List[float],
+        collection_name: str,
+        hits: List[Dict[str, Any]],
+        n_results: int,
+        where: Optional[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        candidates = {}
+        for hit in hits:
+            candidates[hit['id']] = {
+                'id': hit['id'],
+                'content': hit['content'],
+                'metadata': hit['metadata'],
+                'similarity': 1 - hit['distance']
+            }
+        
+        if not self.hybrid_search:
+            return self._readable(list(candidates.values())[:n_results])
+        
+        return self._readable(self._fuse_with_lexical(
+            query, query_embedding, collection_name, candidates, self._n_candidates(n_results), n_results, where
+        ))
+    
+    def _readable(self, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # 본문을 채울 수 없는 청크(원문 기록 중인 문서)는 검색 결과에서 제외
+        return [doc for doc in self._hydrate(docs) if doc['content']]
+    
+    def _fuse_with_lexical(
+        self,
+        query: str,
+        query_embedding: List[float],
+        collection_name: str,
+        candidates: Dict[str, Dict[str, Any]],
+        n_candidates: int,
+        n_results: int,
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        lexical_ranking = [
+            doc_id for doc_id, _ in
+            self._get_lexical_index(collection_name).search(query, n_candidates)
+        ]
+        if where and lexical_ranking:
+            allowed = {record['id'] for record in self.backend.get(collection_name, ids=lexical_ranking, where=where)}
+            lexical_ranking = [doc_id for doc_id in lexical_ranking if doc_id in allowed]
+        fused = reciprocal_rank_fusion([list(candidates.keys()), lexical_ranking], k=self.rrf_k)[:n_results]
+        
+        # 어휘 검색에서만 찾은 청크는 문서와 임베딩을 가져와 유사도를 계산
+        missing_ids = [doc_id for doc_id, _ in fused if doc_id not in candidates]
+        if missing_ids:
+            query_vector = np.asarray(query_embedding, dtype=np.float32)
+            for record in self.backend.get(collection_name, ids=missing_ids, include_embeddings=True):
+                vector = np.asarray(record['embedding'], dtype=np.float32)
+                # 벡터 백엔드와 동일한 기준(제곱 L2)으로 유사도 계산
+                distance = float(np.sum((query_vector - vector) ** 2))
+                candidates[record['id']] = {
+                    'id': record['id'],
+                    'content': record['content'],
+                    'metadata': record['metadata'],
+                    'similarity': 1 - distance
+                }
+        
+        similar_docs = []
+        for doc_id, score in fused:
+            if doc_id in candidates:
+                doc = candidates[doc_id]
+                doc['rrf_score'] = round(score, 6)
+                similar_docs.append(doc)
+        return similar_docs
+    
+    def search_collections(
+        self,
+        query: str,
+        collection_names: Union[str, List[str]] = "all",
+        n_results: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[List[float]] = None
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
+        # 질의는 한 번만 인코딩하고 컬렉션들을 동시에 검색한 뒤 유사도 기준 전역 top-k로 병합
+        collection_names = self.resolve_collections(collection_names)
+        if not collection_names:
+            return [], {}
+        
+        if query_embedding is None:
+            query_embedding = self._encode_query(query)
+        
+        def search_one(collection_name: str):
+            start = time.perf_counter()
+            docs = self.search_similar_documents(
+                query, collection_name, n_results, query_embedding=query_embedding, filters=filters
+            )
+            return docs, (time.perf_counter() - start) * 1000
+        
+        futures = {name: self._search_pool.submit(search_one, name) for name in collection_names}
+        
+        merged = []
+        latencies = {}
+        for collection_name, future in futures.items():
+            docs, latency_ms = future.result()
+            latencies[collection_name] = round(latency_ms, 2)
+            for doc in docs:
+                doc['collection'] = collection_name
+                merged.append(doc)
+        
+        merged.sort(key=lambda doc: doc.get('similarity', 0.0), reverse=True)
+        return merged[:n_results], latencies
+    
+    def resolve_collections(self, collection_names: Union[str, List[str]]) -> List[str]:
+        # "all"(또는 목록에 "all" 포함)이면 전체 컬렉션, 중복은 제거
+        if collection_names == "all" or (isinstance(collection_names, list) and "all" in collection_names):
+            return self.list_collections()
+        if isinstance(collection_names, str):
+            return [collection_names]
+        return list(dict.fromkeys(collection_names))
+    
     def list_collections(self) -> List[str]:
         try:
-            collections = self.client.list_collections()
-            return [collection.name for collection in collections]
+            return self.backend.list_collections()
         except Exception as e:
             print(f"컬렉션 목록 조회 중 오류 발생: {str(e)}")
             return []
     
+    async def list_collections_async(self) -> List[str]:
+        return await run_in_executor(get_query_executor(), self.list_collections)
+    
     def delete_collection(self, collection_name: str) -> bool:
         try:
-            self.client.delete_collection(collection_name)
+            document_ids = [
+                (record['metadata'] or {}).get('document_id')
+                for record in self.backend.get(collection_name, include_documents=False)
+            ]
+            self.backend.delete_collection(collection_name)
+            self._release_texts(document_ids)
+            self._drop_lexical_index(collection_name)
+            self._drop_near_duplicate_index(collection_name)
+            self._drop_projection(collection_name)
+            self.collection_versions.bump(collection_name)
             return True
         except Exception as e:
             print(f"컬렉션 삭제 중 오류 발생: {str(e)}")
             return False
     
+    async def delete_collection_async(self, collection_name: str) -> bool:
+        return await run_in_executor(get_ingest_executor(), self.delete_collection, collection_name)
+    
+    async def list_documents_async(self, collection_name: str) -> List[Dict[str, Any]]:
+        return await run_in_executor(get_query_executor(), self.list_documents, collection_name)
+    
+    def list_documents(self, collection_name: str) -> List[Dict[str, Any]]:
+        """컬렉션에 저장된 문서(파일) 단위 목록"""
+        documents: Dict[str, Dict[str, Any]] = {}
+        for record in self.backend.get(collection_name, include_documents=False):
+            metadata = record['metadata'] or {}
+            filename = metadata.get('filename', 'Unknown')
+            entry = documents.setdefault(filename, {
+                "filename": filename,
+                "document_id": metadata.get('document_id'),
+                "file_type": metadata.get('file_type'),
+                "upload_date": metadata.get('upload_date'),
+                "chunk_count": 0
+            })
+            entry["chunk_count"] += 1
+            if (metadata.get('upload_date') or 0) > (entry["upload_date"] or 0):
+                entry["upload_date"] = metadata['upload_date']
+                entry["document_id"] = metadata.get('document_id')
+        return sorted(documents.values(), key=lambda entry: entry["filename"])
+    
+    def _delete_chunks(self, collection_name: str, ids: List[str]):
+        if not ids:
+            return
+        self.backend.delete(collection_name, ids)
+        if self.hybrid_search:
+            self._remove_from_lexical_index(collection_name, ids)
+        self._remove_from_near_duplicate_index(collection_name, ids)
+        self.collection_versions.bump(collection_name)
+    
+    def delete_document(
+        self,
+        collection_name: str,
+        filename: Optional[str] = None,
+        document_id: Optional[str] = None
+    ) -> int:
+        """파일명 또는 문서 ID에 해당하는 청크만 삭제하고 삭제된 청크 수를 반환"""
+        if filename is None and document_id is None:
+            raise ValueError("filename 또는 document_id 중 하나는 지정해야 합니다")
+        
+        where = build_where({"filename": filename, "document_id": document_id})
+        records = self.backend.get(collection_name, where=where, include_documents=False)
+        self._delete_chunks(collection_name, [record['id'] for record in records])
+        self._release_texts((record['metadata'] or {}).get('document_id') for record in records)
+        return len(records)
+    
+    async def delete_document_async(self, collection_name: str, **kwargs) -> int:
+        return await run_in_executor(get_ingest_executor(), self.delete_document, collection_name, **kwargs)
+    
+    def replace_document(self, chunks: List[DocumentChunk], collection_name: str = "default") -> Dict[str, Any]:
+        """같은 파일명의 기존 문서를 교체
+        
+        내용이 바뀌지 않은 청크는 ID가 같으므로 다시 임베딩하지 않고 메타데이터만
+        새 버전(문서 ID, 업로드 시각, 원문 오프셋)으로 바꾸며, 새 버전에 없는 청크는 삭제합니다.
+        """
+        if not chunks:
+            return {"deleted_count": 0, **self.add_documents(chunks, collection_name)}
+        
+        filename = chunks[0].metadata.get("filename", "")
+        new_chunks = {self._chunk_id(collection_name, filename, chunk.content): chunk for chunk in chunks}
+        
+        existing = []
+        if collection_name in self.list_collections():
+            where = build_where({"filename": filename})
+            existing = self.backend.get(collection_name, where=where, include_documents=False)
+        
+        stale_ids = [record['id'] for record in existing if record['id'] not in new_chunks]
+        kept_ids = [record['id'] for record in existing if record['id'] in new_chunks]
+        # 새 버전 청크가 곧 삭제될 이전 버전의 근사 중복으로 제거되지 않도록 먼저 색인에서 뺌
+        self._remove_from_near_duplicate_index(collection_name, stale_ids)
+        stats = self.add_documents(chunks, collection_name)
+        if "error" in stats:
+            # 새 버전을 저장하지 못했으면 이전 버전을 지우지 않음
+            raise ValueError(stats["error"])
+        if kept_ids:
+            # 한 파일이 두 문서 ID로 나뉘지 않도록 유지한 청크도 새 버전을 가리키게 함
+            self.backend.update_metadata(
+                collection_name, kept_ids, [new_chunks[chunk_id].metadata for chunk_id in kept_ids]
+            )
+            self.collection_versions.bump(collection_name)
+        self._delete_chunks(collection_name, stale_ids)
+        self._release_texts((record['metadata'] or {}).get('document_id') for record in existing)
+        return {"deleted_count": len(stale_ids), **stats}
+    
+    async def replace_document_async(self, chunks: List[DocumentChunk], collection_name: str = "default") -> Dict[str, Any]:
+        return await run_in_executor(get_ingest_executor(), self.replace_document, chunks, collection_name)
+    
+    async def get_collection_info_async(self, collection_name: str) -> Dict[str, Any]:
+        return await run_in_executor(get_query_executor(), self.get_collection_info, collection_name)
+    
     def get_collection_info(self, collection_name: str) -> Dict[str, Any]:
         try:
-            collection = self.client.get_collection(collection_name)
-            count = collection.count()
+            info = self.backend.collection_info(collection_name)
             
-            return {
-                "name": collection_name,
-                "count": count,
-                "metadata": collection.metadata
-            }
+            full_dim = self.embedding_engine.dimension
+            dimension = self.get_embedding_dimension(collection_name)
+            info["embedding_dimension"] = dimension
+            info["full_embedding_dimension"] = full_dim
+            info["memory_saved_bytes"] = info["count"] * (full_dim - dimension) * 4
+            return info
         except Exception as e:
             print(f"컬렉션 정보 조회 중 오류 발생: {str(e)}")
             return {}
     
-    def get_embedding_dimension(self) -> int:
-        sample_text = "테스트 텍스트"
-        embedding = self.embedding_model.encode(sample_text)
-        return len(embedding)
\ No newline at end of file
+    async def evaluate_quantization_async(self, collection_name: str, **kwargs) -> Dict[str, Any]:
+        return await run_in_executor(get_query_executor(), self.evaluate_quantization, collection_name, **kwargs)
+    
+    def evaluate_quantization(
+        self,
+        collection_name: str,
+        k: int = 10,
+        n_queries: int = 100,
+        rescore_factor: int = 10
+    ) -> Dict[str, Any]:
+        # 저장된 임베딩 일부를 질의로 사용해 양자화 검색의 recall@k를 정확 검색과 비교
+        records = self.backend.get(collection_name, include_embeddings=True)
+        if not records:
+            return {}
+        
+        matrix = np.asarray([record['embedding'] for record in records], dtype=np.float32)
+        rng = np.random.default_rng(0)
+        query_rows = rng.choice(len(matrix), size=min(n_queries, len(matrix)), replace=False)
+        all_rows = np.arange(len(matrix))
+        exact = [exact_top_k(matrix, all_rows, matrix[row], k)[0].tolist() for row in query_rows]
+        
+        report = {
+            "collection": collection_name,
+            "count": len(matrix),
+            "k": k,
+            "n_queries": len(query_rows),
+            "rescore_factor": rescore_factor,
+            # 현재 검색에 실제로 적용 중인 방식 (numpy 백엔드가 아니면 항상 none)
+            "active_quantization": getattr(self.backend, "quantization", "none"),
+            "modes": {}
+        }
+        for mode in QUANTIZATION_MODES:
+            if mode == "none":
+                continue
+            codes = quantize(matrix, mode)
+            approx = []
+            for row in query_rows:
+                candidates = shortlist(codes, matrix[row], mode, k * rescore_factor)
+                approx.append(exact_top_k(matrix, candidates, matrix[row], k)[0].tolist())
+            report["modes"][mode] = {
+                "recall_at_k": round(recall_at_k(exact, approx), 4),
+                "bytes_per_vector": code_width(matrix.shape[1], mode),
+                "float32_bytes_per_vector": matrix.shape[1] * 4
+            }
+        return report
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        return {
+            "query_embedding": self.query_embedding_cache.stats(),
+            "search_results": self.search_result_cache.stats(),
+            "embedding_disk_cache": self.embedding_cache.stats() if self.embedding_cache else None,
+            "text_store": self.text_store.stats() if self.text_store else None
+        }
+    
+    def get_embedding_dimension(self, collection_name: Optional[str] = None) -> int:
+        if collection_name is not None:
+            projection = self._get_projection(collection_name)
+            if projection is not None:
+                return projection.output_dim
+            
+            # PCA 학습 전이라도 설정된 축소 차원을 보고
+            metadata = self.backend.collection_info(collection_name)["metadata"] or {}
+            if metadata.get("reduced_dim"):
+                return int(metadata["reduced_dim"])
+        
+        return self.embedding_engine.dimension
+    
+    async def check_embedding_parity_async(self, texts: Optional[List[str]] = None) -> Dict[str, Any]:
+        return await run_in_executor(get_query_executor(), self.check_embedding_parity, texts)
+    
+    def check_embedding_parity(self, texts: Optional[List[str]] = None) -> Dict[str, Any]:
+        """현재 임베딩 엔진을 PyTorch 기준 임베딩과 비교 (일치도와 속도)"""
+        with reference_engine(self.embedding_model_name) as reference:
+            return check_parity(reference, self.embedding_engine, texts, batch_size=self.embedding_batch_size)
\ No newline at end of file
@@ -0,0 +1,71 @@
+import os
+import sys
+import hashlib
+import random
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import vector_store as vector_store_module
+from services.document_processor import DocumentChunk
+
+_WORDS = [
+    "apple", "banana", "cherry", "delta", "echo", "foxtrot", "golf", "hotel",
+    "india", "juliet", "kilo", "lima", "mike", "november", "oscar", "papa"
+]
+
+class FakeEngine:
+    """모델 없이 텍스트 해시로 결정적인 단위 벡터를 만드는 테스트용 임베딩 엔진"""
+
+    name = "fake"
+    dimension = 32
+
+    def encode(self, texts, batch_size=64):
+        vectors = []
+        for text in texts:
+            seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+            vector = np.random.default_rng(seed).normal(size=self.dimension).astype(np.float32)
+            vectors.append(vector / np.linalg.norm(vector))
+        return np.stack(vectors) if vectors else np.zeros((0, self.dimension), dtype=np.float32)
+
+    def before_fork(self):
+        pass
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def make_store(tmp_path, monkeypatch):
+    """tmp_path 아래에 저장하는 VectorStore 생성 함수 (환경변수는 키워드 인자로 덮어씀)"""
+    monkeypatch.setattr(vector_store_module, "load_embedding_engine", lambda *args, **kwargs: FakeEngine())
+
+    def factory(**env):
+        settings = {
+            "CHROMA_DB_PATH": str(tmp_path / "vector_db"),
+            "VECTOR_BACKEND": "numpy",
+            "CHUNK_TEXT_STORAGE": "inline",
+            "EMBEDDING_CACHE_ENABLED": "False",
+            **env
+        }
+        for key, value in settings.items():
+            monkeypatch.setenv(key, value)
+        return vector_store_module.VectorStore()
+
+    return factory
+
+@pytest.fixture
+def make_chunks():
+    """서로 근사 중복이 아닌 청크 n개를 만드는 함수"""
+    def factory(filename, n, seed=0):
+        rng = random.Random(f"{filename}-{seed}")
+        return [
+            DocumentChunk(
+                content=" ".join(rng.choice(_WORDS) + str(rng.randint(0, 999)) for _ in range(40)),
+                metadata={"filename": filename, "document_id": filename, "chunk_index": i}
+            )
+            for i in range(n)
+        ]
+
+    return factory
@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+from services.dimension_reduction import InsufficientSamplesError
+from services.vector_backends import ChromaBackend
+
+class FakeChromaCollection:
+    def __init__(self, name, metadata):
+        self.name = name
+        self.metadata = metadata
+        self.records = {}
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        documents = documents or [None] * len(ids)
+        for doc_id, embedding, document, metadata in zip(ids, embeddings, documents, metadatas):
+            self.records[doc_id] = (embedding, document, metadata)
+
+    def get(self, ids=None, where=None, include=()):
+        ids = [doc_id for doc_id in (ids if ids is not None else self.records) if doc_id in self.records]
+        return {
+            "ids": ids,
+            "embeddings": [self.records[doc_id][0] for doc_id in ids],
+            "documents": [self.records[doc_id][1] for doc_id in ids],
+            "metadatas": [self.records[doc_id][2] for doc_id in ids]
+        }
+
+    def count(self):
+        return len(self.records)
+
+class FakeChromaClient:
+    """Chroma 0.4처럼 기존 컬렉션에 metadata를 넘기면 메타데이터 전체를 교체하는 클라이언트"""
+
+    def __init__(self):
+        self.collections = {}
+
+    def get_collection(self, name):
+        if name not in self.collections:
+            raise ValueError(f"Collection {name} does not exist.")
+        return self.collections[name]
+
+    def get_or_create_collection(self, name, metadata=None):
+        if name not in self.collections:
+            self.collections[name] = FakeChromaCollection(name, metadata)
+        elif metadata is not None:
+            self.collections[name].metadata = metadata
+        return self.collections[name]
+
+    def list_collections(self):
+        return list(self.collections.values())
+
+def use_chroma(store, client):
+    backend = ChromaBackend.__new__(ChromaBackend)
+    backend.client = client
+    store.backend = backend
+    return store
+
+def stored_dimensions(store, collection_name):
+    return {len(record["embedding"]) for record in store.backend.get(collection_name, include_embeddings=True)}
+
+def test_chroma_keeps_pca_metadata_across_uploads(make_store, make_chunks):
+    client = FakeChromaClient()
+    store = use_chroma(make_store(HYBRID_SEARCH="False"), client)
+    store.create_collection("reduced", reduced_dim=8)
+
+    store.add_documents(make_chunks("a.txt", 10), "reduced")
+    metadata = store.backend.collection_info("reduced")["metadata"]
+    assert metadata["reduced_dim"] == 8
+    assert metadata["reduction"] == "pca"
+
+    # 재시작한 워커도 메타데이터로 축소 컬렉션임을 알고 저장된 투영을 사용
+    restarted = use_chroma(make_store(HYBRID_SEARCH="False"), client)
+    restarted.add_documents(make_chunks("b.txt", 3), "reduced")
+    assert stored_dimensions(restarted, "reduced") == {8}
+    assert restarted.get_embedding_dimension("reduced") == 8
+
+def test_chroma_backend_keeps_pca_metadata(make_store, make_chunks):
+    pytest.importorskip("chromadb")
+    store = make_store(VECTOR_BACKEND="chroma", HYBRID_SEARCH="False")
+    store.create_collection("reduced", reduced_dim=8)
+    store.add_documents(make_chunks("a.txt", 10), "reduced")
+    store.add_documents(make_chunks("b.txt", 3), "reduced")
+
+    assert store.backend.collection_info("reduced")["metadata"]["reduced_dim"] == 8
+    assert stored_dimensions(store, "reduced") == {8}
+
+def test_streamed_upload_holds_first_batch_for_pca(make_store, make_chunks):
+    store = make_store(HYBRID_SEARCH="False")
+    store.create_collection("reduced", reduced_dim=8)
+
+    stats = store.add_document_stream(iter(make_chunks("a.txt", 20)), "reduced", batch_size=5)
+    assert "error" not in stats
+    assert stats["stored_count"] == 20
+    assert stored_dimensions(store, "reduced") == {8}
+
+def test_too_few_chunks_for_pca_is_rejected(make_store, make_chunks):
+    store = make_store(HYBRID_SEARCH="False", NEAR_DUPLICATE_FILTER="True")
+    store.create_collection("reduced", reduced_dim=8)
+
+    with pytest.raises(InsufficientSamplesError):
+        store.add_documents(make_chunks("a.txt", 3), "reduced")
+    with pytest.raises(InsufficientSamplesError):
+        store.add_document_stream(iter(make_chunks("a.txt", 3)), "reduced", batch_size=2)
+
+    # 거절된 청크는 근사 중복 색인에 남지 않으므로 충분한 청크와 함께 다시 올릴 수 있음
+    stats = store.add_documents(make_chunks("a.txt", 10), "reduced")
+    assert stats["stored_count"] == 10
+    assert np.allclose(np.linalg.norm(store.backend.get("reduced", include_embeddings=True)[0]["embedding"]), 1.0, atol=1e-4)
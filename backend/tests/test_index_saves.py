@@ -0,0 +1,94 @@
+import os
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from services.cache import SemanticAnswerCache
+from services.lexical_index import BM25Index
+from services.near_duplicates import MinHashLSHIndex
+
+WORKERS = 4
+BATCHES = 3
+CHUNKS_PER_BATCH = 4
+
+pytestmark = pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(), reason="fork로 워커 프로세스를 흉내냄"
+)
+
+def run_workers(target, *args):
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=target, args=(worker, *args)) for worker in range(WORKERS)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=120)
+    assert [process.exitcode for process in processes] == [0] * WORKERS
+
+def leftover_temp_files(directory):
+    return [name for name in os.listdir(directory) if ".tmp" in name]
+
+def test_concurrent_index_saves_keep_every_worker(make_store, make_chunks):
+    store = make_store(NEAR_DUPLICATE_FILTER="True")
+    store.create_collection("shared")
+
+    def ingest(worker, make_store, make_chunks):
+        # 워커마다 독립된 VectorStore가 같은 BM25/근사 중복 색인 파일에 배치마다 저장
+        worker_store = make_store(NEAR_DUPLICATE_FILTER="True")
+        for batch in range(BATCHES):
+            stats = worker_store.add_documents(make_chunks(f"w{worker}.txt", CHUNKS_PER_BATCH, seed=batch), "shared")
+            if stats["stored_count"] != CHUNKS_PER_BATCH:
+                os._exit(1)
+        os._exit(0)
+
+    run_workers(ingest, make_store, make_chunks)
+
+    expected = WORKERS * BATCHES * CHUNKS_PER_BATCH
+    lexical_path = store._lexical_index_file("shared")
+    near_duplicate_path = store._near_duplicate_index_file("shared")
+    assert len(BM25Index.load(lexical_path)) == expected
+    assert len(store._load_near_duplicate_index(near_duplicate_path)) == expected
+    assert store.backend.count("shared") == expected
+    assert leftover_temp_files(os.path.dirname(lexical_path)) == []
+    assert leftover_temp_files(os.path.dirname(near_duplicate_path)) == []
+
+    # 다른 워커가 저장한 색인에서도 삭제가 반영됨
+    deleted = store.delete_document("shared", filename="w0.txt")
+    assert deleted == BATCHES * CHUNKS_PER_BATCH
+    remaining = expected - deleted
+    assert len(BM25Index.load(lexical_path)) == remaining
+    assert len(store._load_near_duplicate_index(near_duplicate_path)) == remaining
+
+def test_concurrent_answer_cache_saves_keep_every_worker(tmp_path):
+    path = str(tmp_path / "answer_cache.npz")
+
+    def answer(worker, path):
+        cache = SemanticAnswerCache(path=path)
+        for i in range(10):
+            embedding = np.random.default_rng(worker * 100 + i).normal(size=8)
+            cache.set("scope", embedding, {"answer": f"{worker}-{i}"})
+            cache.save()
+        os._exit(0)
+
+    run_workers(answer, path)
+
+    assert SemanticAnswerCache(path=path).stats()["size"] == WORKERS * 10
+    assert leftover_temp_files(str(tmp_path)) == []
+
+def test_merge_adds_only_missing_entries():
+    lexical = BM25Index()
+    lexical.add(["a"], ["alpha beta"])
+    other = BM25Index()
+    other.add(["a", "b"], ["alpha beta", "gamma delta"])
+    lexical.merge(other)
+    assert len(lexical) == 2
+    assert lexical.total_length == other.total_length
+    assert lexical.search("gamma")[0][0] == "b"
+
+    near_duplicates = MinHashLSHIndex(threshold=0.8, num_perm=64)
+    near_duplicates.add("a", near_duplicates.signature("the same header text repeated on every page"))
+    other = MinHashLSHIndex(threshold=0.8, num_perm=64)
+    other.add("b", other.signature("a completely different paragraph about something else"))
+    near_duplicates.merge(other)
+    assert len(near_duplicates) == 2
+    assert near_duplicates.query(other.signatures["b"])[0] == "b"
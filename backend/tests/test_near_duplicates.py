@@ -0,0 +1,80 @@
+from services.bulk_ingest import ingest_path
+from services.document_processor import DocumentProcessor
+
+def near_duplicate_ids(store, collection_name):
+    return set(store._get_near_duplicate_index(collection_name).signatures)
+
+def test_repeated_chunks_are_skipped(make_store, make_chunks):
+    store = make_store(NEAR_DUPLICATE_FILTER="True")
+    chunks = make_chunks("a.txt", 5)
+    store.add_documents(chunks, "docs")
+
+    copies = make_chunks("a.txt", 5)
+    for chunk in copies:
+        chunk.metadata["filename"] = "copy.txt"
+    stats = store.add_documents(copies, "docs")
+    assert stats["near_duplicate_count"] == 5
+    assert stats["stored_count"] == 0
+
+def test_failed_embedding_rolls_back_signatures(make_store, make_chunks, monkeypatch):
+    store = make_store(NEAR_DUPLICATE_FILTER="True")
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("projection failed")
+
+    project = store._project
+    monkeypatch.setattr(store, "_project", fail)
+    stats = store.add_documents(make_chunks("a.txt", 5), "docs")
+    assert "error" in stats
+    assert near_duplicate_ids(store, "docs") == set()
+
+    monkeypatch.setattr(store, "_project", project)
+    stats = store.add_documents(make_chunks("a.txt", 5), "docs")
+    assert stats["stored_count"] == 5
+    assert stats["near_duplicate_count"] == 0
+
+def test_failed_store_rolls_back_signatures(make_store, make_chunks, monkeypatch):
+    store = make_store(NEAR_DUPLICATE_FILTER="True")
+    store.add_documents(make_chunks("a.txt", 2), "docs")
+    before = near_duplicate_ids(store, "docs")
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    add = store.backend.add
+    monkeypatch.setattr(store.backend, "add", fail)
+    stats = store.add_documents(make_chunks("b.txt", 4), "docs")
+    assert "error" in stats
+    assert near_duplicate_ids(store, "docs") == before
+
+    monkeypatch.setattr(store.backend, "add", add)
+    assert store.add_documents(make_chunks("b.txt", 4), "docs")["stored_count"] == 4
+
+def test_bulk_ingest_rolls_back_failed_batch(make_store, make_chunks, monkeypatch, tmp_path):
+    store = make_store(NEAR_DUPLICATE_FILTER="True")
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.txt").write_text("\n\n".join(chunk.content for chunk in make_chunks("a.txt", 6)), encoding="utf-8")
+    processor = DocumentProcessor()
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("projection failed")
+
+    project = store._project
+    monkeypatch.setattr(store, "_project", fail)
+    report = ingest_path(str(docs), processor, store, "docs")
+    assert report["files_failed"]
+    assert near_duplicate_ids(store, "docs") == set()
+
+    monkeypatch.setattr(store, "_project", project)
+    report = ingest_path(str(docs), processor, store, "docs")
+    assert not report["files_failed"]
+    assert store.backend.count("docs") > 0
+
+def test_discard_batch_forgets_prepared_ids(make_store, make_chunks):
+    store = make_store(NEAR_DUPLICATE_FILTER="True")
+    prepared = store.prepare_batch(make_chunks("a.txt", 3), "docs")
+    assert near_duplicate_ids(store, "docs") == set(prepared["ids"])
+
+    store.discard_batch(prepared)
+    assert near_duplicate_ids(store, "docs") == set()
@@ -27,6 +27,22 @@ def chat_with_rag(question, collection_name):
     response = requests.post(f"{API_BASE_URL}/chat", json=data)
     return response.json()
 
+def stream_chat(question, collection_name):
+    # /chat/stream의 SSE 이벤트를 (이벤트 이름, 데이터) 순서대로 생성
+    data = {
+        "question": question,
+        "collection_name": collection_name
+    }
+    with requests.post(f"{API_BASE_URL}/chat/stream", json=data, stream=True) as response:
+        response.raise_for_status()
+        response.encoding = "utf-8"
+        event = None
+        for line in response.iter_lines(decode_unicode=True):
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                yield event, json.loads(line[len("data: "):])
+
 def get_collections():
     try:
         response = requests.get(f"{API_BASE_URL}/collections")
@@ -119,30 +135,43 @@ with col2:
     )
     
     if question and st.button("🔍 질문하기", type="primary"):
-        with st.spinner("답변을 생성하고 있습니다..."):
-            try:
-                result = chat_with_rag(question, target_collection)
-                
-                st.markdown("### 📝 답변")
-                st.write(result["answer"])
-                
-                col_conf, col_sources = st.columns([1, 1])
-                
-                with col_conf:
-                    confidence = result.get("confidence", 0.0)
-                    st.metric("신뢰도", f"{confidence:.2%}")
-                
-                with col_sources:
-                    sources = result.get("sources", [])
+        try:
+            st.markdown("### 📝 답변")
+            answer_placeholder = st.empty()
+            answer_placeholder.info("관련 문서를 검색하고 있습니다...")
+            
+            col_conf, col_sources = st.columns([1, 1])
+            conf_placeholder = col_conf.empty()
+            sources_placeholder = col_sources.empty()
+            ttft_placeholder = st.empty()
+            
+            # 참조 문서는 검색 직후, 답변은 토큰이 도착하는 대로 표시
+            answer = ""
+            for event, data in stream_chat(question, target_collection):
+                if event == "sources":
+                    conf_placeholder.metric("신뢰도", f"{data.get('confidence', 0.0):.2%}")
+                    sources = data.get("sources", [])
                     if sources:
-                        st.markdown("**참조 문서:**")
-                        for source in sources:
-                            st.write(f"• {source}")
+                        sources_placeholder.markdown("**참조 문서:**\n" + "\n".join(f"- {source}" for source in sources))
                     else:
-                        st.write("참조 문서 없음")
-                        
-            except Exception as e:
-                st.error(f"❌ 답변 생성 실패: {str(e)}")
+                        sources_placeholder.write("참조 문서 없음")
+                    answer_placeholder.info("답변을 생성하고 있습니다...")
+                elif event == "token":
+                    answer += data["text"]
+                    answer_placeholder.markdown(answer + "▌")
+                elif event == "done":
+                    answer = data.get("answer", answer)
+                    answer_placeholder.markdown(answer)
+                    if data.get("ttft_ms") is not None:
+                        ttft_placeholder.caption(
+                            f"첫 토큰까지 {data['ttft_ms'] / 1000:.2f}초 · 전체 {data['total_ms'] / 1000:.2f}초"
+                            + (" · 캐시된 답변" if data.get("cached") else "")
+                        )
+                elif event == "error":
+                    answer_placeholder.error(f"❌ {data['message']}")
+                    
+        except Exception as e:
+            st.error(f"❌ 답변 생성 실패: {str(e)}")
 
 # 하단 정보
 st.markdown("---")
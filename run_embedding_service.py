@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+import os
+import sys
+
+# 백엔드 경로를 시스템 패스에 추가
+backend_path = os.path.join(os.path.dirname(__file__), 'backend')
+sys.path.insert(0, backend_path)
+
+if __name__ == "__main__":
+    from services.embedding_service import main
+    
+    main()